@@ -344,14 +344,16 @@ def insert_test_data(data_records):
                         timestamp, username, path,
                         home_cooked_meals, junk_food, exercise_minutes, strength_training,
                         no_spending, invested_bitcoin, btc_usd, btc_sats,
-                        meditation, gratitude, read_or_learned, environmental_action, score
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        meditation, gratitude, read_or_learned, environmental_action, score, entry_date
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CAST(? AS DATE))
+                    ON CONFLICT (username, entry_date) DO NOTHING
                 """, [
                     record['timestamp'], record['username'], record['path'],
                     record['home_cooked_meals'], record['junk_food'], record['exercise_minutes'], 
                     record['strength_training'], record['no_spending'], record['invested_bitcoin'], 
                     record['btc_usd'], record['btc_sats'], record['meditation'], record['gratitude'], 
-                    record['read_or_learned'], record['environmental_action'], record['score']
+                    record['read_or_learned'], record['environmental_action'], record['score'],
+                    record['timestamp']
                 ])
         
         print("✅ All records inserted successfully!")
@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db import get_db_connection
+from data_retention import erase_user, erase_all
 
 def get_user_performance_summary(username):
     """Get detailed performance summary for a user"""
@@ -102,24 +103,19 @@ def display_user_details(username, summary):
     print(f"📈 Trend: {summary['trend']}")
 
 def delete_user_data(username):
-    """Delete all data for a specific user"""
+    """Delete all data for a specific user across every table (the account is kept)"""
     try:
         with get_db_connection() as conn:
-            count_before = conn.execute(
-                "SELECT COUNT(*) FROM sovereignty WHERE username = ?", [username]
-            ).fetchone()[0]
+            deleted = erase_user(conn, username, keep_account=True)
             
-            if count_before == 0:
+            if not any(deleted.values()):
                 print(f"❌ No data found for user: {username}")
                 return False
             
-            conn.execute("DELETE FROM sovereignty WHERE username = ?", [username])
-            
-            count_after = conn.execute(
-                "SELECT COUNT(*) FROM sovereignty WHERE username = ?", [username]
-            ).fetchone()[0]
-            
-            print(f"✅ Successfully deleted {count_before} records for user {username}")
+            for table, count in deleted.items():
+                if count:
+                    print(f"   🗑️ {table}: {count} records")
+            print(f"✅ Successfully deleted {sum(deleted.values())} records for user {username}")
             return True
             
     except Exception as e:
@@ -127,13 +123,12 @@ def delete_user_data(username):
         return False
 
 def delete_all_data():
-    """Delete all data from sovereignty table"""
+    """Delete all user data from every table (accounts are kept)"""
     try:
         with get_db_connection() as conn:
-            count_before = conn.execute("SELECT COUNT(*) FROM sovereignty").fetchone()[0]
-            conn.execute("DELETE FROM sovereignty")
+            deleted = erase_all(conn, keep_accounts=True)
             
-            print(f"✅ Successfully deleted all {count_before} records from database")
+            print(f"✅ Successfully deleted all {sum(deleted.values())} records from database")
             return True
             
     except Exception as e:
@@ -293,11 +288,11 @@ def main():
             elif main_choice == "3":
                 # Delete all data
                 print(f"\n💥 DELETE ALL DATA")
-                print("⚠️  WARNING: This will permanently delete ALL sovereignty data for ALL users")
+                print("⚠️  WARNING: This will permanently delete ALL tracked data (sovereignty, XP, finance, snapshots) for ALL users")
                 print("   This action cannot be undone!")
                 
                 total_records = sum(user[2] for user in users)
-                print(f"   Total records to delete: {total_records}")
+                print(f"   Sovereignty records to delete: {total_records}")
                 
                 confirm1 = input("\nType 'DELETE ALL' to proceed: ").strip()
                 if confirm1 == "DELETE ALL":
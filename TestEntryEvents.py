@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the submission event log worker
+Events are applied in order and at most once; an event whose handlers fail
+holds back that user's later events, and only that user's.
+"""
+
+import sys
+import os
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import duckdb
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from schema_migrations import migrate
+import entry_events
+from entry_events import MAX_ATTEMPTS, SubmissionWorker, apply_event, pending_events, submit_entry
+
+ENTRY = {
+    "home_cooked_meals": 2, "junk_food": False, "exercise_minutes": 30, "strength_training": True,
+    "no_spending": True, "invested_bitcoin": False, "btc_usd": 0, "btc_sats": 0,
+    "meditation": True, "gratitude": True, "read_or_learned": False, "environmental_action": False,
+}
+
+class TestSubmissionWorker(unittest.TestCase):
+    """Ordering, redelivery and per-user blocking of submission events"""
+
+    def setUp(self):
+        self.conn = duckdb.connect(":memory:")
+        migrate(self.conn)
+        # Drained explicitly below instead of by the background thread
+        patcher = mock.patch.object(entry_events.submission_worker, "notify")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.applied = []
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _submit(self, username, day):
+        return submit_entry(self.conn, username, "default", ENTRY, 60, datetime(2025, 6, day, 9, 0))
+
+    def _failing_for(self, event_ids):
+        """apply_entry stand-in that fails for the events' timestamps and records the rest"""
+        real_apply = entry_events.apply_entry
+        failing = {self._event_key(event_id) for event_id in event_ids}
+
+        def apply(conn, username, entry, timestamp, replaced=False):
+            if (username, timestamp) in failing:
+                raise RuntimeError("handler failed")
+            self.applied.append((username, timestamp.day))
+            return real_apply(conn, username, entry, timestamp, replaced)
+        return apply
+
+    def _event_key(self, event_id):
+        return tuple(self.conn.execute(
+            "SELECT username, entry_timestamp FROM submission_events WHERE event_id = ?", [event_id]
+        ).fetchone())
+
+    def _event(self, event_id):
+        return self.conn.execute(
+            "SELECT processed_at IS NOT NULL, attempts, last_error FROM submission_events WHERE event_id = ?",
+            [event_id]
+        ).fetchone()
+
+    def test_events_apply_in_order(self):
+        """A drain applies every user's events oldest first"""
+        self._submit("alice", 2)
+        self._submit("bob", 1)
+        self._submit("alice", 3)
+        with mock.patch.object(entry_events, "apply_entry", self._failing_for([])):
+            self.assertEqual(SubmissionWorker().drain(self.conn), 3)
+        self.assertEqual(self.applied, [("alice", 2), ("bob", 1), ("alice", 3)])
+        self.assertEqual(pending_events(self.conn), [])
+
+    def test_redelivered_event_applies_once(self):
+        """Applying an already processed event changes nothing"""
+        event_id = self._submit("alice", 1)
+        event = next(e for e in pending_events(self.conn) if e[0] == event_id)
+        self.assertIsNotNone(apply_event(self.conn, *event))
+        self.assertIsNone(apply_event(self.conn, *event))
+        self.assertEqual(self._event(event_id)[:2], (True, 1))
+
+    def test_failed_event_blocks_only_that_user(self):
+        """alice's later event waits behind her failed one; bob's events still apply"""
+        failed = self._submit("alice", 1)
+        waiting = self._submit("alice", 2)
+        other = self._submit("bob", 1)
+
+        with mock.patch.object(entry_events, "apply_entry", self._failing_for([failed])):
+            SubmissionWorker().drain(self.conn)
+
+            self.assertEqual(self._event(failed), (False, 1, "handler failed"))
+            self.assertEqual(self._event(waiting), (False, 0, None))
+            self.assertEqual(self._event(other)[:2], (True, 1))
+
+            # Once the failed event is exhausted, alice stays held back and bob's new events don't
+            for _ in range(MAX_ATTEMPTS):
+                SubmissionWorker().drain(self.conn)
+            later = self._submit("bob", 2)
+            self.assertEqual([event[0] for event in pending_events(self.conn)], [later])
+            SubmissionWorker().drain(self.conn)
+
+        self.assertEqual(self._event(failed)[:2], (False, MAX_ATTEMPTS))
+        self.assertEqual(self._event(waiting), (False, 0, None))
+        self.assertEqual(self._event(later)[:2], (True, 1))
+        self.assertEqual(self.applied, [("bob", 1), ("bob", 2)])
+
+        # A retry (entry_events.py --retry) applies alice's events in order
+        self.conn.execute("UPDATE submission_events SET attempts = 0 WHERE processed_at IS NULL")
+        with mock.patch.object(entry_events, "apply_entry", self._failing_for([])):
+            self.assertEqual(SubmissionWorker().drain(self.conn), 2)
+        self.assertEqual(self.applied[-2:], [("alice", 1), ("alice", 2)])
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for one-row-per-day sovereignty ingest
+A second submission on the same day must replace that day's row and replay
+the user's achievements and weekly quest once, ending in the same state as
+if only the final submission had been made.
+"""
+
+import sys
+import os
+import unittest
+from datetime import date, datetime
+from unittest import mock
+
+import duckdb
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from schema_migrations import migrate
+from tracker.scoring import calculate_daily_score
+import sovereignty_ingest
+from sovereignty_ingest import record_entry, store_entry
+from weekly_quests import get_weekly_quest
+
+USER = "ingest_user"
+DAY = date(2025, 6, 4)
+MORNING = datetime(2025, 6, 4, 8, 0)
+EVENING = datetime(2025, 6, 4, 20, 0)
+
+FIRST = {
+    "home_cooked_meals": 1, "junk_food": True, "exercise_minutes": 10, "strength_training": False,
+    "no_spending": False, "invested_bitcoin": False, "btc_usd": 0, "btc_sats": 0,
+    "meditation": False, "gratitude": True, "read_or_learned": False, "environmental_action": False,
+}
+SECOND = {
+    "home_cooked_meals": 3, "junk_food": False, "exercise_minutes": 45, "strength_training": True,
+    "no_spending": True, "invested_bitcoin": True, "btc_usd": 25.0, "btc_sats": 25000,
+    "meditation": True, "gratitude": True, "read_or_learned": True, "environmental_action": True,
+}
+
+def _connect():
+    conn = duckdb.connect(":memory:")
+    migrate(conn)
+    get_weekly_quest(conn, USER, "default", DAY)  # The week's quest exists before the entries
+    return conn
+
+def _derived_state(conn):
+    """Achievement counters, unlocks and the week's quest, without write times"""
+    return {
+        "progress": conn.execute("""
+            SELECT metric, value, run, last_day FROM achievement_progress WHERE username = ? ORDER BY metric
+        """, [USER]).fetchall(),
+        "unlocks": conn.execute(
+            "SELECT achievement_id FROM achievement_unlocks WHERE user_name = ? ORDER BY 1", [USER]
+        ).fetchall(),
+        "quest": conn.execute("""
+            SELECT quest_type, progress, completed, last_day FROM weekly_quest_progress WHERE user_name = ?
+        """, [USER]).fetchall(),
+    }
+
+def _submit(conn, data, timestamp):
+    return record_entry(conn, USER, "default", data, calculate_daily_score(data, path="default"), timestamp)
+
+class TestSameDayResubmit(unittest.TestCase):
+    """A resubmit replaces the day's row instead of adding another"""
+
+    def setUp(self):
+        self.conn = _connect()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_store_entry_reports_replacement(self):
+        """Only the second entry of the day replaces one"""
+        score = calculate_daily_score(FIRST, path="default")
+        self.assertFalse(store_entry(self.conn, USER, "default", FIRST, score, MORNING))
+        self.assertTrue(store_entry(self.conn, USER, "default", SECOND, score, EVENING))
+        self.assertFalse(store_entry(self.conn, USER, "default", FIRST, score, datetime(2025, 6, 5, 8, 0)))
+
+    def test_second_submission_replaces_row(self):
+        """One row per day holding the latest submission"""
+        _submit(self.conn, FIRST, MORNING)
+        _submit(self.conn, SECOND, EVENING)
+
+        rows = self.conn.execute("""
+            SELECT timestamp, entry_date, home_cooked_meals, meditation, score FROM sovereignty WHERE username = ?
+        """, [USER]).fetchall()
+        self.assertEqual(rows, [(EVENING, DAY, 3, True, calculate_daily_score(SECOND, path="default"))])
+
+    def test_second_submission_replays_once(self):
+        """Achievements and the weekly quest are replayed once, not advanced twice"""
+        with mock.patch.object(sovereignty_ingest, "rebuild_user", wraps=sovereignty_ingest.rebuild_user) as rebuild, \
+             mock.patch.object(sovereignty_ingest, "replay_weekly_quest",
+                               wraps=sovereignty_ingest.replay_weekly_quest) as replay:
+            _submit(self.conn, FIRST, MORNING)
+            rebuild.assert_not_called()
+            replay.assert_not_called()
+
+            _submit(self.conn, SECOND, EVENING)
+            rebuild.assert_called_once_with(self.conn, USER)
+            replay.assert_called_once_with(self.conn, USER, EVENING)
+
+    def test_resubmit_matches_single_submission(self):
+        """Derived state after a resubmit equals submitting only the final entry"""
+        _submit(self.conn, FIRST, MORNING)
+        _submit(self.conn, SECOND, EVENING)
+
+        reference = _connect()
+        try:
+            _submit(reference, SECOND, EVENING)
+            expected = _derived_state(reference)
+        finally:
+            reference.close()
+
+        actual = _derived_state(self.conn)
+        self.assertEqual(actual, expected)
+        progress = {metric: value for metric, value, _, _ in actual["progress"]}
+        self.assertEqual(progress["total_entries"], 1)
+        self.assertEqual(progress["total_meals_cooked"], 3)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
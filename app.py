@@ -6,14 +6,18 @@ st.set_page_config(
     layout="wide"
 )
 
-import pandas as pd
-import requests
 import os, json
-from datetime import datetime
 from tracker.scoring import calculate_daily_score
 import logging
 from utils import get_current_btc_price, usd_to_sats
 from db import get_db_connection, init_db
+from entry_events import submit_entry, submission_worker
+from lazy_imports import lazy_import
+from session_tokens import resolve_session, issue_token, revoke_token
+from password_pool import PoolBusy
+
+# Heavy libraries load on first use (see lazy_imports.py)
+pd = lazy_import("pandas")
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -67,24 +71,20 @@ def safe_calculate_score(data, path):
         logger.error(f"Error calculating score: {str(e)}")
         return 0, str(e)
 
-# ── Handle Login via Query-Params ─────────────────────────────────────────────
-all_params = dict(st.query_params)
-logger.debug(f"All query parameters: {all_params}")
-
-username = st.query_params.get("username", None)
-path = st.query_params.get("path", None)
+@st.cache_resource
+def bootstrap_schema():
+    """Apply pending migrations once per server process"""
+    init_db()
+    return True
 
-# Store in session state if we got it from query params
-if username:
-    st.session_state.username = username
-if path and path in ALL_PATHS:  # Validate path exists
-    st.session_state.path = path
+bootstrap_schema()
 
-# Use session state if query params not available
-username = username or st.session_state.get("username", None)
-path = path or st.session_state.get("path", None)
+# ── Handle Login via Session Token ───────────────────────────────────────────
+# The token (from the login redirect or the form below) is verified locally on
+# each rerun; no users-table query is needed once it is in session_state
+username, path = resolve_session(st.query_params, st.session_state)
 
-logger.debug(f"Login params - username: {username}, path: {path}")
+logger.debug(f"Session - username: {username}, path: {path}")
 
 # Validate path exists in configuration
 if path and path not in ALL_PATHS:
@@ -103,21 +103,18 @@ if not username or not path:
         submit = st.form_submit_button("Log In")
 
     if submit:
-        login_payload = {
-            "username": login_username,
-            "password": login_password
-        }
         try:
-            response = requests.post("http://localhost:5002/login", json=login_payload)
-            if response.status_code == 200:
-                result = response.json()
-                st.session_state.username = result["username"]
-                st.session_state.path = result["path"]
+            # Authenticate in-process rather than round-tripping to the login service
+            from login import authenticate
+            user = authenticate(login_username.strip(), login_password)
+            if user:
+                st.session_state.session_token = issue_token(*user)
                 st.success("✅ Login successful! Loading your tracker...")
                 st.rerun()
             else:
-                error_msg = response.json().get("message", "Login failed.")
-                st.error(f"❌ {error_msg}")
+                st.error("❌ Invalid credentials.")
+        except PoolBusy:
+            st.error("❌ Login service is busy, please retry shortly.")
         except Exception as e:
             st.error(f"Login error: {str(e)}")
     
@@ -147,27 +144,6 @@ if not username or not path:
     
     st.stop()
 
-# Verify user exists and path is valid
-try:
-    logger.debug(f"Verifying user {username} with path {path}")
-    with get_db_connection() as conn:
-        user = conn.execute(
-            "SELECT username, path FROM users WHERE username = ? AND path = ?",
-            [username, path]
-        ).fetchone()
-        
-        if not user:
-            logger.warning(f"User {username} with path {path} not found")
-            st.error("❌ User not found or invalid path. Please register first.")
-            st.markdown("[Return to Landing Page](https://dmh4681.github.io/sovereignty-score/)")
-            st.stop()
-            
-        logger.debug(f"User verified: {user}")
-except Exception as e:
-    logger.error(f"Database error during user verification: {str(e)}")
-    st.error(f"❌ Database error: {str(e)}")
-    st.stop()
-
 # ── Build the Habit Tracker UI ────────────────────────────────────────────────
 st.title("🏰 Sovereignty Score Tracker")
 st.sidebar.markdown(f"### Logged in as {username}")
@@ -176,6 +152,8 @@ st.sidebar.markdown(f"### Path: {path.replace('_',' ').title()}")
 # Add logout option
 st.sidebar.markdown("---")
 if st.sidebar.button("🚪 Logout"):
+    revoke_token(st.session_state.get("session_token"))
+    st.query_params.clear()
     # Clear session state
     for key in list(st.session_state.keys()):
         del st.session_state[key]
@@ -240,6 +218,23 @@ except Exception as e:
     logger.error(f"Error loading path configuration: {str(e)}")
     st.error(f"Error loading path configuration: {str(e)}")
 
+# ── Achievements from earlier submits ──────────────────────────────────────────
+UNLOCK_WAIT_SECONDS = 0.05
+
+def show_unlocked_achievements(wait=0):
+    """Announce achievements from this session's submits that the worker has applied"""
+    pending = st.session_state.get("pending_events", [])
+    for event_id in list(pending):
+        unlocked = submission_worker.result(event_id, timeout=wait)
+        if unlocked is None:
+            continue
+        pending.remove(event_id)
+        for achievement in unlocked:
+            st.success(f"🏆 Achievement unlocked: {achievement['name']} - {achievement['description']}")
+    del pending[:-10]  # Results from before a restart never arrive
+
+show_unlocked_achievements()
+
 # ── Main Form ──────────────────────────────────────────────────────────────────
 with st.form("tracker_form"):
     st.markdown("### Today's Activities")
@@ -326,21 +321,13 @@ if submitted:
             # Save to database using named columns (FIXED!)
             try:
                 with get_db_connection() as conn:
-                    conn.execute("""
-                        INSERT INTO sovereignty (
-                            timestamp, username, path,
-                            home_cooked_meals, junk_food, exercise_minutes, strength_training,
-                            no_spending, invested_bitcoin, btc_usd, btc_sats,
-                            meditation, gratitude, read_or_learned, environmental_action, score
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, [
-                        datetime.utcnow(), username, path,
-                        meals, not no_junk, mins, lift,
-                        spend, btc, float(btc_usd), int(btc_sats),
-                        med, grat, learn, env, int(score)
-                    ])
+                    event_id = submit_entry(conn, username, path, data, score)
                 
                 st.success(f"💪 Your score: {score}/100")
+                # Achievements are applied in the background; show them if they land in
+                # the next moment, otherwise on a later rerun
+                st.session_state.setdefault("pending_events", []).append(event_id)
+                show_unlocked_achievements(wait=UNLOCK_WAIT_SECONDS)
                 
                 # Show score breakdown if it's not the maximum
                 if score < cfg.get('max_score', 100):
@@ -1,8 +1,40 @@
+# backup_db.py
+"""
+Online database backups
+Snapshots are taken through DuckDB rather than by copying the live file: the
+database is checkpointed, then EXPORT DATABASE writes every table as
+zstd-compressed Parquet (in parallel, one file per table) from a single
+transaction, so the snapshot is consistent even while other connections in
+this process are writing. Each snapshot is verified by importing it into an
+in-memory database and comparing row counts before it is kept.
+
+Between full snapshots, backups are incremental: the append-only tables in
+INCREMENTAL_TABLES only export rows newer than the previous backup's
+high-water mark, and the small mutable tables are re-exported whole. The
+manifest also records a content checksum of each incremental table, so rows
+rewritten in place below the mark (score rewrites, drift corrections) send
+that table back to a whole export rather than being missed. A restore imports
+the full snapshot, replays its deltas in order and checks the row counts and
+checksums of the result.
+
+    python backup_db.py                      # snapshot or delta, whichever is due
+    python backup_db.py --full               # force a full snapshot
+    python backup_db.py --verify <backup>    # re-check an existing one
+    python backup_db.py --restore <backup> --to restored.duckdb
+"""
+
 import os
+import re
+import gzip
+import json
 import shutil
-from datetime import datetime
 import logging
-import gzip
+import argparse
+from datetime import datetime, timedelta
+
+import duckdb
+
+from xp_schema import XP_LAYOUTS, xp_columns
 
 # Set up logging
 logging.basicConfig(
@@ -15,77 +47,449 @@ logger = logging.getLogger(__name__)
 BASE_DIR = os.path.dirname(__file__)
 DB_PATH = os.path.join(BASE_DIR, "data", "sovereignty.duckdb")
 BACKUP_DIR = os.path.join(BASE_DIR, "backups")
-MAX_BACKUPS = 7  # Keep last 7 days of backups
+COMPRESSION = os.environ.get("BACKUP_COMPRESSION", "ZSTD")
+FULL_EVERY = int(os.environ.get("BACKUP_FULL_EVERY", 6))    # Deltas before the next full snapshot
+KEEP_DAILY = int(os.environ.get("BACKUP_KEEP_DAILY", 7))    # Newest backup of each of the last N days
+KEEP_WEEKLY = int(os.environ.get("BACKUP_KEEP_WEEKLY", 8))  # Newest backup of each of the last N weeks
+
+# Append-only tables and the timestamp column used as their high-water mark.
+# Every other table is small and updated in place, so deltas carry it whole.
+# The XP tables' column depends on their layout and is resolved through xp_schema.
+INCREMENTAL_TABLES = {
+    "sovereignty": "timestamp",
+    "xp_transactions": "created_at",
+    "daily_challenge_completion": "completion_time",
+    "achievement_unlocks": "unlocked_at",
+}
+
+MANIFEST = "manifest.json"
+
+# sovereignty_snapshot_<ts>/, sovereignty_delta_<ts>/ and legacy sovereignty_backup_<ts>.duckdb.gz
+_BACKUP_NAME = re.compile(r"^sovereignty_(snapshot|delta|backup)_(\d{8}_\d{6})(?:_(\d{6}))?")
+
+def _sql_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _table_names(conn):
+    return [name for (name,) in conn.execute("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = 'main' AND table_type = 'BASE TABLE'
+        ORDER BY table_name
+    """).fetchall()]
+
+def _row_counts(conn, tables):
+    return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+
+def _tracked_column(conn, table):
+    """High-water column of `table`, if it is incremental and has that column in this database"""
+    column = INCREMENTAL_TABLES.get(table)
+    if column is None:
+        return None
+    if table in XP_LAYOUTS["simple"]:
+        columns = xp_columns(conn, table)
+        return columns["time"] if columns else None
+    exists = conn.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'main' AND table_name = ? AND column_name = ?
+    """, [table, column]).fetchone()
+    return column if exists else None
+
+def _high_water(conn, table):
+    column = _tracked_column(conn, table)
+    if column is None:
+        return None
+    value = conn.execute(f'SELECT MAX("{column}") FROM "{table}"').fetchone()[0]
+    return value.isoformat() if value is not None else None
+
+def _checksum(conn, table, where=None):
+    """Order-independent hash of the rows of an incremental table (None for the others)"""
+    if _tracked_column(conn, table) is None:
+        return None
+    query = f'SELECT SUM(hash(t)) FROM "{table}" t' + (f" WHERE {where}" if where else "")
+    value = conn.execute(query).fetchone()[0]
+    return str(value or 0)  # HUGEINT; kept as text in the JSON manifest
+
+def _checkpoint(conn):
+    try:
+        conn.execute("CHECKPOINT")
+    except duckdb.Error as e:
+        # Another transaction is open; the export is still consistent, the WAL just isn't folded in
+        logger.warning(f"Checkpoint skipped: {e}")
+
+def _write_manifest(target_dir, manifest):
+    with open(os.path.join(target_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def read_manifest(backup_path):
+    with open(os.path.join(backup_path, MANIFEST), encoding="utf-8") as f:
+        return json.load(f)
+
+# ── Export ─────────────────────────────────────────────────────────────────────
+
+def export_snapshot(conn, target_dir):
+    """
+    EXPORT the database behind `conn` into `target_dir`
+    Row counts and high-water marks are read in the same transaction as the
+    export, so the manifest describes exactly what was written.
+    """
+    _checkpoint(conn)
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        tables = {}
+        for table, rows in _row_counts(conn, _table_names(conn)).items():
+            tables[table] = {"mode": "full", "rows": rows, "total_rows": rows,
+                             "high_water": _high_water(conn, table), "checksum": _checksum(conn, table)}
+        conn.execute(f"EXPORT DATABASE {_sql_literal(target_dir)} (FORMAT PARQUET, COMPRESSION {COMPRESSION})")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return _write_manifest(target_dir, {
+        "kind": "full",
+        "parent": None,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "duckdb_version": duckdb.__version__,
+        "compression": COMPRESSION.lower(),
+        "tables": tables,
+    })
+
+def _delta_plan(conn, table, previous):
+    """
+    ('append', WHERE clause) when only rows past the high-water mark are new,
+    else ('replace', None). A table whose rows at or below the mark no longer
+    match the previous backup's count and checksum (backdated inserts,
+    deletes, in-place updates) is re-exported.
+    """
+    column = _tracked_column(conn, table)
+    if column is None or previous is None:
+        return "replace", None
+    if previous["high_water"] is None:
+        return ("append", None) if previous["total_rows"] == 0 else ("replace", None)
+
+    where = f'"{column}" > CAST({_sql_literal(previous["high_water"])} AS TIMESTAMP)'
+    older = f'NOT ({where}) OR "{column}" IS NULL'
+    count = conn.execute(f'SELECT COUNT(*) FROM "{table}" WHERE {older}').fetchone()[0]
+    # Backups from before checksums were recorded can't be trusted for an append
+    if count != previous["total_rows"] or _checksum(conn, table, older) != previous.get("checksum"):
+        logger.info(f"{table}: rows changed below the high-water mark, exporting it whole")
+        return "replace", None
+    return "append", where
+
+def export_delta(conn, target_dir, parent_path):
+    """Export everything that changed since the backup at `parent_path`"""
+    parent = read_manifest(parent_path)
+    os.makedirs(target_dir)
+
+    _checkpoint(conn)
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        tables = {}
+        for table in _table_names(conn):
+            mode, where = _delta_plan(conn, table, parent["tables"].get(table))
+            query = f'SELECT * FROM "{table}"' + (f" WHERE {where}" if where else "")
+            rows = conn.execute(f"SELECT COUNT(*) FROM ({query})").fetchone()[0]
+            total_rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            if mode == "replace" or rows:
+                target = _sql_literal(os.path.join(target_dir, f"{table}.parquet"))
+                conn.execute(f"COPY ({query}) TO {target} (FORMAT PARQUET, COMPRESSION {COMPRESSION})")
+            tables[table] = {"mode": mode, "rows": rows, "total_rows": total_rows,
+                             "high_water": _high_water(conn, table), "checksum": _checksum(conn, table)}
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return _write_manifest(target_dir, {
+        "kind": "incremental",
+        "parent": os.path.basename(parent_path),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "duckdb_version": duckdb.__version__,
+        "compression": COMPRESSION.lower(),
+        "tables": tables,
+    })
+
+# ── Verification ───────────────────────────────────────────────────────────────
+
+def verify_backup(backup_path):
+    """
+    Re-open a backup and check it against its manifest
+    Full snapshots are imported into memory; deltas have each Parquet file
+    counted.
+    """
+    manifest = read_manifest(backup_path)
+    conn = duckdb.connect()
+    try:
+        if manifest["kind"] == "full":
+            conn.execute(f"IMPORT DATABASE {_sql_literal(backup_path)}")
+            actual = _row_counts(conn, _table_names(conn))
+        else:
+            actual = {}
+            for table, entry in manifest["tables"].items():
+                parquet = os.path.join(backup_path, f"{table}.parquet")
+                if entry["mode"] == "replace" or entry["rows"]:
+                    actual[table] = conn.execute(
+                        "SELECT COUNT(*) FROM read_parquet(?)", [parquet]
+                    ).fetchone()[0]
+                else:
+                    actual[table] = 0
+    except duckdb.Error as e:
+        logger.error(f"Backup verification failed for {backup_path}: {e}")
+        return False
+    finally:
+        conn.close()
+
+    expected = {table: entry["rows"] for table, entry in manifest["tables"].items()}
+    if actual != expected:
+        mismatched = sorted(t for t in set(actual) | set(expected) if actual.get(t) != expected.get(t))
+        logger.error(f"Backup verification failed for {backup_path}: {mismatched}")
+        return False
+    logger.info(f"Backup verified: {len(actual)} tables, {sum(actual.values())} rows")
+    return True
+
+# ── Backup ─────────────────────────────────────────────────────────────────────
+
+def list_backups():
+    """(timestamp, path) for every snapshot, delta and legacy backup, newest first"""
+    if not os.path.isdir(BACKUP_DIR):
+        return []
+    backups = []
+    for name in os.listdir(BACKUP_DIR):
+        match = _BACKUP_NAME.match(name)
+        if match and not name.endswith(".partial"):
+            backups.append((match.group(2) + (match.group(3) or ""), os.path.join(BACKUP_DIR, name)))
+    return sorted(backups, reverse=True)
+
+def backup_chain(backup_path):
+    """[full snapshot, delta, ..., backup_path] needed to restore `backup_path`"""
+    chain = [backup_path]
+    if not os.path.isdir(backup_path):
+        return chain  # Legacy compressed file copy
+    manifest = read_manifest(backup_path)
+    while manifest["parent"]:
+        parent_path = os.path.join(os.path.dirname(backup_path), manifest["parent"])
+        if not os.path.isdir(parent_path):
+            raise FileNotFoundError(f"Backup chain broken: {manifest['parent']} is missing")
+        chain.insert(0, parent_path)
+        manifest = read_manifest(parent_path)
+    return chain
+
+def _latest_chain():
+    """Chain of the newest DuckDB-exported backup, or None"""
+    for _, path in list_backups():
+        if os.path.isdir(path):
+            try:
+                return backup_chain(path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unusable backup chain at {path}: {e}")
+                return None
+    return None
 
-def create_backup():
-    """Create a compressed backup of the database file"""
+def create_backup(conn=None, incremental=None):
+    """
+    Take a verified backup of the database; returns its path or None
+    incremental=None takes a delta when a recent full snapshot exists (fewer
+    than FULL_EVERY deltas ago) and a full snapshot otherwise. Pass `conn` to
+    back up through an existing connection (DuckDB allows one writer process
+    per file), otherwise DB_PATH is opened here.
+    """
     try:
         # Ensure backup directory exists
         os.makedirs(BACKUP_DIR, exist_ok=True)
-        logger.info(f"Backup directory: {BACKUP_DIR}")
-        
-        # Check if source database exists
-        if not os.path.exists(DB_PATH):
+
+        if conn is None and not os.path.exists(DB_PATH):
             logger.error(f"Database file not found at: {DB_PATH}")
-            return False
-            
-        logger.info(f"Source database found at: {DB_PATH}")
-        
-        # Create backup filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"sovereignty_backup_{timestamp}.duckdb"
-        backup_path = os.path.join(BACKUP_DIR, backup_name)
-        logger.info(f"Creating backup at: {backup_path}")
-        
-        # Copy the database file
-        logger.info(f"Copying database file...")
-        shutil.copy2(DB_PATH, backup_path)
-        logger.info("Database file copied successfully")
-        
-        # Compress the backup
-        logger.info("Compressing backup...")
-        with open(backup_path, 'rb') as f_in:
-            with gzip.open(f"{backup_path}.gz", 'wb') as f_out:
-                shutil.copyfileobj(f_in, f_out)
-        logger.info("Backup compressed successfully")
-        
-        # Remove the uncompressed backup
-        logger.info("Removing uncompressed backup...")
-        os.remove(backup_path)
-        logger.info("Uncompressed backup removed")
-        
+            return None
+
+        chain = _latest_chain() if incremental is not False else None
+        if incremental is None and chain and len(chain) > FULL_EVERY:
+            chain = None
+        if incremental and not chain:
+            logger.info("No full snapshot to build on, taking a full backup")
+
+        kind = "delta" if chain else "snapshot"
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        backup_path = os.path.join(BACKUP_DIR, f"sovereignty_{kind}_{timestamp}")
+        partial_dir = backup_path + ".partial"
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        logger.info(f"Exporting {kind} to: {backup_path}")
+
+        own_conn = conn is None
+        if own_conn:
+            conn = duckdb.connect(DB_PATH)
+        try:
+            if chain:
+                manifest = export_delta(conn, partial_dir, chain[-1])
+            else:
+                manifest = export_snapshot(conn, partial_dir)
+        finally:
+            if own_conn:
+                conn.close()
+
+        # Only a verified backup gets its final name
+        if not verify_backup(partial_dir):
+            shutil.rmtree(partial_dir, ignore_errors=True)
+            return None
+        os.replace(partial_dir, backup_path)
+        rows = sum(entry["rows"] for entry in manifest["tables"].values())
+        logger.info(f"Backup completed: {rows} rows exported")
+
         # Clean up old backups
         cleanup_old_backups()
-        
-        # Verify the compressed backup exists
-        if os.path.exists(f"{backup_path}.gz"):
-            logger.info("Compressed backup verified")
-        else:
-            logger.error("Compressed backup not found after creation")
-            return False
-            
-        logger.info("Backup completed successfully")
-        return True
-        
+        return backup_path
+
     except Exception as e:
         logger.error(f"Backup failed: {str(e)}")
+        return None
+
+# ── Restore ────────────────────────────────────────────────────────────────────
+
+def _apply_delta(conn, delta_path):
+    manifest = read_manifest(delta_path)
+    existing = set(_table_names(conn))
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        for table, entry in manifest["tables"].items():
+            parquet = _sql_literal(os.path.join(delta_path, f"{table}.parquet"))
+            if table not in existing:
+                # Created after the full snapshot; constraints come back with the next migration run
+                conn.execute(f'CREATE TABLE "{table}" AS SELECT * FROM read_parquet({parquet})')
+                continue
+            if entry["mode"] == "replace":
+                conn.execute(f'DELETE FROM "{table}"')
+            if entry["mode"] == "replace" or entry["rows"]:
+                conn.execute(f'INSERT INTO "{table}" BY NAME SELECT * FROM read_parquet({parquet})')
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return manifest
+
+def restore_backup(backup_path, target_path):
+    """
+    Rebuild the database as of `backup_path` into a new file at `target_path`
+    The full snapshot is imported, migrations written since are applied so
+    later deltas fit, then each delta is replayed in order. The result must
+    match the last manifest's row counts and checksums. Returns True on
+    success; a failed restore leaves no file behind.
+    """
+    if os.path.exists(target_path):
+        logger.error(f"Refusing to restore over existing file: {target_path}")
+        return False
+
+    chain = backup_chain(backup_path)
+    logger.info(f"Restoring {len(chain)} backup(s) into {target_path}")
+    try:
+        if not os.path.isdir(chain[0]):
+            # Legacy compressed copy of the database file
+            with gzip.open(chain[0], "rb") as f_in, open(target_path, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            return True
+
+        conn = duckdb.connect(target_path)
+        try:
+            conn.execute(f"IMPORT DATABASE {_sql_literal(chain[0])}")
+            manifest = read_manifest(chain[0])
+            if len(chain) > 1:
+                from schema_migrations import migrate
+                migrate(conn)
+            for delta_path in chain[1:]:
+                manifest = _apply_delta(conn, delta_path)
+                logger.info(f"Replayed {os.path.basename(delta_path)}")
+
+            restored = _row_counts(conn, list(manifest["tables"]))
+            changed = sorted(
+                table for table, entry in manifest["tables"].items()
+                if entry.get("checksum") is not None and _checksum(conn, table) != entry["checksum"]
+            )
+        finally:
+            conn.close()
+
+        expected = {table: entry["total_rows"] for table, entry in manifest["tables"].items()}
+        if restored != expected:
+            mismatched = sorted(t for t in expected if restored.get(t) != expected[t])
+            raise ValueError(f"restored row counts differ from the backup: {mismatched}")
+        if changed:
+            raise ValueError(f"restored contents differ from the backup: {changed}")
+        logger.info(f"Restore completed: {sum(restored.values())} rows in {len(restored)} tables")
+        return True
+
+    except Exception as e:
+        logger.error(f"Restore failed: {str(e)}")
+        for leftover in (target_path, target_path + ".wal"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
         return False
 
+# ── Retention ──────────────────────────────────────────────────────────────────
+
+def _backup_time(timestamp):
+    return datetime.strptime(timestamp[:15], "%Y%m%d_%H%M%S")
+
+def select_retained(backups, keep_daily=KEEP_DAILY, keep_weekly=KEEP_WEEKLY):
+    """
+    Paths to keep out of `backups` ((timestamp, path), newest first)
+    The newest backup of each of the last `keep_daily` days and `keep_weekly`
+    ISO weeks is kept, along with every backup its restore chain needs.
+    """
+    if not backups:
+        return set()
+    newest = _backup_time(backups[0][0])
+    daily_cutoff = newest.date() - timedelta(days=keep_daily - 1)
+    weekly_cutoff = newest.date() - timedelta(weeks=keep_weekly - 1)
+
+    keep, days_seen, weeks_seen = {backups[0][1]}, set(), set()
+    for timestamp, path in backups:
+        day = _backup_time(timestamp).date()
+        week = day.isocalendar()[:2]
+        if day >= daily_cutoff and day not in days_seen:
+            days_seen.add(day)
+            keep.add(path)
+        if day >= weekly_cutoff - timedelta(days=day.weekday()) and week not in weeks_seen:
+            weeks_seen.add(week)
+            keep.add(path)
+
+    for path in list(keep):
+        try:
+            keep.update(backup_chain(path))
+        except FileNotFoundError as e:
+            logger.warning(f"{os.path.basename(path)}: {e}")
+    return keep
+
 def cleanup_old_backups():
-    """Remove backups older than MAX_BACKUPS days"""
+    """
+    Apply the daily/weekly retention policy to BACKUP_DIR
+    Only DuckDB-exported snapshots and deltas are pruned; legacy file copies
+    (sovereignty_backup_*.duckdb.gz) predate the policy and are left alone.
+    """
     try:
-        # Get list of backup files
-        backups = [f for f in os.listdir(BACKUP_DIR) if f.endswith('.gz')]
-        backups.sort(reverse=True)  # Sort by name (which includes timestamp)
-        
-        # Remove old backups
-        if len(backups) > MAX_BACKUPS:
-            for old_backup in backups[MAX_BACKUPS:]:
-                os.remove(os.path.join(BACKUP_DIR, old_backup))
-                logger.info(f"Removed old backup: {old_backup}")
-                
+        backups = [(timestamp, path) for timestamp, path in list_backups() if os.path.isdir(path)]
+        keep = select_retained(backups)
+        for _, old_backup in backups:
+            if old_backup in keep:
+                continue
+            if os.path.isdir(old_backup):
+                shutil.rmtree(old_backup)
+            else:
+                os.remove(old_backup)
+            logger.info(f"Removed old backup: {os.path.basename(old_backup)}")
+
     except Exception as e:
         logger.error(f"Cleanup failed: {str(e)}")
 
 if __name__ == "__main__":
-    create_backup() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Online DuckDB backups")
+    parser.add_argument("--full", action="store_true", help="Take a full snapshot even if a delta is due")
+    parser.add_argument("--verify", metavar="BACKUP", help="Verify an existing backup directory")
+    parser.add_argument("--restore", metavar="BACKUP", help="Restore a backup (and its chain)")
+    parser.add_argument("--to", metavar="PATH", help="New database file to restore into")
+    args = parser.parse_args()
+
+    if args.verify:
+        raise SystemExit(0 if verify_backup(args.verify) else 1)
+    if args.restore:
+        if not args.to:
+            parser.error("--restore needs --to")
+        raise SystemExit(0 if restore_backup(args.restore, args.to) else 1)
+    raise SystemExit(0 if create_backup(incremental=False if args.full else None) else 1)
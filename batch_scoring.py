@@ -0,0 +1,255 @@
+# batch_scoring.py
+"""
+Headless batch scoring for files of daily entries
+Streams entries from JSON Lines, a single JSON object/array, CSV or Parquet in
+fixed-size chunks, scores each chunk with tracker.scoring against one or all
+paths, and streams the results to JSON Lines, CSV or Parquet. Large inputs are
+scored in a process pool with a bounded number of chunks in flight, so memory
+stays flat regardless of file size.
+
+    python main.py score entries.jsonl --path all --output scored.csv
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import duckdb
+
+from tracker.scoring import calculate_daily_score, ALL_PATHS
+
+CHUNK_SIZE = 5_000
+PARALLEL_THRESHOLD_BYTES = 5 * 1024 * 1024  # Smaller files aren't worth the pool start-up
+
+# ── Readers ────────────────────────────────────────────────────────────────────
+
+def _open_text(file_path):
+    """Open a text file honouring a UTF-16 / UTF-8 byte-order mark"""
+    with open(file_path, "rb") as f:
+        head = f.read(2)
+    encoding = "utf-16" if head in (b"\xff\xfe", b"\xfe\xff") else "utf-8-sig"
+    return open(file_path, "r", encoding=encoding, newline="")
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _iter_json(file_path):
+    with _open_text(file_path) as f:
+        first_line = f.readline()
+        try:
+            first = json.loads(first_line) if first_line.strip() else None
+        except json.JSONDecodeError:
+            # Pretty-printed document (e.g. data/sample_input.json) - small by nature
+            first = json.loads(first_line + f.read())
+
+        for record in (first if isinstance(first, list) else [first]):
+            if record:
+                yield record
+        # JSON Lines: everything after the first record, one line at a time
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _present(record):
+    """Drop blank cells so the scorer falls back to its defaults for them"""
+    return {key: value for key, value in record.items() if value is not None}
+
+def _iter_csv(file_path):
+    with _open_text(file_path) as f:
+        for row in csv.DictReader(f):
+            yield _present({key: _coerce(value) for key, value in row.items()})
+
+def _coerce(value):
+    """CSV cells arrive as strings; scoring needs numbers and booleans"""
+    if value is None or value == "":
+        return None
+    lowered = value.strip().lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+def _iter_parquet(file_path, chunk_size):
+    conn = duckdb.connect()
+    try:
+        result = conn.execute("SELECT * FROM read_parquet(?)", [file_path])
+        columns = [d[0] for d in result.description]
+        while True:
+            rows = result.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [_present(dict(zip(columns, row))) for row in rows]
+    finally:
+        conn.close()
+
+def read_chunks(file_path, chunk_size=CHUNK_SIZE):
+    """Yield lists of entry dicts, `chunk_size` at a time"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".parquet":
+        yield from _iter_parquet(file_path, chunk_size)
+    elif extension == ".csv":
+        yield from _chunked(_iter_csv(file_path), chunk_size)
+    elif extension in (".json", ".jsonl", ".ndjson"):
+        yield from _chunked(_iter_json(file_path), chunk_size)
+    else:
+        raise ValueError(f"Unsupported input format: {extension or file_path}")
+
+# ── Scoring ────────────────────────────────────────────────────────────────────
+
+def score_chunk(entries, paths):
+    """Score every entry against every path; one result row per (entry, path)"""
+    results = []
+    for entry in entries:
+        entry_path = entry.get("path")
+        for path in (paths or [entry_path or "default"]):
+            try:
+                score, error = calculate_daily_score(entry, path=path), None
+            except Exception as e:
+                score, error = None, str(e)
+            results.append({**entry, "path": path, "score": score, "error": error})
+    return results
+
+# ── Writers ────────────────────────────────────────────────────────────────────
+
+class _JsonLinesWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, rows):
+        for row in rows:
+            self.stream.write(json.dumps(row, default=str) + "\n")
+
+    def close(self):
+        self.stream.flush()
+
+class _CsvWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self.writer = None
+
+    def write(self, rows):
+        for row in rows:
+            if self.writer is None:
+                self.writer = csv.DictWriter(self.stream, fieldnames=list(row), extrasaction="ignore")
+                self.writer.writeheader()
+            self.writer.writerow(row)
+
+    def close(self):
+        self.stream.flush()
+
+class _ParquetWriter(_JsonLinesWriter):
+    """Spool to a temporary JSON Lines file, then let DuckDB convert it"""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.spool = tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8")
+        super().__init__(self.spool)
+
+    def close(self):
+        self.spool.close()
+        target = self.output_path.replace("'", "''")  # COPY TO takes a literal path
+        try:
+            conn = duckdb.connect()
+            conn.execute(f"COPY (SELECT * FROM read_json_auto(?)) TO '{target}' (FORMAT PARQUET)",
+                         [self.spool.name])
+            conn.close()
+        finally:
+            os.remove(self.spool.name)
+
+def open_writer(output_path):
+    """Writer for the output extension (.jsonl, .csv, .parquet); None means stdout JSON Lines"""
+    if output_path is None:
+        return _JsonLinesWriter(sys.stdout), None
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension == ".parquet":
+        return _ParquetWriter(output_path), None
+    stream = open(output_path, "w", encoding="utf-8", newline="")
+    if extension == ".csv":
+        return _CsvWriter(stream), stream
+    if extension in (".json", ".jsonl", ".ndjson"):
+        return _JsonLinesWriter(stream), stream
+    stream.close()
+    raise ValueError(f"Unsupported output format: {extension or output_path}")
+
+# ── Driver ─────────────────────────────────────────────────────────────────────
+
+def resolve_paths(path):
+    """None keeps each entry's own path; 'all' expands to every configured path"""
+    if path in (None, ""):
+        return None
+    if path == "all":
+        return list(ALL_PATHS)
+    if path not in ALL_PATHS:
+        raise ValueError(f"Unknown scoring path: {path}")
+    return [path]
+
+def score_file(input_path, output_path=None, path=None, chunk_size=CHUNK_SIZE, workers=None):
+    """
+    Score `input_path` into `output_path` and return throughput stats
+    workers=None picks a pool for large files and inline scoring otherwise;
+    workers=1 forces inline.
+    """
+    paths = resolve_paths(path)
+    if workers is None:
+        workers = (os.cpu_count() or 1) if os.path.getsize(input_path) >= PARALLEL_THRESHOLD_BYTES else 1
+
+    writer, stream = open_writer(output_path)
+    started = time.perf_counter()
+    entries = results = chunks = errors = 0
+
+    def emit(rows):
+        nonlocal results, errors
+        writer.write(rows)
+        results += len(rows)
+        errors += sum(1 for row in rows if row["error"])
+
+    try:
+        if workers <= 1:
+            for chunk in read_chunks(input_path, chunk_size):
+                entries += len(chunk)
+                chunks += 1
+                emit(score_chunk(chunk, paths))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Bounded in-flight window keeps memory flat and output in input order
+                pending = deque()
+                for chunk in read_chunks(input_path, chunk_size):
+                    entries += len(chunk)
+                    chunks += 1
+                    pending.append(pool.submit(score_chunk, chunk, paths))
+                    if len(pending) >= workers * 2:
+                        emit(pending.popleft().result())
+                while pending:
+                    emit(pending.popleft().result())
+    finally:
+        writer.close()
+        if stream is not None:
+            stream.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "entries": entries,
+        "results": results,
+        "errors": errors,
+        "chunks": chunks,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "entries_per_second": round(entries / elapsed, 1) if elapsed else None,
+    }
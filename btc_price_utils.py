@@ -4,12 +4,45 @@ Centralized BTC price handling utilities for the Family Finance Plan
 Place this file in your main sovereignty-score directory
 """
 
-import streamlit as st
+import time
+import logging
+import functools
 from datetime import datetime, timedelta
 from typing import Optional, Tuple
 from db import get_db_connection
+from lazy_imports import running_streamlit
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+logger = logging.getLogger(__name__)
+
+def cache_for(seconds):
+    """st.cache_data inside Streamlit; a plain time-based memo for CLI scripts"""
+    st = running_streamlit()
+    if st is not None:
+        return st.cache_data(ttl=seconds)
+
+    def decorator(fn):
+        cached = {}
+        @functools.wraps(fn)
+        def wrapper():
+            if "value" not in cached or time.monotonic() - cached["at"] > seconds:
+                cached["value"], cached["at"] = fn(), time.monotonic()
+            return cached["value"]
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+def warn(message):
+    """Show a warning in the page when running under Streamlit, else log it"""
+    st = running_streamlit()
+    if st is not None:
+        try:
+            st.warning(message)
+            return
+        except Exception:
+            pass
+    logger.warning(message)
+
+@cache_for(300)  # Cache for 5 minutes
 def get_current_btc_price() -> Tuple[float, datetime]:
     """
     Get current BTC price from database with proper error handling
@@ -41,19 +74,12 @@ def get_current_btc_price() -> Tuple[float, datetime]:
                 return float(fallback_result[0]), fallback_result[1]
                 
     except Exception as e:
-        # Don't show warning if we're not in a Streamlit context
-        try:
-            st.warning(f"Unable to fetch BTC price from database: {str(e)}")
-        except:
-            pass
+        warn(f"Unable to fetch BTC price from database: {str(e)}")
     
     # Last resort: return a reasonable market estimate
     # This should be updated periodically based on market conditions
     default_price = 95000.0  # As of late 2024/early 2025
-    try:
-        st.warning(f"Using estimated BTC price of ${default_price:,.0f}. Please update your price data.")
-    except:
-        pass
+    warn(f"Using estimated BTC price of ${default_price:,.0f}. Please update your price data.")
     return default_price, datetime.now()
 
 def format_btc_display(btc_amount: float, show_sats: bool = True) -> str:
@@ -1,7 +0,0 @@
-CREATE TABLE IF NOT EXISTS users (
-    username    TEXT PRIMARY KEY,
-    email       TEXT NOT NULL,
-    password    TEXT NOT NULL,
-    path        TEXT NOT NULL,
-    created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
@@ -0,0 +1,57 @@
+-- Core tables previously created by db.init_db, register.init_db and add_missing_tables.py
+
+CREATE TABLE IF NOT EXISTS users (
+    username    TEXT PRIMARY KEY,
+    email       TEXT NOT NULL,
+    password    TEXT NOT NULL,
+    path        TEXT NOT NULL,
+    created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS sovereignty (
+    timestamp            TIMESTAMP,
+    username             VARCHAR,
+    path                 VARCHAR,
+    home_cooked_meals    INTEGER,
+    junk_food            BOOLEAN,
+    exercise_minutes     INTEGER,
+    strength_training    BOOLEAN,
+    no_spending          BOOLEAN,
+    invested_bitcoin     BOOLEAN,
+    btc_usd              REAL DEFAULT 0,
+    btc_sats             INTEGER DEFAULT 0,
+    meditation           BOOLEAN,
+    gratitude            BOOLEAN,
+    read_or_learned      BOOLEAN,
+    environmental_action BOOLEAN,
+    score                INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS btc_price_history (
+    date           DATE PRIMARY KEY,
+    closing_price  REAL NOT NULL,
+    volume         REAL,
+    market_cap     REAL,
+    created_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Default price so BTC conversions work before the first price fetch
+INSERT INTO btc_price_history (date, closing_price, volume, market_cap)
+SELECT CURRENT_DATE, 95000.0, 0, 0
+WHERE NOT EXISTS (SELECT 1 FROM btc_price_history);
+
+CREATE TABLE IF NOT EXISTS sovereignty_snapshot (
+    username                    TEXT NOT NULL,
+    snapshot_date              TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    total_assets               REAL,
+    total_crypto               REAL,
+    total_traditional          REAL,
+    monthly_expenses           REAL,
+    annual_expenses            REAL,
+    sovereignty_ratio          REAL,
+    full_sovereignty_ratio     REAL,
+    sovereignty_status         TEXT,
+    emergency_runway_months    REAL,
+    btc_price_at_snapshot      REAL,
+    PRIMARY KEY (username, snapshot_date)
+);
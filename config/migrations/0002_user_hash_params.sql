@@ -0,0 +1,10 @@
+-- Per-user password hash parameters for rehash-on-login (see password_policy.py)
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS hash_algo VARCHAR;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS hash_cost INTEGER;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS hash_updated_at TIMESTAMP;
+
+UPDATE users
+SET hash_algo = 'bcrypt',
+    hash_cost = TRY_CAST(regexp_extract(password, '^\$2[abxy]?\$(\d{2})\$', 1) AS INTEGER)
+WHERE hash_cost IS NULL;
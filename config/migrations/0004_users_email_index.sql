@@ -0,0 +1,6 @@
+-- Indexed uniqueness checks for registration (see register.find_registration_conflict)
+-- Emails are stored lower-cased and trimmed so lookups can use a plain equality
+
+UPDATE users SET email = lower(trim(email)) WHERE email <> lower(trim(email));
+
+CREATE INDEX IF NOT EXISTS idx_users_email ON users (email);
@@ -0,0 +1,24 @@
+-- Incremental achievements (see sovereignty_achievements.py)
+-- One row per (user, metric): running counters and streak state, so reading
+-- achievements no longer scans the user's whole history
+
+CREATE TABLE IF NOT EXISTS achievement_progress (
+    username    VARCHAR NOT NULL,
+    metric      VARCHAR NOT NULL,
+    value       DOUBLE NOT NULL DEFAULT 0,   -- counter, sum, max or longest streak
+    run         INTEGER NOT NULL DEFAULT 0,  -- current streak length (streak metrics)
+    last_day    DATE,                        -- last day counted (day and streak metrics)
+    updated_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (username, metric)
+);
+
+-- Same shape as the table xp_system creates, so either can create it first
+CREATE TABLE IF NOT EXISTS achievement_unlocks (
+    unlock_id       VARCHAR PRIMARY KEY,
+    user_name       VARCHAR NOT NULL,
+    achievement_id  VARCHAR NOT NULL,
+    xp_reward       INTEGER NOT NULL,
+    unlocked_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_achievement_unlocks_user ON achievement_unlocks (user_name);
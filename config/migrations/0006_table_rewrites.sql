@@ -0,0 +1,13 @@
+-- Resumable cursors for chunked table rewrites (see table_rewrite.py)
+
+CREATE TABLE IF NOT EXISTS table_rewrites (
+    name         VARCHAR PRIMARY KEY,
+    source       VARCHAR NOT NULL,
+    target       VARCHAR NOT NULL,
+    cursor       TIMESTAMP,                -- rows with order column <= cursor are copied
+    copied       BIGINT NOT NULL DEFAULT 0,
+    quarantined  BIGINT NOT NULL DEFAULT 0,
+    status       VARCHAR NOT NULL,         -- copying, done
+    started_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,25 @@
+-- Score drift detection (see score_drift.py)
+-- One row per drift run, and an audit row for every stored score it rewrote
+
+CREATE TABLE IF NOT EXISTS score_drift_runs (
+    run_id        VARCHAR PRIMARY KEY,
+    started_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    config_hash   VARCHAR NOT NULL,          -- sha256 of the scoring config used
+    rows_checked  BIGINT NOT NULL DEFAULT 0,
+    mismatched    BIGINT NOT NULL DEFAULT 0,
+    unscorable    BIGINT NOT NULL DEFAULT 0, -- unknown path: left untouched
+    rewritten     BIGINT NOT NULL DEFAULT 0,
+    seconds       DOUBLE
+);
+
+CREATE TABLE IF NOT EXISTS score_rewrites (
+    run_id        VARCHAR NOT NULL,
+    username      VARCHAR,
+    timestamp     TIMESTAMP,
+    path          VARCHAR,
+    old_score     INTEGER,
+    new_score     INTEGER NOT NULL,
+    rewritten_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_score_rewrites_run ON score_rewrites (run_id);
@@ -0,0 +1,15 @@
+-- Daily challenges, generated once per user per day (see daily_challenges.py)
+-- The primary key doubles as the index the dashboard reads through
+
+CREATE TABLE IF NOT EXISTS daily_challenges (
+    username        VARCHAR NOT NULL,
+    challenge_date  DATE NOT NULL,
+    slot            INTEGER NOT NULL,     -- display order, 0-2
+    challenge_id    VARCHAR NOT NULL,     -- <YYYYMMDD>_<type>_<slot>, what completions reference
+    challenge_type  VARCHAR NOT NULL,
+    description     VARCHAR NOT NULL,
+    icon            VARCHAR,
+    xp              INTEGER NOT NULL,
+    created_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (username, challenge_date, slot)
+);
@@ -0,0 +1,21 @@
+-- Weekly quests, advanced incrementally (see weekly_quests.py)
+-- Same base shape as the table xp_system creates; quest_id is <user>:<week_start>,
+-- so the primary key allows one quest per user per week
+
+CREATE TABLE IF NOT EXISTS weekly_quest_progress (
+    quest_id     VARCHAR PRIMARY KEY,
+    user_name    VARCHAR NOT NULL,
+    week_start   DATE NOT NULL,
+    quest_type   VARCHAR NOT NULL,
+    progress     INTEGER DEFAULT 0,
+    target       INTEGER NOT NULL,
+    completed    BOOLEAN DEFAULT FALSE,
+    xp_reward    INTEGER,
+    updated_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE weekly_quest_progress ADD COLUMN IF NOT EXISTS name VARCHAR;
+ALTER TABLE weekly_quest_progress ADD COLUMN IF NOT EXISTS description VARCHAR;
+ALTER TABLE weekly_quest_progress ADD COLUMN IF NOT EXISTS min_value DOUBLE;      -- per-quest threshold (e.g. the user's average score)
+ALTER TABLE weekly_quest_progress ADD COLUMN IF NOT EXISTS last_day DATE;         -- last day counted, so a day counts once
+ALTER TABLE weekly_quest_progress ADD COLUMN IF NOT EXISTS completed_at TIMESTAMP;
@@ -0,0 +1,17 @@
+-- Write-behind log for habit submissions (see entry_events.py)
+-- Appended in the same transaction as the sovereignty row; the background
+-- worker applies derived state and stamps processed_at in one transaction
+
+CREATE SEQUENCE IF NOT EXISTS submission_events_seq;
+
+CREATE TABLE IF NOT EXISTS submission_events (
+    event_id         BIGINT PRIMARY KEY DEFAULT nextval('submission_events_seq'),
+    username         VARCHAR NOT NULL,
+    path             VARCHAR,
+    entry_timestamp  TIMESTAMP NOT NULL,
+    payload          VARCHAR NOT NULL,              -- JSON habit fields plus score
+    created_at       TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    processed_at     TIMESTAMP,                     -- NULL while pending
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    last_error       VARCHAR
+);
@@ -0,0 +1,60 @@
+-- One sovereignty row per user per day (see sovereignty_ingest.store_entry)
+-- Resubmitting the form on the same (UTC) day replaces that day's row instead
+-- of appending another, so history, streak and rate queries read one clean
+-- row per day. Existing duplicates are resolved the same way: the latest
+-- submission of each (username, day) is kept and the earlier ones move to
+-- sovereignty_superseded, along with rows missing a username or timestamp.
+
+CREATE TEMP TABLE sovereignty_ranked AS
+SELECT
+    timestamp, username, path,
+    home_cooked_meals, junk_food, exercise_minutes, strength_training,
+    no_spending, invested_bitcoin, btc_usd, btc_sats,
+    meditation, gratitude, read_or_learned, environmental_action, score,
+    username IS NOT NULL AND timestamp IS NOT NULL AND row_number() OVER (
+        PARTITION BY username, CAST(timestamp AS DATE) ORDER BY timestamp DESC, score DESC
+    ) = 1 AS keep
+FROM sovereignty;
+
+CREATE TABLE IF NOT EXISTS sovereignty_superseded AS
+SELECT * EXCLUDE (keep), CURRENT_TIMESTAMP AS superseded_at FROM sovereignty_ranked WHERE NOT keep;
+
+CREATE TABLE sovereignty_daily (
+    timestamp            TIMESTAMP NOT NULL,
+    username             VARCHAR NOT NULL,
+    path                 VARCHAR,
+    home_cooked_meals    INTEGER,
+    junk_food            BOOLEAN,
+    exercise_minutes     INTEGER,
+    strength_training    BOOLEAN,
+    no_spending          BOOLEAN,
+    invested_bitcoin     BOOLEAN,
+    btc_usd              REAL DEFAULT 0,
+    btc_sats             INTEGER DEFAULT 0,
+    meditation           BOOLEAN,
+    gratitude            BOOLEAN,
+    read_or_learned      BOOLEAN,
+    environmental_action BOOLEAN,
+    score                INTEGER,
+    entry_date           DATE NOT NULL,   -- CAST(timestamp AS DATE), kept by every writer
+    PRIMARY KEY (username, entry_date)
+);
+
+-- Stored in (username, timestamp) order so each user's rows sit in few row groups
+INSERT INTO sovereignty_daily
+SELECT * EXCLUDE (keep), CAST(timestamp AS DATE) FROM sovereignty_ranked WHERE keep
+ORDER BY username, timestamp;
+
+DROP TABLE sovereignty;
+ALTER TABLE sovereignty_daily RENAME TO sovereignty;
+DROP TABLE sovereignty_ranked;
+
+-- DuckDB only uses single-column ART indexes for filters; per-user sorts are small
+CREATE INDEX IF NOT EXISTS idx_sovereignty_username ON sovereignty (username);
+
+-- Counters of users who had duplicates were built from them; they are rebuilt
+-- from the clean rows on the next read (SovereigntyAchievementEngine)
+DELETE FROM achievement_progress WHERE username IN (SELECT DISTINCT username FROM sovereignty_superseded);
+
+-- Entries that replaced an earlier one the same day need a replay, not an advance
+ALTER TABLE submission_events ADD COLUMN IF NOT EXISTS replaced BOOLEAN DEFAULT FALSE;
@@ -0,0 +1,165 @@
+# 0012_xp_tables.py
+"""
+XP, quest and leaderboard tables
+XPTransactionEngine used to drop and recreate these every time it was
+constructed, taking the unlocks and quest progress of migrations 0005 and
+0009 with them; they are created here once instead, along with the ones no
+migration owned yet. XP tables that already exist keep their layout (see
+xp_schema.py) and get that layout's idempotency indexes; a new database gets
+the Dashboard's layout, which is the one the live database has. Rows that
+already repeat an index key (double clicks from before the indexes existed)
+keep their earliest copy and move the rest to <table>_duplicates. The
+leaderboard buckets are filled from the awards already recorded.
+"""
+
+from xp_schema import XP_LAYOUTS, IDEMPOTENCY_INDEXES, table_layout
+from leaderboard import rebuild_buckets
+
+def _simple_completion_table(conn, name):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            comp_id             VARCHAR PRIMARY KEY,
+            user_name           VARCHAR NOT NULL,
+            challenge_ref       VARCHAR NOT NULL,
+            challenge_category  VARCHAR NOT NULL,
+            points_earned       INTEGER NOT NULL,
+            completion_time     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completion_date     DATE NOT NULL DEFAULT CURRENT_DATE
+        )
+    """)
+
+def _columns(conn, table):
+    return {column for (column,) in conn.execute("""
+        SELECT column_name FROM information_schema.columns WHERE table_schema = 'main' AND table_name = ?
+    """, [table]).fetchall()}
+
+def _date_completions(conn):
+    """
+    Copy Dashboard completions from before completion_date existed into a
+    table that has it. DuckDB won't index a table updated in the same
+    transaction, so the column is filled by copying rather than UPDATE.
+    """
+    has_date = "completion_date" in _columns(conn, "daily_challenge_completion")
+    if has_date and not conn.execute(
+        "SELECT COUNT(*) FROM daily_challenge_completion WHERE completion_date IS NULL"
+    ).fetchone()[0]:
+        return
+    completion_date = "COALESCE(completion_date, CAST(completion_time AS DATE))" if has_date \
+        else "CAST(completion_time AS DATE)"
+    _simple_completion_table(conn, "daily_challenge_completion_dated")
+    conn.execute(f"""
+        INSERT INTO daily_challenge_completion_dated
+        SELECT comp_id, user_name, challenge_ref, challenge_category, points_earned, completion_time, {completion_date}
+        FROM daily_challenge_completion
+    """)
+    conn.execute("DROP TABLE daily_challenge_completion")
+    conn.execute("ALTER TABLE daily_challenge_completion_dated RENAME TO daily_challenge_completion")
+
+def _rebuild(conn, table, query):
+    """
+    Replace `table`'s rows with `query` through a twin table of the same
+    definition. DuckDB builds an index from the stored rows, so rows deleted
+    earlier in this transaction would still count against a unique index.
+    """
+    ddl = conn.execute(
+        "SELECT sql FROM duckdb_tables() WHERE schema_name = 'main' AND table_name = ?", [table]
+    ).fetchone()[0]
+    conn.execute(ddl.replace(table, f"{table}_rebuilt", 1))
+    conn.execute(f"INSERT INTO {table}_rebuilt {query}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_rebuilt RENAME TO {table}")
+
+def _quarantine_duplicates(conn, table, layout, key):
+    """Move all but the earliest row of each repeated `key` to <table>_duplicates; returns how many moved"""
+    columns = XP_LAYOUTS[layout][table]
+    ranked = f"""
+        SELECT *, row_number() OVER (PARTITION BY {", ".join(key)} ORDER BY {columns["time"]}, {columns["id"]}) AS key_rank
+        FROM {table} WHERE {" AND ".join(f"{column} IS NOT NULL" for column in key)}
+    """
+    duplicates = conn.execute(f"SELECT COUNT(*) FROM ({ranked}) WHERE key_rank > 1").fetchone()[0]
+    if not duplicates:
+        return 0
+
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table}_duplicates AS
+        SELECT * EXCLUDE (key_rank), CURRENT_TIMESTAMP AS quarantined_at FROM ({ranked}) WHERE FALSE
+    """)
+    conn.execute(f"""
+        INSERT INTO {table}_duplicates
+        SELECT * EXCLUDE (key_rank), CURRENT_TIMESTAMP FROM ({ranked}) WHERE key_rank > 1
+    """)
+    _rebuild(conn, table, f"""
+        SELECT * FROM {table} t
+        WHERE NOT EXISTS (SELECT 1 FROM {table}_duplicates d WHERE d.{columns["id"]} = t.{columns["id"]})
+    """)
+    return duplicates
+
+def upgrade(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS xp_transactions (
+            txn_id          VARCHAR PRIMARY KEY,
+            user_name       VARCHAR NOT NULL,
+            xp_points       INTEGER NOT NULL,
+            xp_source       VARCHAR NOT NULL,
+            xp_description  TEXT,
+            xp_reference    VARCHAR,
+            xp_multiplier   REAL DEFAULT 1.0,
+            created_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    _simple_completion_table(conn, "daily_challenge_completion")
+    if table_layout(conn, "daily_challenge_completion") == "simple":
+        _date_completions(conn)
+
+    for table in ("xp_transactions", "daily_challenge_completion"):
+        layout = table_layout(conn, table)
+        name, key = IDEMPOTENCY_INDEXES[layout][table]
+        _quarantine_duplicates(conn, table, layout, key)
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(key)})")
+
+    # Recreated if an XP reset dropped them after 0005 and 0009 ran
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS weekly_quest_progress (
+            quest_id      VARCHAR PRIMARY KEY,
+            user_name     VARCHAR NOT NULL,
+            week_start    DATE NOT NULL,
+            quest_type    VARCHAR NOT NULL,
+            progress      INTEGER DEFAULT 0,
+            target        INTEGER NOT NULL,
+            completed     BOOLEAN DEFAULT FALSE,
+            xp_reward     INTEGER,
+            updated_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            name          VARCHAR,
+            description   VARCHAR,
+            min_value     DOUBLE,
+            last_day      DATE,
+            completed_at  TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS achievement_unlocks (
+            unlock_id       VARCHAR PRIMARY KEY,
+            user_name       VARCHAR NOT NULL,
+            achievement_id  VARCHAR NOT NULL,
+            xp_reward       INTEGER NOT NULL,
+            unlocked_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_achievement_unlocks_user ON achievement_unlocks (user_name)")
+
+    # Leaderboard pre-aggregates (see leaderboard.py)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS xp_daily_buckets (
+            user_name    VARCHAR NOT NULL,
+            bucket_date  DATE NOT NULL,
+            xp           BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_name, bucket_date)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS xp_user_totals (
+            user_name  VARCHAR PRIMARY KEY,
+            total_xp   BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+    rebuild_buckets(conn)
@@ -0,0 +1,26 @@
+-- Per user-day preparedness cache (see preparedness_service.py)
+-- preparedness_service used to issue this CREATE TABLE on every read and
+-- invalidation; the rate columns follow HABIT_RATE_SQL. latest_entry is the
+-- newest sovereignty timestamp the row was computed from, so a later entry
+-- misses the cache even if its writer didn't invalidate it
+
+CREATE TABLE IF NOT EXISTS preparedness_scores (
+    username                VARCHAR NOT NULL,
+    score_date              DATE NOT NULL,
+    window_entries          INTEGER NOT NULL,
+    latest_entry            TIMESTAMP,
+    entries                 INTEGER NOT NULL,
+    meditation              DOUBLE,
+    gratitude               DOUBLE,
+    learning                DOUBLE,
+    environmental           DOUBLE,
+    fitness                 DOUBLE,
+    strength                DOUBLE,
+    nutrition               DOUBLE,
+    no_spending             DOUBLE,
+    invested_bitcoin        DOUBLE,
+    overall_consistency     DOUBLE,
+    sovereignty_foundation  DOUBLE,
+    computed_at             TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (username, score_date, window_entries)
+);
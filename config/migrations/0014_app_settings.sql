@@ -0,0 +1,9 @@
+-- Deployment-wide settings shared by every process (see password_policy.py)
+-- Values chosen at runtime, such as the benchmarked bcrypt cost, are stored
+-- once here so all workers agree on them
+
+CREATE TABLE IF NOT EXISTS app_settings (
+    key         VARCHAR PRIMARY KEY,
+    value       VARCHAR NOT NULL,
+    updated_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,54 @@
+# 0015_users_email_unique.py
+"""
+One account per email (see register.find_registration_conflict)
+0004 indexed users.email without making it unique, so two registrations with
+the same email could both pass the lookup and both insert; the unique index
+makes the second insert fail into register.py's 409. Accounts that already
+share an email keep it on the earliest one; the later ones get a
+plus-addressed variant (name+username@domain, same inbox) and their original
+address is recorded in users_email_conflicts.
+"""
+
+RANKED = """
+    SELECT *, row_number() OVER (PARTITION BY email ORDER BY created_at, username) AS email_rank
+    FROM users
+"""
+
+# name@domain -> name+username@domain (username@domain when there's no @)
+DEDUPED_EMAIL = """
+    CASE WHEN email_rank = 1 THEN email
+         WHEN position('@' IN email) > 0
+             THEN split_part(email, '@', 1) || '+' || lower(username) || '@' || substr(email, position('@' IN email) + 1)
+         ELSE lower(username) || '@' || email
+    END
+"""
+
+def upgrade(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users_email_conflicts (
+            username        VARCHAR NOT NULL,
+            email           VARCHAR NOT NULL,
+            replaced_with   VARCHAR NOT NULL,
+            resolved_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("DROP INDEX IF EXISTS idx_users_email")
+
+    conflicts = conn.execute(f"""
+        INSERT INTO users_email_conflicts (username, email, replaced_with)
+        SELECT username, email, {DEDUPED_EMAIL} FROM ({RANKED}) WHERE email_rank > 1
+    """).fetchone()[0]
+    if conflicts:
+        # Through a twin table: DuckDB won't index a table updated in the same transaction
+        ddl = conn.execute(
+            "SELECT sql FROM duckdb_tables() WHERE schema_name = 'main' AND table_name = 'users'"
+        ).fetchone()[0]
+        conn.execute(ddl.replace("users", "users_rebuilt", 1))
+        conn.execute(f"""
+            INSERT INTO users_rebuilt
+            SELECT * EXCLUDE (email_rank) REPLACE ({DEDUPED_EMAIL} AS email) FROM ({RANKED})
+        """)
+        conn.execute("DROP TABLE users")
+        conn.execute("ALTER TABLE users_rebuilt RENAME TO users")
+
+    conn.execute("CREATE UNIQUE INDEX idx_users_email ON users (email)")
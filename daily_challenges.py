@@ -0,0 +1,122 @@
+# daily_challenges.py
+"""
+Daily challenges, generated once per user per day
+The first dashboard load of the day picks three challenges from the user's
+path pool with a generator seeded by (username, date), favouring habits whose
+streak is weak, and stores them in daily_challenges. Every later load is one
+primary-key lookup, so the set stays the same across reruns and sessions.
+"""
+
+import random
+import hashlib
+import logging
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+CHALLENGES_PER_DAY = 3
+WEAK_STREAK = 3  # Streaks shorter than this get priority challenges
+
+# Challenge pool by path
+PATH_CHALLENGES = {
+    "financial_path": [
+        {"type": "no_spending", "description": "💰 No discretionary spending today", "xp": 25, "icon": "💰"},
+        {"type": "bitcoin_investment", "description": "₿ Stack some sats today", "xp": 30, "icon": "₿"},
+        {"type": "read_learn", "description": "📚 Learn something about money/investing", "xp": 20, "icon": "📚"},
+        {"type": "meal_prep", "description": "🍳 Cook 2+ meals to save money", "xp": 25, "icon": "🍳"},
+        {"type": "budget_review", "description": "📊 Track your expenses", "xp": 15, "icon": "📊"}
+    ],
+    "physical_optimization": [
+        {"type": "strength_training", "description": "💪 Complete strength training", "xp": 30, "icon": "💪"},
+        {"type": "protein_focus", "description": "🥩 Hit your protein target", "xp": 20, "icon": "🥩"},
+        {"type": "meal_prep", "description": "🍳 Cook 3+ high-protein meals", "xp": 25, "icon": "🍳"},
+        {"type": "no_junk", "description": "🚫 Zero junk food today", "xp": 20, "icon": "🚫"},
+        {"type": "exercise_plus", "description": "🏃 30+ minutes of exercise", "xp": 25, "icon": "🏃"}
+    ],
+    "mental_resilience": [
+        {"type": "meditation", "description": "🧘‍♂️ Complete meditation session", "xp": 25, "icon": "🧘‍♂️"},
+        {"type": "gratitude", "description": "🙏 Practice gratitude", "xp": 15, "icon": "🙏"},
+        {"type": "read_learn", "description": "📖 Read for 30+ minutes", "xp": 20, "icon": "📖"},
+        {"type": "digital_detox", "description": "📱 Limit screen time", "xp": 25, "icon": "📱"},
+        {"type": "nature_time", "description": "🌿 Spend time in nature", "xp": 20, "icon": "🌿"}
+    ],
+    "spiritual_growth": [
+        {"type": "meditation", "description": "🧘‍♂️ Deep meditation practice", "xp": 30, "icon": "🧘‍♂️"},
+        {"type": "gratitude", "description": "🙏 Heartfelt gratitude practice", "xp": 20, "icon": "🙏"},
+        {"type": "environmental", "description": "🌍 Take environmental action", "xp": 25, "icon": "🌍"},
+        {"type": "mindful_eating", "description": "🍽️ Eat mindfully without distractions", "xp": 20, "icon": "🍽️"},
+        {"type": "reflection", "description": "📝 Journal or reflect deeply", "xp": 25, "icon": "📝"}
+    ],
+    "planetary_stewardship": [
+        {"type": "environmental", "description": "🌍 Take environmental action", "xp": 30, "icon": "🌍"},
+        {"type": "zero_waste", "description": "♻️ Produce minimal waste", "xp": 25, "icon": "♻️"},
+        {"type": "local_food", "description": "🥬 Choose local/organic food", "xp": 20, "icon": "🥬"},
+        {"type": "walk_bike", "description": "🚲 Walk/bike instead of driving", "xp": 20, "icon": "🚲"},
+        {"type": "conservation", "description": "💧 Practice resource conservation", "xp": 15, "icon": "💧"}
+    ],
+    "default": [
+        {"type": "balanced_day", "description": "⚖️ Hit 70+ sovereignty score", "xp": 30, "icon": "⚖️"},
+        {"type": "triple_threat", "description": "🎯 Cook, exercise, and meditate", "xp": 35, "icon": "🎯"},
+        {"type": "consistency", "description": "📈 Log all activities", "xp": 20, "icon": "📈"},
+        {"type": "streak_building", "description": "🔥 Extend your longest streak", "xp": 25, "icon": "🔥"},
+        {"type": "new_habit", "description": "✨ Try something new", "xp": 15, "icon": "✨"}
+    ]
+}
+
+def _rng(username, day):
+    """Random generator seeded by (username, day): same input, same challenges"""
+    digest = hashlib.sha256(f"{username}|{day.isoformat()}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+def select_challenges(username, path, current_streaks=None, day=None):
+    """
+    Deterministically pick the day's challenges for `username`
+    Up to two target habits whose current streak is weak; the rest are drawn
+    from the remaining pool without repeats.
+    """
+    day = day or date.today()
+    rng = _rng(username, day)
+    available = PATH_CHALLENGES.get(path, PATH_CHALLENGES["default"])
+
+    weak = [habit for habit, streak in sorted((current_streaks or {}).items()) if streak < WEAK_STREAK]
+    priority = [c for c in available if any(habit in c["type"] for habit in weak)]
+    remaining = [c for c in available if c not in priority]
+    selected = priority[:2]
+    selected += rng.sample(remaining, min(CHALLENGES_PER_DAY - len(selected), len(remaining)))
+    while len(selected) < CHALLENGES_PER_DAY:  # Only for pools smaller than a day's worth
+        selected.append(rng.choice(available))
+
+    return [{**challenge, "challenge_id": f"{day:%Y%m%d}_{challenge['type']}_{slot}"}
+            for slot, challenge in enumerate(selected[:CHALLENGES_PER_DAY])]
+
+def _load(conn, username, day):
+    return [
+        {"challenge_id": challenge_id, "type": challenge_type, "description": description, "icon": icon, "xp": xp}
+        for challenge_id, challenge_type, description, icon, xp in conn.execute("""
+            SELECT challenge_id, challenge_type, description, icon, xp FROM daily_challenges
+            WHERE username = ? AND challenge_date = ?
+            ORDER BY slot
+        """, [username, day]).fetchall()
+    ]
+
+def get_daily_challenges(conn, username, path, current_streaks=None, day=None):
+    """
+    Today's challenges for `username`, generating and storing them on the
+    first call of the day. current_streaks only matters for that first call.
+    """
+    day = day or date.today()
+    challenges = _load(conn, username, day)
+    if challenges:
+        return challenges
+
+    selected = select_challenges(username, path, current_streaks, day)
+    # ON CONFLICT: another session may have generated the same day first
+    conn.execute(f"""
+        INSERT INTO daily_challenges
+            (username, challenge_date, slot, challenge_id, challenge_type, description, icon, xp)
+        VALUES {", ".join(["(?, ?, ?, ?, ?, ?, ?, ?)"] * len(selected))}
+        ON CONFLICT DO NOTHING
+    """, [value for slot, c in enumerate(selected)
+          for value in (username, day, slot, c["challenge_id"], c["type"], c["description"], c["icon"], c["xp"])])
+    logger.info(f"Generated {len(selected)} daily challenges for {username} on {day}")
+    return _load(conn, username, day)
@@ -2,11 +2,13 @@
 # Add these components to your 1_Dashboard.py file
 
 import streamlit as st
-from datetime import datetime, date
+from datetime import datetime
 import uuid
 
 # Import the XP system (add this to your imports section)
 from xp_system import XPTransactionEngine, get_gamification_data_real, handle_challenge_completion
+from daily_challenges import get_daily_challenges
+from db import get_db_connection
 
 # Initialize XP system (add this near the top after your other initializations)
 @st.cache_resource
@@ -46,7 +48,8 @@ def migrate_legacy_xp(xp_engine, username, legacy_data):
                 xp_amount=legacy_data["xp_breakdown"]["achievements"],
                 source="legacy_migration",
                 description="Migrated achievement XP from legacy system",
-                reference_id="legacy_achievements"
+                reference_id="legacy_achievements",
+                multiplier=1.0  # Migrated XP never earns event bonuses
             )
         
         # Migrate consistency XP (but cap it to prevent inflation)
@@ -57,7 +60,8 @@ def migrate_legacy_xp(xp_engine, username, legacy_data):
                 xp_amount=consistency_xp,
                 source="legacy_migration", 
                 description="Migrated consistency XP from legacy system",
-                reference_id="legacy_consistency"
+                reference_id="legacy_consistency",
+                multiplier=1.0  # Migrated XP never earns event bonuses
             )
         
         print(f"✅ Migrated {username}'s legacy XP to new system")
@@ -117,8 +121,9 @@ def render_daily_challenges_real(username, path, current_streaks):
     
     xp_engine = init_xp_engine()
     
-    # Generate today's challenges
-    daily_challenges = generate_daily_challenges(username, path, current_streaks)
+    # Today's challenges (generated once per user per day, see daily_challenges.py)
+    with get_db_connection() as conn:
+        daily_challenges = get_daily_challenges(conn, username, path, current_streaks)
     
     # Get today's challenge completion status
     challenge_status = xp_engine.get_daily_challenge_status(username)
@@ -126,15 +131,12 @@ def render_daily_challenges_real(username, path, current_streaks):
     
     st.markdown("**⚡ Daily Challenges** (Reset at midnight)")
     
-    # Add challenge generation date to ensure unique IDs
-    today_str = date.today().strftime("%Y%m%d")
-    
     challenge_cols = st.columns(3)
     
     for i, challenge in enumerate(daily_challenges):
         with challenge_cols[i]:
-            # Create unique challenge ID
-            challenge_id = f"{today_str}_{challenge['type']}_{i}"
+            # Unique challenge ID, stored with the day's challenges
+            challenge_id = challenge["challenge_id"]
             
             # Check if this challenge is already completed
             is_completed = challenge_id in completed_challenge_ids
@@ -310,7 +312,7 @@ def render_xp_display_enhanced(gamification_data):
 # render_xp_display_enhanced(gamification_data)
 
 # Optional: Add XP Leaderboard section
-def render_xp_leaderboard():
+def render_xp_leaderboard(username=None):
     """Optional leaderboard for competitive users"""
     
     xp_engine = init_xp_engine()
@@ -332,10 +334,16 @@ def render_xp_leaderboard():
             <div style="display: flex; justify-content: space-between; align-items: center; 
                         padding: 8px 12px; margin: 4px 0; background: rgba(99, 102, 241, 0.05); 
                         border-radius: 8px; border-left: 3px solid #6366f1;">
-                <span><strong>{rank_emoji}</strong> {entry['username']} (Level {entry['level']})</span>
+                <span><strong>{rank_emoji}</strong> {entry['user_name']} (Level {entry['level']})</span>
                 <span style="color: #10b981; font-weight: bold;">{entry['total_xp']:,} XP</span>
             </div>
             """, unsafe_allow_html=True)
+        
+        # Show the viewer's own position when they're outside the top 10
+        if username and all(entry["user_name"] != username for entry in leaderboard):
+            my_rank = xp_engine.get_user_rank(username, timeframe=timeframe)
+            if my_rank:
+                st.markdown(f"**Your rank:** #{my_rank['rank']} • {my_rank['total_xp']:,} XP")
     else:
         st.info("🚀 Be the first to earn XP and claim the top spot!")
 
@@ -0,0 +1,242 @@
+# data_retention.py
+"""
+Per-user erasure and time-based retention
+USER_TABLES lists every table holding per-user rows, with its user column and
+(where rows age out) its time column. erase_user() removes one user's rows
+from all of them in a single transaction, so an erasure never leaves XP,
+finance or snapshot rows behind for a deleted user. apply_retention() archives
+rows older than each policy's cutoff to Parquet and deletes them, again in one
+transaction per table.
+
+Every delete is a plain equality or range predicate on the stored column
+(user = ?, time < cutoff) so DuckDB can use zone maps and indexes; nothing
+wraps the column in DATE() or CAST().
+
+    python data_retention.py erase <username> [--keep-account]
+    python data_retention.py retain [--dry-run]
+"""
+
+import os
+import logging
+import argparse
+from datetime import datetime, timedelta
+
+from xp_schema import XP_LAYOUTS, xp_columns
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(__file__)
+ARCHIVE_DIR = os.environ.get("RETENTION_ARCHIVE_DIR", os.path.join(BASE_DIR, "data", "archive"))
+
+# table -> (user column, time column or None). users comes last so an erasure
+# removes the account only after everything that refers to it. The XP tables'
+# time column depends on their layout and is resolved by _time_column().
+USER_TABLES = {
+    "sovereignty": ("username", "timestamp"),
+    "sovereignty_superseded": ("username", "superseded_at"),
+    "sovereignty_field_order_quarantine": ("username", "quarantined_at"),
+    "submission_events": ("username", "created_at"),
+    "sovereignty_snapshot": ("username", "snapshot_date"),
+    "preparedness_scores": ("username", "score_date"),
+    "achievement_progress": ("username", None),
+    "achievement_unlocks": ("user_name", "unlocked_at"),
+    "score_rewrites": ("username", "rewritten_at"),
+    "xp_transactions": ("user_name", "created_at"),
+    "daily_challenge_completion": ("user_name", "completion_time"),
+    "xp_transactions_duplicates": ("user_name", "quarantined_at"),
+    "daily_challenge_completion_duplicates": ("user_name", "quarantined_at"),
+    "daily_challenges": ("username", "challenge_date"),
+    "weekly_quest_progress": ("user_name", "week_start"),
+    "xp_daily_buckets": ("user_name", "bucket_date"),
+    "xp_user_totals": ("user_name", None),
+    "financial_accounts": ("username", None),
+    "crypto_holdings": ("username", None),
+    "monthly_expenses": ("username", None),
+    "emergency_contacts": ("username", None),
+    "document_locations": ("username", None),
+    "family_training": ("username", None),
+    "users_email_conflicts": ("username", "resolved_at"),
+    "users": ("username", None),
+}
+
+# table -> (days kept, archive before deleting). Raw history that achievements,
+# XP totals and leaderboards are rebuilt from is kept until a policy is set
+# with RETENTION_<TABLE>_DAYS.
+RETENTION_POLICIES = {
+    "preparedness_scores": (90, False),         # Cache, recomputed on demand
+    "daily_challenges": (90, False),            # Regenerated deterministically from the seed
+    "submission_events": (30, False),           # Applied within seconds; kept for inspection
+    "score_rewrites": (365, True),
+    "daily_challenge_completion": (400, True),
+    "sovereignty_snapshot": (730, True),
+}
+
+# table -> extra predicate rows must meet to age out. Events the worker hasn't
+# applied yet (or that keep failing) stay until they are processed.
+RETENTION_FILTERS = {
+    "submission_events": "processed_at IS NOT NULL",
+}
+
+def retention_policies():
+    """RETENTION_POLICIES with RETENTION_<TABLE>_DAYS overrides (0 disables a policy)"""
+    policies = {}
+    for table in USER_TABLES:
+        days, archive = RETENTION_POLICIES.get(table, (None, True))
+        override = os.environ.get(f"RETENTION_{table.upper()}_DAYS")
+        if override is not None:
+            days = int(override) or None
+        if days and USER_TABLES[table][1]:
+            policies[table] = (days, archive)
+    return policies
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+def _columns(conn):
+    """{table: set(columns)} for the main schema in one query"""
+    columns = {}
+    for table, column in conn.execute("""
+        SELECT table_name, column_name FROM information_schema.columns WHERE table_schema = 'main'
+    """).fetchall():
+        columns.setdefault(table, set()).add(column)
+    return columns
+
+def _time_column(conn, table):
+    """Time column of `table` in this database (None if it has no such column)"""
+    if table in XP_LAYOUTS["simple"]:
+        columns = xp_columns(conn, table)
+        return columns["time"] if columns else None
+    return USER_TABLES[table][1]
+
+def erase_user(conn, username, keep_account=False):
+    """
+    Delete every row belonging to `username` in one transaction
+    keep_account leaves the users row (test users that get regenerated).
+    Returns {table: rows deleted}; tables that don't exist or predate the
+    user column are skipped.
+    """
+    columns = _columns(conn)
+    deleted = {}
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        for table, (user_column, _) in USER_TABLES.items():
+            if (keep_account and table == "users") or user_column not in columns.get(table, ()):
+                continue
+            deleted[table] = conn.execute(
+                f"DELETE FROM {_quote(table)} WHERE {_quote(user_column)} = ?", [username]
+            ).fetchone()[0]
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    logger.info(f"🗑️ Erased {sum(deleted.values()):,} rows for {username} across {len(deleted)} tables")
+    return deleted
+
+def erase_all(conn, keep_accounts=True):
+    """Empty every user table (keeping users unless keep_accounts=False); returns {table: rows deleted}"""
+    columns = _columns(conn)
+    deleted = {}
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        for table in USER_TABLES:
+            if (keep_accounts and table == "users") or table not in columns:
+                continue
+            deleted[table] = conn.execute(f"DELETE FROM {_quote(table)}").fetchone()[0]
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return deleted
+
+def _archive_path(table, cutoff):
+    directory = os.path.join(ARCHIVE_DIR, table)
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(directory, f"{table}_before_{cutoff:%Y%m%d}_{stamp}.parquet")
+
+def retain_table(conn, table, days, archive=True, now=None, dry_run=False):
+    """
+    Archive (optionally) and delete `table` rows older than `days`
+    Returns {"cutoff", "rows", "archive"}; the archive and the delete must
+    agree on the row count or the delete is rolled back.
+    """
+    time_column = _quote(_time_column(conn, table))
+    cutoff = (now or datetime.now()) - timedelta(days=days)
+    where = f"{time_column} < ?"
+    if table in RETENTION_FILTERS:
+        where += f" AND {RETENTION_FILTERS[table]}"
+
+    if dry_run:
+        rows = conn.execute(f"SELECT COUNT(*) FROM {_quote(table)} WHERE {where}", [cutoff]).fetchone()[0]
+        return {"cutoff": cutoff.isoformat(), "rows": rows, "archive": None}
+
+    archive_path = None
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        archived = None
+        if archive:
+            archive_path = _archive_path(table, cutoff)
+            literal = "'" + archive_path.replace("'", "''") + "'"  # COPY TO takes a literal path
+            archived = conn.execute(f"""
+                COPY (SELECT * FROM {_quote(table)} WHERE {where} ORDER BY {time_column})
+                TO {literal} (FORMAT PARQUET, COMPRESSION ZSTD)
+            """, [cutoff]).fetchone()[0]
+        rows = conn.execute(f"DELETE FROM {_quote(table)} WHERE {where}", [cutoff]).fetchone()[0]
+        if archived is not None and archived != rows:
+            raise RuntimeError(f"Archived {archived:,} {table} rows but deleted {rows:,}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        if archive_path and os.path.exists(archive_path):
+            os.remove(archive_path)
+        raise
+
+    if archive_path and not rows:
+        os.remove(archive_path)  # Nothing aged out; don't leave empty archives
+        archive_path = None
+    if rows:
+        logger.info(f"🧹 {table}: removed {rows:,} rows before {cutoff:%Y-%m-%d}"
+                    + (f", archived to {archive_path}" if archive_path else ""))
+    return {"cutoff": cutoff.isoformat(), "rows": rows, "archive": archive_path}
+
+def apply_retention(conn, policies=None, now=None, dry_run=False):
+    """Run every retention policy on the tables that exist; returns {table: result}"""
+    policies = retention_policies() if policies is None else policies
+    columns = _columns(conn)
+    results = {}
+    for table, (days, archive) in policies.items():
+        if _time_column(conn, table) not in columns.get(table, ()):
+            continue
+        try:
+            results[table] = retain_table(conn, table, days, archive, now, dry_run)
+        except Exception as e:
+            logger.error(f"❌ Retention for {table} failed: {e}")
+            results[table] = {"error": str(e)}
+    return results
+
+if __name__ == "__main__":
+    from db import get_db_connection
+
+    parser = argparse.ArgumentParser(description="Erase users and apply retention policies")
+    commands = parser.add_subparsers(dest="command", required=True)
+    erase = commands.add_parser("erase", help="Delete all of a user's rows across every table")
+    erase.add_argument("username")
+    erase.add_argument("--keep-account", action="store_true", help="Keep the users row")
+    retain = commands.add_parser("retain", help="Archive and delete rows past their retention period")
+    retain.add_argument("--dry-run", action="store_true", help="Only count the rows that would go")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with get_db_connection() as conn:
+        if args.command == "erase":
+            for table, rows in erase_user(conn, args.username, args.keep_account).items():
+                if rows:
+                    print(f"   {table:28} {rows:,} rows deleted")
+        else:
+            for table, result in apply_retention(conn, dry_run=args.dry_run).items():
+                if "error" in result:
+                    print(f"❌ {table}: {result['error']}")
+                else:
+                    verb = "would remove" if args.dry_run else "removed"
+                    print(f"✅ {table}: {verb} {result['rows']:,} rows before {result['cutoff'][:10]}")
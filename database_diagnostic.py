@@ -7,7 +7,6 @@ Checks user data and fixes missing test users
 import os
 import sys
 import duckdb
-import bcrypt
 from datetime import datetime
 
 # Add project root to path
@@ -16,6 +15,9 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from db import get_db_connection
+from schema_migrations import migrate
+from password_policy import hash_password, backfill_hash_params
+from db_health import run_health_check, print_report
 
 def check_user_data():
     """Check what test users exist and their data quality"""
@@ -24,12 +26,18 @@ def check_user_data():
     
     try:
         with get_db_connection() as conn:
-            # Check users table
+            # Test users with their sovereignty summary in one grouped query
             users = conn.execute("""
-                SELECT username, email, path, created_at 
-                FROM users 
-                WHERE username LIKE 'test%'
-                ORDER BY username
+                SELECT u.username, u.email, u.path, u.created_at,
+                       COUNT(s.username) AS total_days,
+                       AVG(s.score) AS avg_score,
+                       MIN(s.timestamp) AS first_entry,
+                       MAX(s.timestamp) AS last_entry
+                FROM users u
+                LEFT JOIN sovereignty s ON s.username = u.username
+                WHERE u.username LIKE 'test%'
+                GROUP BY u.username, u.email, u.path, u.created_at
+                ORDER BY u.username
             """).fetchall()
             
             print(f"📋 Found {len(users)} test users in users table:")
@@ -38,27 +46,9 @@ def check_user_data():
             
             print(f"\n📊 Checking sovereignty data for each user:")
             
-            for user in users:
-                username = user[0]
-                
-                # Check sovereignty data
-                data_count = conn.execute("""
-                    SELECT COUNT(*) FROM sovereignty WHERE username = ?
-                """, [username]).fetchone()[0]
-                
+            for username, _, _, _, data_count, avg_score, first_entry, last_entry in users:
                 if data_count > 0:
-                    # Get data summary
-                    summary = conn.execute("""
-                        SELECT 
-                            COUNT(*) as total_days,
-                            AVG(score) as avg_score,
-                            MIN(timestamp) as first_entry,
-                            MAX(timestamp) as last_entry
-                        FROM sovereignty 
-                        WHERE username = ?
-                    """, [username]).fetchone()
-                    
-                    print(f"   ✅ {username:15} | {data_count:3} days | Avg: {summary[1]:5.1f} | Range: {summary[2]} to {summary[3]}")
+                    print(f"   ✅ {username:15} | {data_count:3} days | Avg: {avg_score:5.1f} | Range: {first_entry} to {last_entry}")
                 else:
                     print(f"   ❌ {username:15} | No sovereignty data found")
             
@@ -84,27 +74,16 @@ def create_missing_test_users():
     
     try:
         with get_db_connection() as conn:
+            # Make sure the users table (and its hash columns) exist
+            migrate(conn)
+            
             # Check which users exist
-            existing_users = set()
-            try:
-                users = conn.execute("SELECT username FROM users").fetchall()
-                existing_users = {user[0] for user in users}
-            except:
-                print("   Creating users table...")
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS users (
-                        username    TEXT PRIMARY KEY,
-                        email       TEXT NOT NULL,
-                        password    TEXT NOT NULL,
-                        path        TEXT NOT NULL,
-                        created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
+            users = conn.execute("SELECT username FROM users").fetchall()
+            existing_users = {user[0] for user in users}
             
             # Create missing users
             password = "test123"
-            salt = bcrypt.gensalt()
-            hashed_pw = bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+            hashed_pw = hash_password(password)
             
             for username, email, path in required_users:
                 if username not in existing_users:
@@ -127,6 +106,9 @@ def create_missing_test_users():
                         print(f"   🔄 Updated: {username:15} | Email set to {email}")
                     except Exception as e:
                         print(f"   ⚠️  {username}: {e}")
+            
+            # Record hash parameters for the new rows
+            backfill_hash_params(conn)
     
     except Exception as e:
         print(f"❌ Error creating users: {e}")
@@ -191,6 +173,11 @@ def main():
     # Check current state
     users = check_user_data()
     
+    # Integrity checks across every table, one scan each
+    print()
+    with get_db_connection() as conn:
+        print_report(run_health_check(conn))
+    
     # Create missing users
     create_missing_test_users()
     
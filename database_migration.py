@@ -8,14 +8,19 @@ import os
 import sys
 import duckdb
 import json
-from datetime import datetime
-import shutil
+from datetime import date
 from contextlib import contextmanager
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from backup_db import create_backup
+from schema_migrations import migrate
+from sovereignty_ingest import SOVEREIGNTY_COLUMNS
+from table_rewrite import rewrite_table
+from sovereignty_achievements import rebuild_all
+from preparedness_service import invalidate_preparedness
+from db_health import run_health_check, print_report
 
 BASE_DIR = os.path.dirname(__file__)
 DB_PATH = os.path.join(BASE_DIR, "data", "sovereignty.duckdb")
@@ -109,88 +114,86 @@ def create_migration_backup():
     """Create a backup before migration"""
     print("💾 Creating backup before migration...")
     
-    try:
-        # Ensure backup directory exists
-        os.makedirs(BACKUP_DIR, exist_ok=True)
-        
-        # Create timestamped backup
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"pre_migration_{timestamp}.duckdb"
-        backup_path = os.path.join(BACKUP_DIR, backup_name)
-        
-        shutil.copy2(DB_PATH, backup_path)
-        print(f"✅ Backup created: {backup_name}")
-        return backup_path
-    except Exception as e:
-        print(f"❌ Backup failed: {e}")
-        return None
+    # Online snapshot - consistent even if the app still has the database open
+    backup_path = create_backup(incremental=False)
+    if backup_path:
+        print(f"✅ Backup created: {os.path.basename(backup_path)}")
+    else:
+        print("❌ Backup failed")
+    return backup_path
+
+# Column order of the rebuilt sovereignty table
+SOVEREIGNTY_SCHEMA = """
+    CREATE TABLE {target} (
+        timestamp            TIMESTAMP NOT NULL,
+        username             VARCHAR NOT NULL,
+        path                 VARCHAR,
+        home_cooked_meals    INTEGER,
+        junk_food            BOOLEAN,
+        exercise_minutes     INTEGER,
+        strength_training    BOOLEAN,
+        no_spending          BOOLEAN,
+        invested_bitcoin     BOOLEAN,
+        btc_usd              REAL DEFAULT 0,
+        btc_sats             INTEGER DEFAULT 0,
+        meditation           BOOLEAN,
+        gratitude            BOOLEAN,
+        read_or_learned      BOOLEAN,
+        environmental_action BOOLEAN,
+        score                INTEGER,
+        entry_date           DATE NOT NULL,
+        PRIMARY KEY (username, entry_date)
+    )
+"""
+
+# Index rebuilt after the swap (see 0011_sovereignty_daily.sql)
+SOVEREIGNTY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_sovereignty_username ON sovereignty (username)",
+]
+
+# Rows failing these are quarantined rather than copied
+SOVEREIGNTY_CHECKS = [
+    ("missing_key", "username IS NOT NULL AND timestamp IS NOT NULL"),
+    ("score_out_of_range", "score >= 0 AND score <= 100"),
+    ("meals_out_of_range", "home_cooked_meals >= 0 AND home_cooked_meals <= 10"),
+    ("exercise_out_of_range", "exercise_minutes >= 0 AND exercise_minutes <= 500"),
+]
 
-def migrate_database():
-    """Migrate database to fix field order issues"""
+def rebuild_quarantined_users(conn, quarantine):
+    """Recompute achievements and drop cached preparedness for users who lost rows to the quarantine"""
+    users = [name for (name,) in conn.execute(
+        f"SELECT DISTINCT username FROM {quarantine} WHERE username IS NOT NULL"
+    ).fetchall()]
+    rebuild_all(conn, users)
+    for user in users:
+        invalidate_preparedness(user, conn, since=date.min)
+
+def migrate_database(restart=False):
+    """Migrate database to fix field order issues (chunked and resumable)"""
     print("🔧 Starting database migration...")
     
     try:
         with get_db_connection() as conn:
-            # Create new table with correct schema
-            conn.execute("""
-                CREATE TABLE sovereignty_new (
-                    timestamp            TIMESTAMP,
-                    username             VARCHAR,
-                    path                 VARCHAR,
-                    home_cooked_meals    INTEGER,
-                    junk_food            BOOLEAN,
-                    exercise_minutes     INTEGER,
-                    strength_training    BOOLEAN,
-                    no_spending          BOOLEAN,
-                    invested_bitcoin     BOOLEAN,
-                    btc_usd              REAL DEFAULT 0,
-                    btc_sats             INTEGER DEFAULT 0,
-                    meditation           BOOLEAN,
-                    gratitude            BOOLEAN,
-                    read_or_learned      BOOLEAN,
-                    environmental_action BOOLEAN,
-                    score                INTEGER
-                )
-            """)
-            
-            # Copy data with explicit column mapping
-            conn.execute("""
-                INSERT INTO sovereignty_new (
-                    timestamp, username, path,
-                    home_cooked_meals, junk_food, exercise_minutes, strength_training,
-                    no_spending, invested_bitcoin, btc_usd, btc_sats,
-                    meditation, gratitude, read_or_learned, environmental_action, score
-                )
-                SELECT 
-                    timestamp, username, path,
-                    home_cooked_meals, junk_food, exercise_minutes, strength_training,
-                    no_spending, invested_bitcoin, btc_usd, btc_sats,
-                    meditation, gratitude, read_or_learned, environmental_action, score
-                FROM sovereignty
-                WHERE score >= 0 AND score <= 100  -- Filter out invalid scores
-                AND home_cooked_meals >= 0 AND home_cooked_meals <= 10  -- Reasonable meal count
-                AND exercise_minutes >= 0 AND exercise_minutes <= 500   -- Reasonable exercise
-            """)
-            
-            # Get counts
-            old_count = conn.execute("SELECT COUNT(*) FROM sovereignty").fetchone()[0]
-            new_count = conn.execute("SELECT COUNT(*) FROM sovereignty_new").fetchone()[0]
+            migrate(conn)  # Makes sure table_rewrites exists
+            columns = {**{column: column for column in SOVEREIGNTY_COLUMNS}, "entry_date": "entry_date"}
+            stats = rewrite_table(
+                conn, "sovereignty_field_order", "sovereignty", SOVEREIGNTY_SCHEMA, columns,
+                checks=SOVEREIGNTY_CHECKS, post_sql=SOVEREIGNTY_INDEXES, restart=restart,
+                after_swap=rebuild_quarantined_users,
+                progress=lambda s: print(f"   📦 {s['copied']:,} copied, {s['quarantined']:,} quarantined"
+                                         f" of {s['source_rows']:,} ({s['seconds']}s)")
+            )
             
-            print(f"📊 Migrated {new_count} of {old_count} records")
-            
-            if new_count < old_count:
-                filtered_count = old_count - new_count
-                print(f"⚠️  Filtered out {filtered_count} invalid records")
-            
-            # Replace old table with new one
-            conn.execute("DROP TABLE sovereignty")
-            conn.execute("ALTER TABLE sovereignty_new RENAME TO sovereignty")
+            print(f"📊 Migrated {stats['copied']} records")
+            if stats["quarantined"]:
+                print(f"⚠️  Quarantined {stats['quarantined']} invalid records in sovereignty_field_order_quarantine")
             
             print("✅ Database migration completed successfully")
             return True
             
     except Exception as e:
         print(f"❌ Migration failed: {e}")
+        print("💡 Re-run to resume from the last completed chunk")
         return False
 
 def validate_migrated_data():
@@ -199,36 +202,16 @@ def validate_migrated_data():
     
     try:
         with get_db_connection() as conn:
-            # Check basic counts
-            total_records = conn.execute("SELECT COUNT(*) FROM sovereignty").fetchone()[0]
-            unique_users = conn.execute("SELECT COUNT(DISTINCT username) FROM sovereignty").fetchone()[0]
-            
-            print(f"📊 Total records: {total_records}")
-            print(f"👥 Unique users: {unique_users}")
-            
-            # Check for data integrity
-            integrity_checks = [
-                ("Valid scores", "SELECT COUNT(*) FROM sovereignty WHERE score >= 0 AND score <= 100"),
-                ("Valid meals", "SELECT COUNT(*) FROM sovereignty WHERE home_cooked_meals >= 0 AND home_cooked_meals <= 10"),
-                ("Valid exercise", "SELECT COUNT(*) FROM sovereignty WHERE exercise_minutes >= 0 AND exercise_minutes <= 500"),
-                ("Valid BTC amounts", "SELECT COUNT(*) FROM sovereignty WHERE btc_usd >= 0")
-            ]
-            
-            all_valid = True
-            for check_name, query in integrity_checks:
-                valid_count = conn.execute(query).fetchone()[0]
-                if valid_count == total_records:
-                    print(f"✅ {check_name}: {valid_count}/{total_records}")
-                else:
-                    print(f"❌ {check_name}: {valid_count}/{total_records}")
-                    all_valid = False
-            
-            if all_valid:
-                print("✅ All data validation checks passed")
-            else:
-                print("⚠️  Some data validation issues remain")
-            
-            return all_valid
+            # Every sovereignty check in one scan (see db_health.py)
+            report = run_health_check(conn, ["sovereignty"], recompute=False)
+        
+        print_report(report)
+        if report["ok"]:
+            print("✅ All data validation checks passed")
+        else:
+            print("⚠️  Some data validation issues remain")
+        
+        return report["ok"]
             
     except Exception as e:
         print(f"❌ Validation failed: {e}")
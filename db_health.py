@@ -0,0 +1,214 @@
+# db_health.py
+"""
+Integrity and diagnostics scanner
+Checks are declared per table as SQL violation predicates. Each table's checks
+are fused into one aggregate query (COUNT_IF per check), including the orphan
+user join, the per-user-per-day duplicate grouping and the score recompute
+(tracker.scoring compiled to SQL), so a health check reads every table once. Tables are scanned in parallel threads on cursors of the
+same connection. The XP tables come in two layouts (see xp_schema.py), so
+their checks name columns by role ({xp}, {time}) and are resolved against
+the layout the database has before the scan.
+
+    python db_health.py                 # human-readable report
+    python db_health.py --json          # machine-readable report
+    python db_health.py --no-recompute  # skip re-scoring sovereignty rows
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+
+from tracker.scoring import daily_score_sql, ALL_PATHS
+from xp_schema import xp_columns
+
+logger = logging.getLogger(__name__)
+
+_KNOWN_PATHS = ", ".join("'" + path.replace("'", "''") + "'" for path in ALL_PATHS)
+
+# table -> user_column (orphan check against users), day_column (one entry per
+# user per day), xp_layout (predicates use xp_schema roles), checks: (name,
+# violation predicate, severity)
+CHECKS = {
+    "sovereignty": {
+        "user_column": "username",
+        "day_column": "timestamp",
+        "checks": [
+            ("missing_timestamp", "timestamp IS NULL", "error"),
+            ("missing_username", "username IS NULL", "error"),
+            ("score_out_of_range", "score IS NULL OR score < 0 OR score > 100", "error"),
+            ("meals_out_of_range", "home_cooked_meals < 0 OR home_cooked_meals > 10", "error"),
+            ("exercise_out_of_range", "exercise_minutes < 0 OR exercise_minutes > 500", "error"),
+            ("negative_btc_usd", "btc_usd < 0", "error"),
+            ("negative_btc_sats", "btc_sats < 0", "error"),
+            ("unknown_path", f"path NOT IN ({_KNOWN_PATHS})", "warning"),
+            ("score_mismatch", f"score <> {daily_score_sql()}", "warning"),
+        ],
+    },
+    "users": {
+        "checks": [
+            ("missing_email", "email IS NULL OR email = ''", "error"),
+            ("email_not_normalized", "email <> lower(trim(email))", "warning"),
+            ("missing_password", "password IS NULL OR password = ''", "error"),
+            ("missing_hash_params", "hash_cost IS NULL", "warning"),
+            ("unknown_path", f"path NOT IN ({_KNOWN_PATHS})", "warning"),
+        ],
+    },
+    "xp_transactions": {
+        "user_column": "user_name",
+        "xp_layout": True,
+        "checks": [
+            ("non_positive_xp", "{xp} <= 0", "warning"),
+            ("missing_timestamp", "{time} IS NULL", "error"),
+        ],
+    },
+    "daily_challenge_completion": {
+        "user_column": "user_name",
+        "xp_layout": True,
+        "checks": [
+            ("non_positive_reward", "{xp} <= 0", "warning"),
+        ],
+    },
+    "btc_price_history": {
+        "checks": [
+            ("non_positive_price", "closing_price <= 0", "error"),
+        ],
+    },
+}
+
+def scan_query(table, spec, recompute=True):
+    """One aggregate query evaluating every check for `table`"""
+    checks = [(name, predicate) for name, predicate, _ in spec["checks"]
+              if recompute or name != "score_mismatch"]
+    counts = [f"COUNT_IF(COALESCE({predicate}, FALSE)) AS {name}" for name, predicate in checks]
+
+    source = f'"{table}" t'
+    user_column = spec.get("user_column")
+    if user_column:
+        source += f' LEFT JOIN (SELECT username AS known_user FROM users) u ON u.known_user = t."{user_column}"'
+        counts.append(f'COUNT_IF(t."{user_column}" IS NOT NULL AND u.known_user IS NULL) AS orphan_user')
+    names = [name for name, _ in checks] + (["orphan_user"] if user_column else [])
+
+    day_column = spec.get("day_column")
+    if not day_column:
+        return f"SELECT COUNT(*) AS rows, {', '.join(counts)} FROM {source}", names
+
+    # Group by user-day so duplicate days come out of the same scan
+    per_day = f"""
+        SELECT COUNT(*) AS n, {', '.join(counts)} FROM {source}
+        GROUP BY t."{user_column}", CAST(t."{day_column}" AS DATE)
+    """
+    totals = ", ".join(f"SUM({name}) AS {name}" for name in names)
+    return (f"SELECT SUM(n) AS rows, {totals}, COUNT_IF(n > 1) AS duplicate_day FROM ({per_day})",
+            names + ["duplicate_day"])
+
+def _table_exists(conn, table):
+    return conn.execute(
+        "SELECT 1 FROM information_schema.tables WHERE table_schema = 'main' AND table_name = ?", [table]
+    ).fetchone() is not None
+
+def _resolve_layout(conn, table, spec):
+    """`spec` with its role placeholders replaced by this database's XP column names"""
+    if not spec.get("xp_layout"):
+        return spec
+    columns = xp_columns(conn, table)
+    if columns is None:
+        return None  # Neither layout: the columns are missing, like any other schema mismatch
+    return {**spec, "checks": [(name, predicate.format(**columns), severity)
+                               for name, predicate, severity in spec["checks"]]}
+
+def _severity(spec, name):
+    for check_name, _, severity in spec["checks"]:
+        if check_name == name:
+            return severity
+    return "error" if name == "orphan_user" else "warning"
+
+def scan_table(conn, table, spec, recompute=True):
+    """Run `table`'s fused check query on its own cursor; returns its report section"""
+    cursor = conn.cursor()
+    started = time.perf_counter()
+    try:
+        if not _table_exists(cursor, table):
+            return {"status": "skipped", "reason": "table not found"}
+        spec = _resolve_layout(cursor, table, spec)
+        if spec is None:
+            return {"status": "error", "reason": "schema mismatch: no known XP layout"}
+        query, names = scan_query(table, spec, recompute)
+        row = cursor.execute(query).fetchone()
+    except duckdb.BinderException as e:
+        # Columns a check refers to are missing: the table predates the current schema
+        return {"status": "error", "reason": f"schema mismatch: {str(e).splitlines()[0]}"}
+    except Exception as e:
+        logger.error(f"Health scan of {table} failed: {e}")
+        return {"status": "error", "reason": str(e)}
+    finally:
+        cursor.close()
+
+    rows, counts = row[0] or 0, dict(zip(names, (int(value or 0) for value in row[1:])))
+    violations = {name: {"count": count, "severity": _severity(spec, name)}
+                  for name, count in counts.items() if count}
+    status = "fail" if any(v["severity"] == "error" for v in violations.values()) else \
+             "warn" if violations else "ok"
+    return {"status": status, "rows": int(rows), "violations": violations,
+            "seconds": round(time.perf_counter() - started, 3)}
+
+def run_health_check(conn, tables=None, recompute=True, workers=None):
+    """
+    Scan `tables` (default: every table in CHECKS) in parallel
+    Returns {"ok", "started_at", "seconds", "tables": {table: section}}; ok
+    is False when any error-severity check has violations.
+    """
+    tables = tables or list(CHECKS)
+    started_at, started = datetime.now().isoformat(timespec="seconds"), time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers or len(tables)) as pool:
+        futures = {table: pool.submit(scan_table, conn, table, CHECKS[table], recompute) for table in tables}
+        sections = {table: future.result() for table, future in futures.items()}
+
+    return {
+        "ok": not any(section["status"] in ("fail", "error") for section in sections.values()),
+        "started_at": started_at,
+        "seconds": round(time.perf_counter() - started, 3),
+        "tables": sections,
+    }
+
+def print_report(report):
+    icons = {"ok": "✅", "warn": "⚠️ ", "fail": "❌", "error": "💥", "skipped": "⏭️ "}
+    print("🩺 DATABASE HEALTH CHECK")
+    print("=" * 50)
+    for table, section in report["tables"].items():
+        if section["status"] in ("skipped", "error"):
+            print(f"{icons[section['status']]} {table}: {section['reason']}")
+            continue
+        print(f"{icons[section['status']]} {table}: {section['rows']:,} rows ({section['seconds']}s)")
+        for name, violation in section["violations"].items():
+            print(f"      {name}: {violation['count']:,} ({violation['severity']})")
+    print("=" * 50)
+    print(f"{'✅ Healthy' if report['ok'] else '❌ Problems found'} in {report['seconds']}s")
+
+if __name__ == "__main__":
+    from db import get_db_connection
+
+    parser = argparse.ArgumentParser(description="Scan the database for integrity problems")
+    parser.add_argument("tables", nargs="*", help=f"Tables to scan (default: {', '.join(CHECKS)})")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--no-recompute", action="store_true", help="Skip re-scoring sovereignty rows")
+    parser.add_argument("--workers", type=int, help="Parallel table scans (default: one per table)")
+    args = parser.parse_args()
+    unknown = set(args.tables) - set(CHECKS)
+    if unknown:
+        parser.error(f"no checks declared for: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.WARNING)
+    with get_db_connection() as conn:
+        report = run_health_check(conn, args.tables or None, not args.no_recompute, args.workers)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    sys.exit(0 if report["ok"] else 1)
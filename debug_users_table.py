@@ -13,6 +13,7 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db import get_db_connection, init_db
+from password_policy import hash_password, store_password_hash, backfill_hash_params
 
 def check_database_status():
     """Check current database status"""
@@ -138,12 +139,8 @@ def change_user_password(username, new_password):
                 print(f"❌ User {username} not found")
                 return False
             
-            # Hash new password
-            salt = bcrypt.gensalt()
-            hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), salt).decode('utf-8')
-            
-            # Update password
-            conn.execute("UPDATE users SET password = ? WHERE username = ?", [hashed_password, username])
+            # Hash new password at the policy cost and record its parameters
+            store_password_hash(conn, username, hash_password(new_password))
             print(f"✅ Updated {username} password")
             return True
             
@@ -171,8 +168,7 @@ def bulk_restore_users_from_sovereignty(target_email="dmh4681@gmail.com", target
             print("=" * 60)
             
             # Hash the target password once
-            salt = bcrypt.gensalt()
-            hashed_password = bcrypt.hashpw(target_password.encode('utf-8'), salt).decode('utf-8')
+            hashed_password = hash_password(target_password)
             
             # Check existing users
             existing_users = conn.execute("SELECT username FROM users").fetchall()
@@ -186,7 +182,7 @@ def bulk_restore_users_from_sovereignty(target_email="dmh4681@gmail.com", target
                     # Update existing user
                     conn.execute("""
                         UPDATE users 
-                        SET email = ?, password = ?, path = ? 
+                        SET email = ?, password = ?, path = ?, hash_cost = NULL 
                         WHERE username = ?
                     """, [target_email, hashed_password, path, username])
                     print(f"🔄 Updated: {username} ({path})")
@@ -200,6 +196,9 @@ def bulk_restore_users_from_sovereignty(target_email="dmh4681@gmail.com", target
                     print(f"➕ Added: {username} ({path})")
                     added_count += 1
             
+            # Record hash parameters for every added or updated row
+            backfill_hash_params(conn)
+            
             print(f"\n✅ Bulk restore complete!")
             print(f"   Added: {added_count} new users")
             print(f"   Updated: {updated_count} existing users")
@@ -301,13 +300,13 @@ def main():
                 # Add user
                 try:
                     with get_db_connection() as conn:
-                        salt = bcrypt.gensalt()
-                        hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+                        hashed_password = hash_password(password)
                         
                         conn.execute("""
                             INSERT INTO users (username, email, password, path, created_at)
                             VALUES (?, ?, ?, ?, ?)
                         """, [username, email, hashed_password, path, datetime.now()])
+                        backfill_hash_params(conn)
                         
                         print(f"✅ Added user {username} successfully!")
                         
@@ -0,0 +1,237 @@
+# entry_events.py
+"""
+Write-behind log for habit submissions
+submit_entry() stores the sovereignty row and appends a submission_events row
+in one transaction, wakes the in-process worker and returns. The worker
+applies the derived state (achievement counters and streaks, the weekly quest
+and its XP, see sovereignty_ingest.apply_entry) from the log in event order,
+normally within a few milliseconds of the submit.
+
+Delivery is at-least-once: an event stays pending until a worker commits it,
+and the worker drains the backlog whenever it starts or wakes, so a crash or
+restart redelivers anything not yet applied. Applying is idempotent because
+the processed_at stamp (set only WHERE processed_at IS NULL) commits in the
+same transaction as the handlers: a redelivered event that was already applied
+changes nothing. An event whose handlers keep failing is retried on each wake
+up to MAX_ATTEMPTS times, then left pending with its last error. Streaks and
+quest days depend on order, so a user's later events wait behind their failed
+one until it is retried.
+
+The worker opens a connection per drain and closes it before sleeping: DuckDB
+locks the file for as long as any connection is open, and the Flask auth
+service and the CLI tools need it too.
+
+    python entry_events.py            # apply pending events and show the log status
+    python entry_events.py --retry    # also give failed events another MAX_ATTEMPTS tries
+"""
+
+import os
+import json
+import atexit
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from db import get_db_connection
+from sovereignty_ingest import ENTRY_FIELDS, store_entry, apply_entry
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = float(os.environ.get("ENTRY_EVENTS_POLL_SECONDS", 5))
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RESULTS_KEPT = 256  # Recent event results kept for result()
+
+def _payload(data, score):
+    return json.dumps({**{field: data.get(field) for field in ENTRY_FIELDS}, "score": int(score)})
+
+def submit_entry(conn, username, path, data, score, timestamp=None):
+    """
+    Store one scored entry and log it for the worker; returns the event_id
+    Derived state follows asynchronously, see submission_worker.result().
+    """
+    timestamp = timestamp or datetime.utcnow()
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        replaced = store_entry(conn, username, path, data, score, timestamp)
+        event_id = conn.execute("""
+            INSERT INTO submission_events (username, path, entry_timestamp, payload, replaced)
+            VALUES (?, ?, ?, ?, ?)
+            RETURNING event_id
+        """, [username, path, timestamp, _payload(data, score), replaced]).fetchone()[0]
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    submission_worker.notify()
+    return event_id
+
+def pending_events(conn, limit=BATCH_SIZE):
+    """
+    [(event_id, username, entry_timestamp, payload, replaced)] still to apply,
+    oldest first; users with a failed event are held back until it is retried
+    """
+    return conn.execute("""
+        SELECT event_id, username, entry_timestamp, payload, replaced FROM submission_events
+        WHERE processed_at IS NULL AND attempts < ?
+          AND username NOT IN (
+              SELECT username FROM submission_events WHERE processed_at IS NULL AND attempts >= ?
+          )
+        ORDER BY event_id
+        LIMIT ?
+    """, [MAX_ATTEMPTS, MAX_ATTEMPTS, limit]).fetchall()
+
+def apply_event(conn, event_id, username, timestamp, payload, replaced=False):
+    """
+    Apply one event's handlers and mark it processed in one transaction
+    Returns the achievements it unlocked, or None if it was already applied.
+    On failure the attempt and error are recorded and the exception re-raised.
+    """
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        claimed = conn.execute("""
+            UPDATE submission_events SET processed_at = CURRENT_TIMESTAMP, attempts = attempts + 1
+            WHERE event_id = ? AND processed_at IS NULL
+        """, [event_id]).fetchone()[0]
+        if not claimed:
+            conn.execute("ROLLBACK")
+            return None
+        unlocked = apply_entry(conn, username, json.loads(payload), timestamp, replaced)
+        conn.execute("COMMIT")
+        return unlocked
+    except Exception as e:
+        conn.execute("ROLLBACK")
+        conn.execute("""
+            UPDATE submission_events SET attempts = attempts + 1, last_error = ?
+            WHERE event_id = ? AND processed_at IS NULL
+        """, [str(e)[:500], event_id])
+        raise
+
+class SubmissionWorker:
+    """Background thread that applies pending submission events in order"""
+
+    def __init__(self, poll_seconds=POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._done = threading.Condition()
+        self._results = OrderedDict()  # event_id -> unlocked achievements
+
+    def _ensure_started(self):
+        # A thread inherited through fork() isn't running, so restart per pid
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="submission-worker", daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+                logger.info(f"📬 Submission worker started (pid {self._pid})")
+
+    def notify(self):
+        """Wake the worker (starting it if needed) to apply new events"""
+        self._ensure_started()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                # Closed before sleeping so other processes can open the file
+                with get_db_connection() as conn:
+                    self.drain(conn)
+            except Exception as e:
+                logger.error(f"❌ Submission worker error: {e}")
+            self._wake.wait(self.poll_seconds)
+
+    def drain(self, conn):
+        """
+        Apply pending events until none are left (or only failing ones); returns how many were applied
+        After a failure the rest of that user's events wait for the next drain.
+        """
+        applied = 0
+        while True:
+            events = pending_events(conn)
+            progressed, blocked = 0, set()
+            for event in events:
+                if event[1] in blocked:
+                    continue
+                try:
+                    unlocked = apply_event(conn, *event)
+                except Exception as e:
+                    logger.warning(f"⚠️ Submission event {event[0]} failed: {e}")
+                    blocked.add(event[1])
+                    continue
+                if unlocked is not None:
+                    self._finish(event[0], unlocked)
+                progressed += 1
+            applied += progressed
+            if len(events) < BATCH_SIZE or not progressed:
+                return applied
+
+    def _finish(self, event_id, unlocked):
+        with self._done:
+            self._results[event_id] = unlocked
+            while len(self._results) > RESULTS_KEPT:
+                self._results.popitem(last=False)
+            self._done.notify_all()
+
+    def result(self, event_id, timeout=0):
+        """
+        Achievements unlocked by `event_id` once this process has applied it,
+        waiting up to `timeout` seconds; None while it is still pending
+        """
+        with self._done:
+            self._done.wait_for(lambda: event_id in self._results, timeout)
+            return self._results.get(event_id)
+
+    def stop(self, timeout=2):
+        """Stop the thread after its current batch; pending events wait for the next start"""
+        thread = self._thread
+        self._stopping.set()
+        self._wake.set()
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+
+submission_worker = SubmissionWorker()
+atexit.register(submission_worker.stop)
+
+def log_status(conn):
+    """{"pending", "failed", "processed"} event counts"""
+    pending, failed, processed = conn.execute("""
+        SELECT
+            COUNT(*) FILTER (WHERE processed_at IS NULL AND attempts < ?),
+            COUNT(*) FILTER (WHERE processed_at IS NULL AND attempts >= ?),
+            COUNT(*) FILTER (WHERE processed_at IS NOT NULL)
+        FROM submission_events
+    """, [MAX_ATTEMPTS, MAX_ATTEMPTS]).fetchone()
+    return {"pending": pending, "failed": failed, "processed": processed}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending habit submission events")
+    parser.add_argument("--retry", action="store_true", help="Reset the attempts of failed events first")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with get_db_connection() as conn:
+        if args.retry:
+            reset = conn.execute(
+                "UPDATE submission_events SET attempts = 0 WHERE processed_at IS NULL AND attempts >= ?",
+                [MAX_ATTEMPTS]
+            ).fetchone()[0]
+            print(f"🔁 {reset:,} failed events queued for retry")
+        applied = SubmissionWorker().drain(conn)
+        status = log_status(conn)
+        print(f"✅ Applied {applied:,} events")
+        print(f"📬 {status['pending']:,} pending, {status['failed']:,} failed, {status['processed']:,} processed")
+        for event_id, username, error in conn.execute("""
+            SELECT event_id, username, last_error FROM submission_events
+            WHERE processed_at IS NULL AND attempts >= ?
+            ORDER BY event_id
+        """, [MAX_ATTEMPTS]).fetchall():
+            print(f"   ❌ #{event_id} {username}: {error}")
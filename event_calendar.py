@@ -0,0 +1,158 @@
+# event_calendar.py
+"""
+Seasonal and special event calendar
+Events live in config/events.json as yearly day windows (MM-DD, windows may
+wrap past New Year) with XP multipliers per activity category. At import the
+windows are compiled into a sorted table of day-of-year segments, each holding
+the events active on it, so "which events and multipliers apply on day D" is
+a single bisect. spans() walks the same table segment by segment, so XP
+backfills can look up a whole date range with one entry per change of events
+instead of one per day.
+
+    python event_calendar.py                         # today's events
+    python event_calendar.py 2025-01-01 2025-12-31   # event spans in a range
+"""
+
+import os
+import sys
+import json
+from bisect import bisect_right
+from datetime import date, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(BASE_DIR, "config", "events.json")
+
+_BASE_YEAR = 2000  # Leap year, so Feb 29 has a day-of-year of its own
+_YEAR_DAYS = 366
+
+def _day_of_year(month, day):
+    return date(_BASE_YEAR, month, day).timetuple().tm_yday
+
+def _parse_day(text):
+    month, day = (int(part) for part in text.split("-"))
+    return _day_of_year(month, day)
+
+def _on_year(year, day_of_year):
+    """Calendar date in `year` for a base-year day-of-year (Feb 29 -> Mar 1 off leap years)"""
+    base = date(_BASE_YEAR, 1, 1) + timedelta(days=day_of_year - 1)
+    try:
+        return base.replace(year=year)
+    except ValueError:
+        return date(year, 3, 1)
+
+class EventCalendar:
+    def __init__(self, events, categories=None):
+        self.categories = categories or {}
+        # Special events outrank seasons; otherwise config order
+        ranked = sorted(enumerate(events), key=lambda item: (item[1].get("type") != "special", item[0]))
+        self.events = [event for _, event in ranked]
+
+        windows, boundaries = [], {1}
+        for rank, event in enumerate(self.events):
+            start, end = _parse_day(event["start"]), _parse_day(event["end"])
+            pieces = [(start, end)] if start <= end else [(start, _YEAR_DAYS), (1, end)]
+            for first, last in pieces:
+                windows.append((first, last, rank))
+                boundaries.update((first, last + 1))
+
+        # Segment i covers [starts[i], starts[i + 1]) and lists its events by rank
+        self._starts = sorted(b for b in boundaries if b <= _YEAR_DAYS)
+        self._active = [
+            tuple(sorted(rank for first, last, rank in windows if first <= start <= last))
+            for start in self._starts
+        ]
+
+    def _segment(self, day):
+        return bisect_right(self._starts, _day_of_year(day.month, day.day)) - 1
+
+    def active_events(self, day=None):
+        """Events active on `day` (default today), highest priority first"""
+        return [self._event(rank) for rank in self._active[self._segment(day or date.today())]]
+
+    def _event(self, rank):
+        event = self.events[rank]
+        return {"type": event.get("type", "seasonal"), **event}
+
+    def primary_event(self, day=None):
+        """The event to feature on `day`, or None"""
+        active = self._active[self._segment(day or date.today())]
+        return self._event(active[0]) if active else None
+
+    def _combine(self, ranks):
+        multipliers = {"default": 1.0}
+        for rank in ranks:
+            for category, factor in self.events[rank].get("multipliers", {}).items():
+                multipliers[category] = max(multipliers.get(category, 1.0), factor)
+        return multipliers
+
+    def multipliers(self, day=None):
+        """{category: factor} on `day`; overlapping events take the larger factor"""
+        return self._combine(self._active[self._segment(day or date.today())])
+
+    def categories_for(self, tag):
+        """Categories whose keywords appear in `tag` (an XP source or challenge type)"""
+        tag = (tag or "").lower()
+        return [category for category, keywords in self.categories.items()
+                if any(keyword in tag for keyword in keywords)]
+
+    def multiplier(self, tag, day=None):
+        """XP multiplier for an activity tagged `tag` on `day`"""
+        multipliers = self.multipliers(day)
+        return max([multipliers["default"]] + [multipliers.get(c, 1.0) for c in self.categories_for(tag)])
+
+    def _rank_spans(self, start, end):
+        """(first_day, last_day, ranks) for start..end, one per run of identical segments"""
+        day, current = start, None
+        while day <= end:
+            segment = self._segment(day)
+            next_start = self._starts[segment + 1] if segment + 1 < len(self._starts) else _YEAR_DAYS + 1
+            if next_start > _YEAR_DAYS:
+                last = date(day.year, 12, 31)
+            else:
+                last = _on_year(day.year, next_start) - timedelta(days=1)
+            last = min(max(last, day), end)
+
+            ranks = self._active[segment]
+            if current and current[2] == ranks:
+                current = (current[0], last, ranks)  # Same events carry on (e.g. across New Year)
+            else:
+                if current:
+                    yield current
+                current = (day, last, ranks)
+            day = last + timedelta(days=1)
+        if current:
+            yield current
+
+    def spans(self, start, end):
+        """Yield (first_day, last_day, events) covering start..end inclusive, one per change of events"""
+        for first, last, ranks in self._rank_spans(start, end):
+            yield first, last, [self._event(rank) for rank in ranks]
+
+    def span_multipliers(self, start, end):
+        """[(first_day, last_day, {category: factor})] for start..end, for XP backfills"""
+        return [(first, last, self._combine(ranks)) for first, last, ranks in self._rank_spans(start, end)]
+
+def load_calendar(config_file=CONFIG_FILE):
+    with open(config_file, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return EventCalendar(config.get("events", []), config.get("categories", {}))
+
+CALENDAR = load_calendar()
+
+def active_events(day=None):
+    return CALENDAR.active_events(day)
+
+def event_multiplier(tag, day=None):
+    return CALENDAR.multiplier(tag, day)
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        first, last = date.fromisoformat(sys.argv[1]), date.fromisoformat(sys.argv[2])
+        for span_start, span_end, events in CALENDAR.spans(first, last):
+            names = ", ".join(event["name"] for event in events) or "(none)"
+            print(f"{span_start} → {span_end}: {names}")
+    else:
+        today = date.fromisoformat(sys.argv[1]) if len(sys.argv) == 2 else date.today()
+        for event in CALENDAR.active_events(today):
+            print(f"🌟 {event['name']} ({event['period']}): {event['bonus']}")
+        print(f"⚡ Multipliers: {CALENDAR.multipliers(today)}")
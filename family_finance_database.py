@@ -8,6 +8,8 @@ import duckdb
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
+from schema_migrations import migrate
+
 class FamilyFinanceDB:
     """Manages all family finance data persistence"""
     
@@ -16,120 +18,8 @@ class FamilyFinanceDB:
         self.create_tables()
     
     def create_tables(self):
-        """Create all necessary tables for family finance tracking"""
-        
-        # Financial accounts table - stores all account details
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS financial_accounts (
-                username TEXT NOT NULL,
-                account_name TEXT NOT NULL,
-                account_type TEXT NOT NULL, -- checking, savings, investment, crypto, retirement, etc.
-                institution TEXT,
-                balance REAL DEFAULT 0,
-                currency TEXT DEFAULT 'USD',
-                access_priority TEXT, -- immediate, short_term, medium_term, long_term
-                access_method TEXT, -- online, bank_visit, hardware_wallet, etc.
-                days_to_access INTEGER DEFAULT 0,
-                is_joint BOOLEAN DEFAULT FALSE,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                notes TEXT,
-                PRIMARY KEY (username, account_name)
-            )
-        """)
-        
-        # Crypto holdings - separate table for detailed crypto tracking
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS crypto_holdings (
-                username TEXT NOT NULL,
-                crypto_type TEXT NOT NULL, -- BTC, ETH, etc.
-                amount REAL NOT NULL,
-                acquisition_date DATE,
-                acquisition_price REAL,
-                storage_method TEXT, -- hardware_wallet, exchange, etc.
-                wallet_label TEXT,
-                is_staking BOOLEAN DEFAULT FALSE,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (username, crypto_type, wallet_label)
-            )
-        """)
-        
-        # Monthly expenses tracking
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS monthly_expenses (
-                username TEXT NOT NULL,
-                expense_category TEXT NOT NULL, -- housing, food, transport, etc.
-                amount REAL NOT NULL,
-                is_fixed BOOLEAN DEFAULT TRUE,
-                frequency TEXT DEFAULT 'monthly', -- monthly, annual, quarterly
-                notes TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (username, expense_category)
-            )
-        """)
-        
-        # Emergency contacts
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS emergency_contacts (
-                username TEXT NOT NULL,
-                contact_type TEXT NOT NULL, -- financial_advisor, attorney, crypto_mentor, etc.
-                contact_name TEXT NOT NULL,
-                phone TEXT,
-                email TEXT,
-                company TEXT,
-                notes TEXT,
-                priority INTEGER DEFAULT 1,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (username, contact_name)
-            )
-        """)
-        
-        # Document locations
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS document_locations (
-                username TEXT NOT NULL,
-                document_type TEXT NOT NULL, -- will, insurance, seed_phrase, etc.
-                location TEXT NOT NULL,
-                access_instructions TEXT,
-                last_verified DATE,
-                backup_location TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (username, document_type)
-            )
-        """)
-        
-        # Family training progress
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS family_training (
-                username TEXT NOT NULL,
-                training_topic TEXT NOT NULL,
-                family_member TEXT,
-                completion_date DATE,
-                comfort_level INTEGER CHECK (comfort_level >= 1 AND comfort_level <= 10),
-                notes TEXT,
-                next_review_date DATE,
-                PRIMARY KEY (username, training_topic, family_member)
-            )
-        """)
-        
-        # Sovereignty calculations snapshot
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS sovereignty_snapshot (
-                username TEXT NOT NULL,
-                snapshot_date DATE DEFAULT CURRENT_DATE,
-                total_assets REAL,
-                total_crypto REAL,
-                total_traditional REAL,
-                monthly_expenses REAL,
-                annual_expenses REAL,
-                sovereignty_ratio REAL,
-                full_sovereignty_ratio REAL,
-                sovereignty_status TEXT,
-                emergency_runway_months REAL,
-                btc_price_at_snapshot REAL,
-                notes TEXT,
-                PRIMARY KEY (username, snapshot_date)
-            )
-        """)
+        """Ensure the family finance tables exist (see config/migrations/0003_family_finance.sql)"""
+        migrate(self.conn)
     
     # Account Management Methods
     def upsert_account(self, username: str, account_data: Dict) -> bool:
@@ -7,11 +7,14 @@ Provides user-friendly interface for comprehensive financial data collection
 import streamlit as st
 from datetime import datetime, date
 from typing import Dict, Optional
-import pandas as pd
 from family_finance_database import FamilyFinanceDB
 from db import get_db_connection
+from lazy_imports import lazy_import
 import btc_price_utils
 
+# Only the expense and contact summaries build DataFrames (see lazy_imports.py)
+pd = lazy_import("pandas")
+
 def get_current_btc_price() -> float:
     """Get current BTC price from database"""
     try:
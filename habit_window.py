@@ -0,0 +1,109 @@
+# habit_window.py
+"""
+Columnar view over a user's recent sovereignty entries
+Shared by the emergency calculators so every consistency ratio, average and
+data-quality count comes from named NumPy columns instead of tuple indexes
+"""
+
+import numpy as np
+from typing import Dict
+
+# Columns loaded for every window, newest entry first
+WINDOW_COLUMNS = [
+    "timestamp", "score", "btc_usd", "btc_sats", "home_cooked_meals",
+    "no_spending", "invested_bitcoin", "meditation", "gratitude",
+    "read_or_learned", "environmental_action", "exercise_minutes",
+    "strength_training", "junk_food"
+]
+
+# Habit columns checked for completeness in the data quality report
+HABIT_COLUMNS = WINDOW_COLUMNS[4:]
+
+# Boolean habits that count as "done" when the flag is set
+FLAG_HABITS = {
+    "no_spending": "no_spending",
+    "invested_bitcoin": "invested_bitcoin",
+    "meditation": "meditation",
+    "gratitude": "gratitude",
+    "learning": "read_or_learned",
+    "environmental": "environmental_action",
+    "strength": "strength_training",
+}
+
+class HabitWindow:
+    """Named NumPy columns for a window of sovereignty rows (newest first)"""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = {name: np.ma.asarray(values) for name, values in columns.items()}
+        self.size = len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @classmethod
+    def from_result(cls, result) -> "HabitWindow":
+        """Build a window from an executed DuckDB query via fetchnumpy()"""
+        return cls(result.fetchnumpy())
+
+    @classmethod
+    def load(cls, conn, username: str, limit: int = 180) -> "HabitWindow":
+        """Load the user's most recent entries (default: 6 months of data)"""
+        result = conn.execute(f"""
+            SELECT {", ".join(WINDOW_COLUMNS)}
+            FROM sovereignty
+            WHERE username = ?
+            ORDER BY timestamp DESC
+            LIMIT ?
+        """, [username, limit])
+        return cls.from_result(result)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def filled(self, name: str, fill_value=0) -> np.ndarray:
+        """Column values with NULLs replaced by `fill_value`"""
+        return np.ma.filled(self.columns[name], fill_value)
+
+    def present(self, name: str) -> np.ndarray:
+        """Boolean mask of rows where the column is not NULL"""
+        return ~np.ma.getmaskarray(self.columns[name])
+
+    def habit_matrix(self) -> Dict[str, np.ndarray]:
+        """Per-row done/not-done flags for every tracked habit"""
+        flags = {key: self.filled(column, False).astype(bool) for key, column in FLAG_HABITS.items()}
+        flags["fitness"] = self.filled("exercise_minutes", 0) > 0
+        # NULL junk_food counts as a clean day, matching the original row checks
+        flags["nutrition"] = ~self.filled("junk_food", False).astype(bool)
+        return flags
+
+    def summary(self) -> Dict:
+        """
+        Compute every ratio, total and quality count for the window at once
+        Habit rates come from a single column-wise mean over a stacked flag matrix
+        """
+        if self.size == 0:
+            return {"rows": 0, "rates": {},
+                    "totals": {"btc_usd": 0.0, "btc_sats": 0}, "averages": {},
+                    "completeness": {}, "scored_rows": 0, "btc_rows": 0}
+
+        flags = self.habit_matrix()
+        names = list(flags)
+        matrix = np.column_stack([flags[name] for name in names])
+
+        presence = np.column_stack([self.present(name) for name in HABIT_COLUMNS])
+
+        score = self.filled("score", 0)
+        btc_usd = self.filled("btc_usd", 0).astype(np.float64)
+        meals = self.columns["home_cooked_meals"]
+
+        return {
+            "rows": self.size,
+            "rates": dict(zip(names, matrix.mean(axis=0).tolist())),
+            "totals": {
+                "btc_usd": float(btc_usd.sum()),
+                "btc_sats": int(self.filled("btc_sats", 0).astype(np.int64).sum()),
+            },
+            "averages": {
+                "home_cooked_meals": float(meals.mean()) if meals.count() else 0.0,
+            },
+            "completeness": dict(zip(HABIT_COLUMNS, presence.mean(axis=0).tolist())),
+            "scored_rows": int(np.count_nonzero(score > 0)),
+            "btc_rows": int(np.count_nonzero(btc_usd > 0)),
+        }
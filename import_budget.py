@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the Streamlit entry points
+For each page, runs that page's module-level import statements in a fresh
+interpreter under `python -X importtime` and reports the cumulative cost and
+the heaviest modules. Imports deferred through lazy_imports (or placed inside
+functions) don't count, which is the point. Third-party modules that aren't
+installed here are listed and skipped; any other import failure (a broken
+repo module, a name that no longer exists) is reported as an error. Exits
+non-zero when a page is over budget or fails to import, so it can gate CI.
+
+    python import_budget.py                 # all pages, default budgets
+    python import_budget.py pages/3_Dashboard.py --budget-ms 800 --top 15
+"""
+
+import os
+import re
+import sys
+import ast
+import json
+import argparse
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ENTRY_POINTS = ["app.py"] + sorted(
+    os.path.join("pages", name)
+    for name in os.listdir(os.path.join(BASE_DIR, "pages"))
+    if name.endswith(".py")
+)
+
+DEFAULT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", 1500))
+
+# Per-page overrides (ms of eager imports, Streamlit itself included)
+PAGE_BUDGETS_MS = {}
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def eager_imports(page_path):
+    """Source of the module-level import statements in `page_path`"""
+    with open(page_path, "r", encoding="utf-8-sig") as f:
+        source = f.read()
+    tree = ast.parse(source, filename=page_path)
+    return [ast.get_source_segment(source, node) for node in tree.body
+            if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+def _probe_script(statements):
+    """
+    Script that runs each import and prints {"missing", "failed"} as JSON
+    A ModuleNotFoundError for something outside the repo is an uninstalled
+    dependency; every other exception is a failure of the statement.
+    """
+    local_dirs = [BASE_DIR, os.path.join(BASE_DIR, "Private")]
+    lines = [
+        "import sys, os, json",
+        f"sys.path[:0] = {local_dirs!r}",
+        "def local(name):",
+        "    top = (name or '').split('.')[0]",
+        f"    return any(os.path.exists(os.path.join(d, top + '.py')) or os.path.isdir(os.path.join(d, top)) for d in {local_dirs!r})",
+        "missing, failed = set(), []",
+    ]
+    for statement in statements:
+        statement = statement.replace(chr(10), " ")
+        lines += [
+            "try:",
+            f"    {statement}",
+            "except ModuleNotFoundError as e:",
+            "    if e.name and not local(e.name):",
+            "        missing.add(e.name)",
+            "    else:",
+            f"        failed.append([{statement!r}, repr(e)])",
+            "except Exception as e:",
+            f"    failed.append([{statement!r}, repr(e)])",
+        ]
+    lines.append("print(json.dumps({'missing': sorted(missing), 'failed': failed}))")
+    return "\n".join(lines)
+
+def measure(page_path):
+    """{total_ms, modules: [(cumulative_ms, name)], missing: [...], failed: [(statement, error)]} for one page"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _probe_script(eager_imports(page_path))],
+        capture_output=True, text=True, cwd=BASE_DIR
+    )
+    top_level, modules = 0.0, []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        # Only unindented entries are imported directly by the probe; nested ones are included in them
+        if len(match.group(3)) <= 1:
+            top_level += cumulative_ms
+            modules.append((cumulative_ms, match.group(4)))
+
+    try:
+        outcome = json.loads(result.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        # The probe itself died (e.g. an import that exits the interpreter)
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}"
+        outcome = {"missing": [], "failed": [["<probe>", error]]}
+
+    return {
+        "total_ms": round(top_level, 1),
+        "modules": sorted(modules, reverse=True),
+        "missing": outcome["missing"],
+        "failed": [tuple(failure) for failure in outcome["failed"]],
+    }
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Check eager import time of Streamlit pages against a budget")
+    p.add_argument("pages", nargs="*", help="Entry points to check (default: app.py and pages/*.py)")
+    p.add_argument("--budget-ms", type=float, help="Budget for every page (overrides per-page budgets)")
+    p.add_argument("--top", type=int, default=5, help="Heaviest imports to list per page")
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    over_budget, failed = [], []
+
+    for page in args.pages or ENTRY_POINTS:
+        budget = args.budget_ms or PAGE_BUDGETS_MS.get(page, DEFAULT_BUDGET_MS)
+        report = measure(os.path.join(BASE_DIR, page))
+        ok = report["total_ms"] <= budget
+        if not ok:
+            over_budget.append(page)
+        if report["failed"]:
+            failed.append(page)
+            ok = False
+
+        print(f"{'✅' if ok else '❌'} {page}: {report['total_ms']:.0f}ms eager imports (budget {budget:.0f}ms)")
+        for cumulative_ms, name in report["modules"][:args.top]:
+            print(f"      {cumulative_ms:8.1f}ms  {name}")
+        if report["missing"]:
+            print(f"      ⚠️ not installed here, not measured: {', '.join(report['missing'])}")
+        for statement, error in report["failed"]:
+            print(f"      💥 {statement}: {error}")
+
+    if over_budget:
+        print(f"\n❌ Over budget: {', '.join(over_budget)}")
+    if failed:
+        print(f"\n❌ Import failures: {', '.join(failed)}")
+    if over_budget or failed:
+        return 1
+    print("\n✅ All pages within budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,25 +2,25 @@
 # Enhanced calculations and better tab content
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
 
-def calculate_real_family_preparedness(user_data, path, session_state):
+def calculate_real_family_preparedness(consistency, path, session_state):
     """
     Calculate REAL family preparedness including actual emergency tasks
     Not just sovereignty habits - actual emergency planning completion
+    `consistency` comes from preparedness_service.get_habit_consistency()
     """
     
-    # Sovereignty habit consistency (foundation)
-    recent_data = user_data[:30]  # Last 30 days
+    # Sovereignty habit consistency (foundation) over the last 30 days
+    rates = consistency["rates"]
     habit_scores = {
-        "meditation_consistency": sum(1 for row in recent_data if row[7]) / len(recent_data),
-        "gratitude_consistency": sum(1 for row in recent_data if row[8]) / len(recent_data),
-        "learning_consistency": sum(1 for row in recent_data if row[9]) / len(recent_data),
-        "spending_discipline": sum(1 for row in recent_data if row[5]) / len(recent_data),
-        "investment_consistency": sum(1 for row in recent_data if row[6]) / len(recent_data)
+        "meditation_consistency": rates["meditation"],
+        "gratitude_consistency": rates["gratitude"],
+        "learning_consistency": rates["learning"],
+        "spending_discipline": rates["no_spending"],
+        "investment_consistency": rates["invested_bitcoin"]
     }
-    sovereignty_foundation = sum(habit_scores.values()) / len(habit_scores)
+    sovereignty_foundation = consistency["sovereignty_foundation"]
     
     # ACTUAL emergency preparedness tasks (from session state)
     emergency_tasks = {
@@ -369,23 +369,13 @@ def get_enhanced_emergency_data(username, path):
     if "error" in base_data:
         return base_data
     
-    # Get user data for enhanced preparedness calculation
+    # Get cached habit consistency for enhanced preparedness calculation
     try:
-        from db import get_db_connection
-        with get_db_connection() as conn:
-            user_data = conn.execute("""
-                SELECT timestamp, score, btc_usd, btc_sats, home_cooked_meals,
-                       no_spending, invested_bitcoin, meditation, gratitude,
-                       read_or_learned, environmental_action, exercise_minutes,
-                       strength_training, junk_food
-                FROM sovereignty 
-                WHERE username = ? 
-                ORDER BY timestamp DESC 
-                LIMIT 180
-            """, [username]).fetchall()
+        from preparedness_service import get_habit_consistency
+        consistency = get_habit_consistency(username, window=30)
         
         # Calculate REAL family preparedness
-        real_preparedness = calculate_real_family_preparedness(user_data, path, st.session_state)
+        real_preparedness = calculate_real_family_preparedness(consistency, path, st.session_state)
         
         # Update the preparedness details
         base_data["preparedness_analysis"] = real_preparedness
@@ -0,0 +1,60 @@
+# lazy_imports.py
+"""
+Deferred imports for the Streamlit pages
+lazy_import("plotly.express") returns a module object that is only executed
+the first time one of its attributes is used, so a page pays for pandas,
+plotly or openai when the section that needs them renders rather than on
+every cold start. lazy_object() does the same for expensive instances such as
+API clients.
+
+import_budget.py measures what each page still imports eagerly.
+"""
+
+import sys
+import threading
+import importlib.util
+
+def lazy_import(name):
+    """Module `name`, executed on first attribute access (or already loaded)"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+class lazy_object:
+    """Build `factory()` on first attribute access and forward to it"""
+
+    def __init__(self, factory):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self):
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            with object.__getattribute__(self, "_lock"):
+                instance = object.__getattribute__(self, "_instance")
+                if instance is None:
+                    instance = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+def running_streamlit():
+    """The streamlit module when this process is a Streamlit server, else None"""
+    return sys.modules.get("streamlit")
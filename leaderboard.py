@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+XP Leaderboard Engine - pre-aggregated rankings for the gamification system
+Every XP award is folded into a per-user daily bucket (xp_daily_buckets) and a
+running all-time total (xp_user_totals), so weekly and monthly rankings sum at
+most 30 small rows per user instead of scanning xp_transactions. The tables
+are created by migration 0012.
+
+    python leaderboard.py    # rebuild every bucket from xp_transactions
+"""
+
+import threading
+import time
+import logging
+from datetime import date, datetime, timedelta
+
+import duckdb
+
+from xp_schema import xp_columns
+
+logger = logging.getLogger(__name__)
+
+# Days covered by each rolling timeframe (all_time reads xp_user_totals)
+TIMEFRAME_DAYS = {
+    "weekly": 7,
+    "monthly": 30,
+}
+
+CACHE_TTL_SECONDS = 60
+CACHE_TOP_K = 100
+
+def record_xp(conn, user_name, xp_amount, awarded_at=None):
+    """Fold one XP award into the user's daily bucket and all-time total"""
+    bucket_date = (awarded_at or datetime.now()).date()
+    conn.execute("""
+        INSERT INTO xp_daily_buckets (user_name, bucket_date, xp) VALUES (?, ?, ?)
+        ON CONFLICT (user_name, bucket_date) DO UPDATE SET xp = xp_daily_buckets.xp + excluded.xp
+    """, [user_name, bucket_date, xp_amount])
+    conn.execute("""
+        INSERT INTO xp_user_totals (user_name, total_xp) VALUES (?, ?)
+        ON CONFLICT (user_name) DO UPDATE SET total_xp = xp_user_totals.total_xp + excluded.total_xp
+    """, [user_name, xp_amount])
+
+def rebuild_buckets(conn, user_name=None):
+    """
+    Recompute buckets and totals from xp_transactions (all users or one)
+    Reads either XP layout, so it also backfills awards made before the
+    buckets existed.
+    """
+    user_filter = "WHERE user_name = ?" if user_name else ""
+    params = [user_name] if user_name else []
+
+    conn.execute(f"DELETE FROM xp_daily_buckets {user_filter}", params)
+    conn.execute(f"DELETE FROM xp_user_totals {user_filter}", params)
+    columns = xp_columns(conn, "xp_transactions")
+    if columns:
+        conn.execute(f"""
+            INSERT INTO xp_daily_buckets (user_name, bucket_date, xp)
+            SELECT user_name, CAST({columns["time"]} AS DATE), SUM({columns["xp"]})
+            FROM xp_transactions {user_filter}
+            GROUP BY user_name, CAST({columns["time"]} AS DATE)
+        """, params)
+    conn.execute(f"""
+        INSERT INTO xp_user_totals (user_name, total_xp)
+        SELECT user_name, SUM(xp)
+        FROM xp_daily_buckets {user_filter}
+        GROUP BY user_name
+    """, params)
+    logger.info(f"Rebuilt XP buckets for {user_name or 'all users'}")
+
+def _window_start(timeframe):
+    return date.today() - timedelta(days=TIMEFRAME_DAYS[timeframe])
+
+def _ranking_query(timeframe):
+    """SQL returning (user_name, total_xp) for the timeframe, plus its params"""
+    if timeframe in TIMEFRAME_DAYS:
+        return """
+            SELECT user_name, SUM(xp) AS total_xp
+            FROM xp_daily_buckets
+            WHERE bucket_date >= ?
+            GROUP BY user_name
+        """, [_window_start(timeframe)]
+    return "SELECT user_name, total_xp FROM xp_user_totals", []
+
+class LeaderboardEngine:
+    """
+    Serves leaderboard reads from the pre-aggregated tables with a short-lived
+    in-memory top-K per timeframe
+    """
+
+    def __init__(self, db_path, ttl_seconds=CACHE_TTL_SECONDS, top_k=CACHE_TOP_K):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.top_k = top_k
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Forget cached rankings (e.g. after a bulk rebuild)"""
+        with self._lock:
+            self._cache.clear()
+
+    def _load_top(self, timeframe, limit):
+        query, params = _ranking_query(timeframe)
+        with duckdb.connect(self.db_path) as conn:
+            rows = conn.execute(f"""
+                SELECT user_name, total_xp
+                FROM ({query}) ranked
+                WHERE total_xp > 0
+                ORDER BY total_xp DESC, user_name
+                LIMIT ?
+            """, params + [limit]).fetchall()
+
+        return [
+            {
+                "rank": position,
+                "user_name": user_name,
+                "total_xp": int(total_xp),
+                "level": int(total_xp) // 100 + 1
+            }
+            for position, (user_name, total_xp) in enumerate(rows, start=1)
+        ]
+
+    def _top(self, timeframe):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(timeframe)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        entries = self._load_top(timeframe, self.top_k)
+        with self._lock:
+            self._cache[timeframe] = (now + self.ttl_seconds, entries)
+        return entries
+
+    def get_leaderboard(self, limit=10, timeframe="weekly"):
+        """Top `limit` users for weekly, monthly or all_time"""
+        if limit > self.top_k:
+            # Larger pages bypass the cache rather than growing it
+            return self._load_top(timeframe, limit)
+        return self._top(timeframe)[:limit]
+
+    def get_user_rank(self, user_name, timeframe="weekly"):
+        """
+        A single user's rank and XP for the timeframe
+        Answered from the cached top-K when possible, otherwise by counting the
+        users with more XP instead of ranking everyone
+        """
+        for entry in self._top(timeframe):
+            if entry["user_name"] == user_name:
+                return entry
+
+        query, params = _ranking_query(timeframe)
+        with duckdb.connect(self.db_path) as conn:
+            if timeframe in TIMEFRAME_DAYS:
+                user_xp = conn.execute("""
+                    SELECT COALESCE(SUM(xp), 0) FROM xp_daily_buckets
+                    WHERE user_name = ? AND bucket_date >= ?
+                """, [user_name, _window_start(timeframe)]).fetchone()[0]
+            else:
+                row = conn.execute(
+                    "SELECT total_xp FROM xp_user_totals WHERE user_name = ?", [user_name]
+                ).fetchone()
+                user_xp = row[0] if row else 0
+
+            if not user_xp:
+                return None
+
+            ahead = conn.execute(f"""
+                SELECT COUNT(*) FROM ({query}) ranked
+                WHERE total_xp > ? OR (total_xp = ? AND user_name < ?)
+            """, params + [user_xp, user_xp, user_name]).fetchone()[0]
+
+        return {
+            "rank": ahead + 1,
+            "user_name": user_name,
+            "total_xp": int(user_xp),
+            "level": int(user_xp) // 100 + 1
+        }
+
+if __name__ == "__main__":
+    from db import get_db_connection
+
+    logging.basicConfig(level=logging.INFO)
+    with get_db_connection() as conn:
+        conn.execute("BEGIN TRANSACTION")
+        rebuild_buckets(conn)
+        conn.execute("COMMIT")
+        users, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(total_xp), 0) FROM xp_user_totals").fetchone()
+        print(f"✅ Rebuilt XP buckets: {users:,} users, {total:,} XP")
@@ -1,9 +1,13 @@
 # login.py
-import os, bcrypt
+# Run in production with several workers, e.g. `gunicorn -w 4 -b 0.0.0.0:5002 login:app`
+import os, time
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import logging
 from db import get_db_connection, init_db
+from password_pool import password_pool, PoolBusy
+from session_tokens import issue_token
+from password_policy import current_cost, needs_rehash, store_password_hash
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -26,27 +30,63 @@ CORS(app,
          "max_age": 3600
      }})
 
+def authenticate(username, password):
+    """
+    (username, path) when the credentials are valid, otherwise None
+    Raises PoolBusy when the password pool is saturated.
+    """
+    # Release the database before the slow bcrypt check
+    with get_db_connection() as conn:
+        user = conn.execute(
+            "SELECT username, password, path FROM users WHERE username = ?", [username]
+        ).fetchone()
+
+    if not user:
+        logger.warning(f"User not found: {username}")
+        return None
+
+    db_username, hashed_pw, path = user
+    if not password_pool.check_password(password, hashed_pw):
+        logger.warning(f"Invalid password for user: {username}")
+        return None
+
+    if needs_rehash(hashed_pw):
+        rehash_password(db_username, password)
+
+    return db_username, path
+
+def rehash_password(username, password):
+    """Move a verified password onto the current cost; never fails the login"""
+    try:
+        new_hash = password_pool.hash_password(password)
+        with get_db_connection() as conn:
+            store_password_hash(conn, username, new_hash)
+        logger.info(f"🔁 Rehashed password for {username} at the current cost")
+    except Exception as e:
+        logger.warning(f"Could not rehash password for {username}: {e}")
+
+def busy_response():
+    """503 with a Retry-After hint when the password pool is saturated"""
+    response = jsonify({"status": "error", "message": "Login service is busy, please retry shortly."})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
 @app.route("/login", methods=["POST", "OPTIONS"])
 def login_user():
     if request.method == "OPTIONS":
         return "", 200
         
-    logger.info("Received login request")
-    logger.info(f"Request headers: {dict(request.headers)}")
-    logger.info(f"Request data: {request.get_data()}")
+    started = time.perf_counter()
+    logger.debug("Received login request")
     
-    try:
-        data = request.get_json()
-        logger.info(f"Parsed JSON data: {data}")
-    except Exception as e:
-        logger.error(f"Error parsing JSON: {str(e)}")
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        logger.error("Error parsing JSON login request")
         return jsonify({"status": "error", "message": "Invalid JSON data"}), 400
 
     username = data.get("username", "").strip()
     password = data.get("password", "")
 
-    logger.info(f"Processing login for username: {username}")
-
     # Validate input fields
     if not username or not password:
         logger.warning("Missing username or password")
@@ -56,33 +96,42 @@ def login_user():
         }), 400
 
     try:
-        with get_db_connection() as conn:
-            user = conn.execute(
-                "SELECT username, password, path FROM users WHERE username = ?", [username]
-            ).fetchone()
-
-            if not user:
-                logger.warning(f"User not found: {username}")
-                return jsonify({"status": "error", "message": "Invalid credentials."}), 401
-
-            db_username, hashed_pw, path = user
-            if not bcrypt.checkpw(password.encode("utf-8"), hashed_pw.encode("utf-8")):
-                logger.warning(f"Invalid password for user: {username}")
-                return jsonify({"status": "error", "message": "Invalid credentials."}), 401
-
-            logger.info(f"Successful login for user: {db_username}")
-            return jsonify({
-                "status": "success",
-                "username": db_username,
-                "path": path,
-                "streamlit_url": "http://localhost:8501"
-            }), 200
+        user = authenticate(username, password)
+        if not user:
+            return jsonify({"status": "error", "message": "Invalid credentials."}), 401
+
+        db_username, path = user
+        logger.info(f"Successful login for user: {db_username}")
+        return jsonify({
+            "status": "success",
+            "username": db_username,
+            "path": path,
+            "token": issue_token(db_username, path),
+            "streamlit_url": "http://localhost:8501"
+        }), 200
+    except PoolBusy as e:
+        logger.warning(f"Rejecting login, password pool busy: {e}")
+        return busy_response()
     except Exception as e:
         logger.error(f"Error during login: {str(e)}")
         return jsonify({"status": "error", "message": f"Database error: {str(e)}"}), 500
+    finally:
+        password_pool.metrics.observe(time.perf_counter() - started)
+
+@app.route("/login/metrics", methods=["GET"])
+def login_metrics():
+    """Login throughput and latency for this worker process"""
+    return jsonify({
+        "pid": os.getpid(),
+        "pool_workers": password_pool.workers,
+        "max_pending": password_pool.max_pending,
+        **password_pool.metrics.snapshot()
+    }), 200
 
 if __name__ == "__main__":
     logger.info("Starting Flask server...")
     # Initialize database
     init_db()
+    # Benchmark the host once so the first login doesn't pay for it
+    logger.info(f"Password hashing cost: {current_cost()}")
     app.run(host='0.0.0.0', port=5002, debug=False)
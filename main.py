@@ -1,8 +1,7 @@
 ﻿import argparse
-import csv
 import os
 import sys
-from datetime import datetime
+from datetime import date
 
 
 # Make sure Python can import tracker/scoring.py
@@ -11,10 +10,11 @@ TRACKER_DIR = os.path.join(BASE_DIR, "tracker")
 sys.path.insert(0, TRACKER_DIR)
 
 from scoring import calculate_daily_score
+from db import get_db_connection, init_db
+from sovereignty_ingest import record_entry, import_history_dir
+from preparedness_service import invalidate_preparedness
 
 DATA_DIR = os.path.join(BASE_DIR, "data")
-def get_history_file(username: str) -> str:
-    return os.path.join(DATA_DIR, f"history_{username.lower().strip()}.csv")
 
 
 # Define the questions, their keys, and how to cast the answer
@@ -46,26 +46,116 @@ def list_available_paths():
 def parse_args():
     p = argparse.ArgumentParser(description="Sovereignty Score Tracker")
     p.add_argument("--history", action="store_true", help="Show past sovereignty scores")
-    p.add_argument("--user", type=str, help="Specify username for --history")
-    p.add_argument("--clear-history", action="store_true", help="Erase all saved history")
+    p.add_argument("--user", type=str, help="Limit --history / --clear-history / import to one username")
+    p.add_argument("--since", type=date.fromisoformat, help="Only show history on or after YYYY-MM-DD")
+    p.add_argument("--until", type=date.fromisoformat, help="Only show history on or before YYYY-MM-DD")
+    p.add_argument("--page", type=int, default=1, help="History page to show (newest first)")
+    p.add_argument("--page-size", type=int, default=20, help="Entries per history page")
+    p.add_argument("--clear-history", action="store_true", help="Erase saved history for --user")
     p.add_argument("--path", type=str, help="Scoring profile to use (e.g., 'default', 'financial_path')")
     p.add_argument("--list-paths", action="store_true", help="List available scoring paths and exit")
-    return p.parse_args()
-
 
+    # Subcommand options that share a top-level dest use SUPPRESS, so they only
+    # set it when given and `--user bob import` works as well as `import --user bob`
+    commands = p.add_subparsers(dest="command")
+    imp = commands.add_parser("import", help="Load legacy history*.csv files into the database")
+    imp.add_argument("--dir", default=DATA_DIR, help="Directory holding history*.csv (default: data/)")
+    imp.add_argument("--user", type=str, default=argparse.SUPPRESS, help="Username for CSVs that don't record one")
+    imp.add_argument("--path", type=str, default=argparse.SUPPRESS, help="Path to store imported rows under (default: default)")
+
+    score = commands.add_parser("score", help="Batch-score a JSON Lines / CSV / Parquet file of entries")
+    score.add_argument("input", help="File of daily entries (.jsonl, .json, .csv, .parquet)")
+    score.add_argument("--output", "-o", help="Where to write results (.jsonl, .csv, .parquet); default stdout")
+    score.add_argument("--path", type=str, default=argparse.SUPPRESS, help="Path to score against, or 'all' (default: each entry's own path)")
+    score.add_argument("--chunk-size", type=int, default=5000, help="Entries per chunk")
+    score.add_argument("--workers", type=int, help="Scoring processes (default: automatic by file size)")
+    return p.parse_args()
 
-def show_history(username=None):
-    """Print the user's history file."""
-    if username is None:
+def history_filter(username=None, since=None, until=None):
+    """WHERE clause + params shared by the history summary and listing"""
+    clauses, params = [], []
+    if username:
+        clauses.append("username = ?")
+        params.append(username)
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        # Half-open upper bound so the predicate stays on the raw column
+        clauses.append("timestamp < CAST(? AS DATE) + INTERVAL 1 DAY")
+        params.append(until)
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def show_history(username=None, since=None, until=None, page=1, page_size=20):
+    """Print summary stats and one page of entries (all users when no username)"""
+    where, params = history_filter(username, since, until)
+    page = max(page, 1)
+
+    with get_db_connection() as conn:
+        summary = conn.execute(f"""
+            SELECT username, COUNT(*), AVG(score), MIN(score), MAX(score),
+                   MIN(timestamp), MAX(timestamp)
+            FROM sovereignty {where}
+            GROUP BY username
+            ORDER BY COUNT(*) DESC, username
+        """, params).fetchall()
+
+        if not summary:
+            print("No history found for these filters yet.")
+            return
+
+        rows = conn.execute(f"""
+            SELECT timestamp, username, path, score,
+                   home_cooked_meals, exercise_minutes, invested_bitcoin, meditation
+            FROM sovereignty {where}
+            ORDER BY timestamp DESC
+            LIMIT ? OFFSET ?
+        """, params + [page_size, (page - 1) * page_size]).fetchall()
+
+    total = sum(entries for _, entries, *_ in summary)
+    print(f"📊 {total} entries for {len(summary)} user(s)\n")
+    print(f"{'User':20} {'Entries':>7} {'Avg':>6} {'Min':>4} {'Max':>4}  First       Last")
+    for user, entries, avg, low, high, first, last in summary:
+        print(f"{user:20} {entries:>7} {avg:>6.1f} {low:>4} {high:>4}  "
+              f"{first:%Y-%m-%d}  {last:%Y-%m-%d}")
+
+    pages = (total + page_size - 1) // page_size
+    print(f"\n📜 Page {page} of {pages} (newest first)\n")
+    for ts, user, path, score, meals, minutes, btc, med in rows:
+        print(f"{ts:%Y-%m-%d %H:%M}  {user:15} {path or '-':22} score {score:>3}  "
+              f"meals {meals if meals is not None else '-'}  exercise {minutes if minutes is not None else '-'}m  "
+              f"btc {'✔' if btc else '·'}  meditation {'✔' if med else '·'}")
+
+def clear_history(username=None):
+    """Delete one user's entries after an explicit confirmation"""
+    if not username:
         print("❗ Please specify a username with --user=<name>")
         return
-    history_file = get_history_file(username)
-    if not os.path.exists(history_file):
-        print("No history file found for this user yet.")
-        return
-    with open(history_file, newline="") as f:
-        print(f.read())
-
+    with get_db_connection() as conn:
+        count = conn.execute("SELECT COUNT(*) FROM sovereignty WHERE username = ?", [username]).fetchone()[0]
+        if not count:
+            print("ℹ️  No history to clear.")
+            return
+        confirm = input(f"Type '{username}' to delete {count} entries: ")
+        if confirm != username:
+            print("ℹ️  Cancelled.")
+            return
+        conn.execute("DELETE FROM sovereignty WHERE username = ?", [username])
+        invalidate_preparedness(username, conn, since=date.min)
+    print(f"✔️  Cleared {count} entries for {username}")
+
+def import_legacy_history(data_dir, username=None, path="default"):
+    """Bulk-load history*.csv files written by older versions of this CLI"""
+    with get_db_connection() as conn:
+        results = import_history_dir(conn, data_dir, username, path)
+    if not results:
+        print(f"ℹ️  No history*.csv files in {data_dir}")
+    for csv_path, inserted in results.items():
+        name = os.path.basename(csv_path)
+        if inserted is None:
+            print(f"⚠️  {name}: no username column, re-run with --user")
+        else:
+            print(f"✔️  {name}: {inserted} new rows")
 
 def prompt_user() -> dict:
     """Ask each question in turn, validate & cast responses."""
@@ -80,21 +170,15 @@ def prompt_user() -> dict:
                 print(f"❗ Invalid input for {key!r}. Please try again.")
     return answers
 
-def ensure_history_file(history_file):
-    """Create history.csv with a header row if it doesn't yet exist."""
-    if not os.path.isdir(DATA_DIR):
-        os.makedirs(DATA_DIR)
-    if not os.path.isfile(history_file):
-        with open(history_file, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["timestamp"] + [k for k, _, _ in FIELDS] + ["score"])
-
-def append_to_history(history_file, data: dict, score: int):
-    """Append today's responses + computed score."""
-    row = [datetime.now().isoformat()] + [data[key] for key, *_ in FIELDS] + [score]
-    with open(history_file, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(row)
+def batch_score(input_path, output_path=None, path=None, chunk_size=5000, workers=None):
+    """Score a whole file of entries and report throughput on stderr"""
+    from batch_scoring import score_file
+
+    stats = score_file(input_path, output_path, path=path, chunk_size=chunk_size, workers=workers)
+    print(f"⚡ Scored {stats['entries']} entries -> {stats['results']} results "
+          f"in {stats['seconds']}s ({stats['entries_per_second']} entries/s, "
+          f"{stats['chunks']} chunks, {stats['workers']} worker(s), {stats['errors']} errors)",
+          file=sys.stderr)
 
 def main(path="default"):
     print("\n=== Sovereignty Score Tracker ===\n")
@@ -103,25 +187,26 @@ def main(path="default"):
     username = daily_data["username"]
     score = calculate_daily_score(daily_data, path=path)
     print(f"\n💪 Your Sovereignty Score for today: {score}\n")
-    history_file = get_history_file(username)
-    ensure_history_file(history_file)
-    append_to_history(history_file, daily_data, score)
-    print(f"✔️  Saved to {history_file}\n")
+    with get_db_connection() as conn:
+        record_entry(conn, username, path, daily_data, score)
+    print("✔️  Saved to the sovereignty database\n")
 
 if __name__ == "__main__":
     args = parse_args()
 
-    if args.clear_history:
-        if os.path.isfile(HISTORY_FILE):
-            os.remove(HISTORY_FILE)
-            print(f"✔️  Cleared {HISTORY_FILE}")
-        else:
-            print("ℹ️  No history file to clear.")
-    elif args.history:
-        show_history(args.user)
+    if args.command == "score":
+        batch_score(args.input, args.output, args.path, args.chunk_size, args.workers)
     elif args.list_paths:
         list_available_paths()
     else:
-        selected_path = args.path if args.path else "default"
-        main(path=selected_path)
-
+        # Everything else reads or writes the sovereignty table
+        init_db()
+        if args.command == "import":
+            import_legacy_history(args.dir, args.user, args.path or "default")
+        elif args.clear_history:
+            clear_history(args.user)
+        elif args.history:
+            show_history(args.user, args.since, args.until, args.page, args.page_size)
+        else:
+            selected_path = args.path if args.path else "default"
+            main(path=selected_path)
@@ -0,0 +1,173 @@
+# meal_plan_exports.py
+"""
+On-demand exports for AI meal plans
+The meal plan page used to build three xlsxwriter workbooks on every render
+whether or not anything was downloaded. get_plan_exports() now returns a
+PlanExports for the plan's content hash; its tables are built once, the first
+time an artifact needs them, and each (artifact, format) is rendered once and
+reused until the plan changes. Workbooks are written through a spooled temp
+file, so a large plan spills to disk instead of sitting in several BytesIO
+copies.
+
+Formats: xlsx (one sheet per table), csv, and parquet when pyarrow or
+fastparquet is installed. Artifacts with several tables come as a zip of one
+file per table in the csv and parquet formats.
+"""
+
+import io
+import json
+import hashlib
+import logging
+import zipfile
+import tempfile
+import threading
+import importlib.util
+from collections import OrderedDict
+from datetime import datetime
+
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+CACHE_PLANS = 16                   # Plans whose exports stay in memory
+SPOOL_MAX_BYTES = 1 * 1024 * 1024  # Workbooks larger than this spill to a temp file
+
+# artifact -> (icon, label, file name prefix, tables in sheet order)
+ARTIFACTS = {
+    "shopping": ("📋", "Shopping List", "sovereignty_shopping", ["Shopping List"]),
+    "meals": ("🍽️", "Meal Plan", "sovereignty_meals", ["Meal Plan"]),
+    "full": ("📊", "Full Plan", "complete_sovereignty_plan", ["Plan Summary", "Meals", "Shopping List"]),
+}
+
+# Sheet name -> the table behind it (the meal list appears under two names)
+TABLE_SOURCES = {"Shopping List": "shopping", "Meal Plan": "meals", "Meals": "meals", "Plan Summary": "summary"}
+
+FORMATS = {
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV", "text/csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+}
+
+def available_formats():
+    """Formats this install can write (parquet needs pyarrow or fastparquet)"""
+    formats = ["xlsx", "csv"]
+    if importlib.util.find_spec("pyarrow") or importlib.util.find_spec("fastparquet"):
+        formats.append("parquet")
+    return formats
+
+def plan_hash(meal_plan, consciousness_level):
+    """Content hash identifying a plan's exports"""
+    content = json.dumps([meal_plan, consciousness_level], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+class PlanExports:
+    """Tables and rendered files for one meal plan, each built on first use"""
+
+    def __init__(self, meal_plan, consciousness_level, key):
+        self.meal_plan = meal_plan
+        self.consciousness_level = consciousness_level
+        self.plan_hash = key
+        self._tables = {}
+        self._files = {}
+        self._lock = threading.Lock()
+
+    # ── Tables ─────────────────────────────────────────────────────────────────
+
+    def _build_table(self, source):
+        plan = self.meal_plan
+        if source == "shopping":
+            return pd.DataFrame([(k, str(v)) for k, v in plan.get("shopping_list", {}).items()],
+                                columns=["Category", "Items"])
+        if source == "meals":
+            return pd.DataFrame([
+                {"Type": meal_type.title(), "Name": meal.get("name", ""),
+                 "Prep Time": meal.get("prep_time", ""), "Benefits": meal.get("sovereignty_benefits", "")}
+                for meal_type, meals in plan.get("weekly_meals", {}).items() for meal in meals
+            ])
+        if source == "summary":
+            summary = {
+                "Plan Overview": plan.get("meal_plan", {}).get("overview", ""),
+                "Consciousness Level": self.consciousness_level,
+                "Sovereignty Alignment": plan.get("meal_plan", {}).get("sovereignty_alignment", ""),
+                "Daily Calories": plan.get("nutrition_analysis", {}).get("daily_macros", {}).get("calories", ""),
+                "Estimated Cost": plan.get("shopping_list", {}).get("estimated_weekly_cost", ""),
+                "Prep Time": plan.get("meal_prep_strategy", {}).get("time_investment", ""),
+            }
+            return pd.DataFrame(list(summary.items()), columns=["Aspect", "Details"])
+        raise KeyError(source)
+
+    def table(self, name):
+        source = TABLE_SOURCES[name]
+        if source not in self._tables:
+            self._tables[source] = self._build_table(source)
+        return self._tables[source]
+
+    def _tables_for(self, artifact):
+        tables = [(name, self.table(name)) for name in ARTIFACTS[artifact][3]]
+        if artifact == "full":
+            # The full plan skips empty meal and shopping sheets, as before
+            tables = [(name, df) for name, df in tables if name == "Plan Summary" or not df.empty]
+        return tables
+
+    # ── Rendering ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _xlsx(tables):
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+            with pd.ExcelWriter(spool, engine="xlsxwriter") as writer:
+                for name, df in tables:
+                    df.to_excel(writer, index=False, sheet_name=name)
+            spool.seek(0)
+            return spool.read()
+
+    @staticmethod
+    def _single(df, fmt):
+        if fmt == "csv":
+            return df.to_csv(index=False).encode("utf-8")
+        buffer = io.BytesIO()
+        df.astype(str).to_parquet(buffer, index=False)  # Plan fields are free text of mixed types
+        return buffer.getvalue()
+
+    def _zip(self, tables, fmt):
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+            with zipfile.ZipFile(spool, "w", zipfile.ZIP_DEFLATED) as archive:
+                for name, df in tables:
+                    archive.writestr(f"{name.lower().replace(' ', '_')}.{fmt}", self._single(df, fmt))
+            spool.seek(0)
+            return spool.read()
+
+    def render(self, artifact, fmt="xlsx"):
+        """(bytes, file_name, mime) for `artifact` in `fmt`, rendered on first request"""
+        with self._lock:
+            if (artifact, fmt) not in self._files:
+                tables = self._tables_for(artifact)
+                if fmt == "xlsx":
+                    data, extension, mime = self._xlsx(tables), "xlsx", FORMATS["xlsx"][1]
+                elif len(tables) == 1:
+                    data, extension, mime = self._single(tables[0][1], fmt), fmt, FORMATS[fmt][1]
+                else:
+                    data, extension, mime = self._zip(tables, fmt), "zip", "application/zip"
+                self._files[(artifact, fmt)] = (data, extension, mime)
+                logger.info(f"📦 Rendered {artifact} {fmt} export for plan {self.plan_hash} ({len(data):,} bytes)")
+            data, extension, mime = self._files[(artifact, fmt)]
+
+        prefix = ARTIFACTS[artifact][2]
+        file_name = f"{prefix}_{self.consciousness_level.lower()}_{datetime.now().strftime('%Y%m%d')}.{extension}"
+        return data, file_name, mime
+
+_plans = OrderedDict()  # plan hash -> PlanExports, least recently used first
+_plans_lock = threading.Lock()
+
+def get_plan_exports(meal_plan, consciousness_level):
+    """The PlanExports for this plan's content, shared across reruns and sessions"""
+    key = plan_hash(meal_plan, consciousness_level)
+    with _plans_lock:
+        exports = _plans.get(key)
+        if exports is None:
+            exports = _plans[key] = PlanExports(meal_plan, consciousness_level, key)
+            while len(_plans) > CACHE_PLANS:
+                _plans.popitem(last=False)
+        _plans.move_to_end(key)
+        return exports
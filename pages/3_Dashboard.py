@@ -7,10 +7,7 @@ st.set_page_config(
 )
 st.session_state['use_simple_xp'] = True  # Force simple XP system
 
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta, date
+from datetime import datetime, date
 import sys
 import os
 import uuid
@@ -26,10 +23,20 @@ if private_path not in sys.path:
     sys.path.insert(0, private_path)
 
 from db import get_db_connection
-from sovereignty_achievements import SovereigntyAchievementEngine
+from session_tokens import resolve_session, revoke_token
+from lazy_imports import lazy_import
+
+# Heavy libraries load on first use (see lazy_imports.py)
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 # NEW: Import the real XP system
 from xp_system import XPTransactionEngine, get_gamification_data_real, handle_challenge_completion
+from leaderboard import record_xp
+from daily_challenges import get_daily_challenges
+from weekly_quests import get_weekly_quest, record_quest_progress, select_quest, week_start
+from event_calendar import CALENDAR, event_multiplier
 
 # REMOVED: AQAL imports
 # try:
@@ -194,15 +201,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Get user info from query params or session state
-username = st.query_params.get("username", None) or st.session_state.get("username", None)
-path = st.query_params.get("path", None) or st.session_state.get("path", None)
-
-# Store in session state if we got it from query params
-if st.query_params.get("username"):
-    st.session_state.username = st.query_params.get("username")
-if st.query_params.get("path"):
-    st.session_state.path = st.query_params.get("path")
+# Get user info from the signed session token
+username, path = resolve_session(st.query_params, st.session_state)
 
 if not username or not path:
     st.error("🚨 Please log in through the main page to access your dashboard.")
@@ -226,6 +226,7 @@ def init_xp_engine():
 @st.cache_data(ttl=300)
 def get_user_achievements(username):
     """Get user achievements with caching"""
+    from sovereignty_achievements import SovereigntyAchievementEngine
     engine = SovereigntyAchievementEngine()
     return engine.calculate_user_achievements(username)
 
@@ -278,7 +279,13 @@ def render_xp_display_enhanced_safe(gamification_data):
 # Helper Functions - Insert these where the comment was
 
 def nuclear_reset_xp_system():
-    """Nuclear reset - completely destroys and recreates XP tables"""
+    """
+    Nuclear reset - empties every XP table (awards, completions, quests,
+    achievements and leaderboard buckets) in one transaction
+    The tables themselves belong to the migrations and are kept. Achievement
+    progress is cleared with the unlocks, so both are rebuilt from the
+    sovereignty history on the next read, and quests recount the same way.
+    """
     import duckdb
     import os
     
@@ -286,101 +293,102 @@ def nuclear_reset_xp_system():
     base_dir = os.path.dirname(os.path.dirname(__file__))
     db_path = os.path.join(base_dir, "data", "sovereignty.duckdb")
     
+    tables_to_empty = [
+        "xp_transactions",
+        "daily_challenge_completion",
+        "weekly_quest_progress",
+        "achievement_unlocks",
+        "achievement_progress",
+        "xp_daily_buckets",
+        "xp_user_totals",
+    ]
+    
     try:
         with duckdb.connect(db_path) as conn:
-            print("🔥 NUCLEAR RESET: Destroying all XP tables...")
+            print("🔥 NUCLEAR RESET: Emptying all XP tables...")
             
-            # Nuclear option: Drop everything XP-related
-            tables_to_nuke = [
-                "xp_transactions",
-                "daily_challenge_completion", 
-                "weekly_quest_progress",
-                "achievement_unlocks",
-                "xp_system",  # In case there are variations
-                "gamification",
-                "challenges"
-            ]
-            
-            for table in tables_to_nuke:
-                try:
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                for table in tables_to_empty:
+                    deleted = conn.execute(f"DELETE FROM {table}").fetchone()[0]
+                    print(f"💥 Emptied {table} ({deleted} rows)")
+                
+                # Leftovers of older XP experiments that no migration owns
+                for table in ["xp_system", "gamification", "challenges"]:
                     conn.execute(f"DROP TABLE IF EXISTS {table}")
-                    print(f"💥 Nuked table: {table}")
-                except:
-                    pass  # Table might not exist
-            
-            print("🏗️ Creating new XP tables with correct structure...")
-            
-            # Create XP transactions table (SIMPLE VERSION)
-            conn.execute("""
-                CREATE TABLE xp_transactions (
-                    txn_id VARCHAR PRIMARY KEY,
-                    user_name VARCHAR NOT NULL,
-                    xp_points INTEGER NOT NULL,
-                    xp_source VARCHAR NOT NULL,
-                    xp_description TEXT,
-                    xp_reference VARCHAR,
-                    xp_multiplier REAL DEFAULT 1.0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Create challenge completion table (SIMPLE VERSION)
-            conn.execute("""
-                CREATE TABLE daily_challenge_completion (
-                    comp_id VARCHAR PRIMARY KEY,
-                    user_name VARCHAR NOT NULL,
-                    challenge_ref VARCHAR NOT NULL,
-                    challenge_category VARCHAR NOT NULL,
-                    points_earned INTEGER NOT NULL,
-                    completion_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
             
-            print("✅ New XP tables created successfully!")
+            print("✅ XP system reset!")
             return True
             
     except Exception as e:
         print(f"❌ Nuclear reset failed: {e}")
         return False
 
+@st.cache_resource
+def ensure_simple_xp_constraints(db_path):
+    """
+    Make sure migration 0012 has given the XP tables their idempotency indexes
+    (once per process). Without them INSERT OR IGNORE would award twice, so
+    the page stops instead of carrying on.
+    """
+    import duckdb
+    from schema_migrations import migrate
+    
+    try:
+        with duckdb.connect(db_path) as conn:
+            migrate(conn)
+        return True
+    except Exception as e:
+        st.error(f"❌ The XP tables could not be brought up to date, so XP can't be awarded safely: {e}")
+        st.stop()
+
 class SimpleXPEngine:
     """Ultra-simple XP engine that actually works"""
     
     def __init__(self):
         base_dir = os.path.dirname(os.path.dirname(__file__))
         self.db_path = os.path.join(base_dir, "data", "sovereignty.duckdb")
+        ensure_simple_xp_constraints(self.db_path)
+    
+    def _insert_xp(self, conn, username, xp_amount, source, description, reference_id):
+        """Insert XP; the (user_name, xp_reference) index turns repeats into a no-op"""
+        import uuid
+        from datetime import datetime
+        
+        txn_id = f"{username}_{source}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        inserted = conn.execute("""
+            INSERT OR IGNORE INTO xp_transactions 
+            (txn_id, user_name, xp_points, xp_source, xp_description, xp_reference)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [txn_id, username, int(xp_amount), source, description, reference_id]).fetchone()[0]
+        
+        if inserted:
+            # Keep the leaderboard buckets in step with the ledger
+            record_xp(conn, username, int(xp_amount))
+        return inserted
     
     def award_xp(self, username, xp_amount, source, description="", reference_id=None):
         """Award XP with simple structure"""
         try:
-            import uuid
             from datetime import datetime
             import duckdb
             
-            # Generate simple unique ID
-            txn_id = f"{username}_{source}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
-            
             if reference_id is None:
                 reference_id = f"{source}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
             
             with duckdb.connect(self.db_path) as conn:
-                # Check for duplicates
-                existing = conn.execute("""
-                    SELECT COUNT(*) FROM xp_transactions 
-                    WHERE user_name = ? AND xp_reference = ?
-                """, [username, reference_id]).fetchone()[0]
+                conn.execute("BEGIN TRANSACTION")
+                inserted = self._insert_xp(conn, username, xp_amount, source, description, reference_id)
+                conn.execute("COMMIT")
                 
-                if existing > 0:
+                if not inserted:
                     print(f"⚠️ XP already awarded for: {reference_id}")
                     return False
                 
-                # Insert XP
-                conn.execute("""
-                    INSERT INTO xp_transactions 
-                    (txn_id, user_name, xp_points, xp_source, xp_description, xp_reference)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, [txn_id, username, int(xp_amount), source, description, reference_id])
-                
                 print(f"✅ Awarded {xp_amount} XP to {username}")
                 return True
                 
@@ -389,49 +397,45 @@ class SimpleXPEngine:
             return False
     
     def complete_challenge(self, username, challenge_id, challenge_type, xp_reward):
-        """Complete challenge with simple structure"""
+        """Record the completion and its XP in one transaction (once per challenge per day)"""
         try:
             import uuid
             from datetime import datetime, date
             import duckdb
             
             comp_id = f"{username}_{challenge_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:4]}"
+            today = date.today()
             
             with duckdb.connect(self.db_path) as conn:
-                # Check if already completed today
-                today = date.today()
-                existing = conn.execute("""
-                    SELECT COUNT(*) FROM daily_challenge_completion 
-                    WHERE user_name = ? AND challenge_ref = ? AND DATE(completion_time) = ?
-                """, [username, challenge_id, today]).fetchone()[0]
-                
-                if existing > 0:
-                    print(f"⚠️ Challenge already completed: {challenge_id}")
-                    return False
-                
-                # Record completion
-                conn.execute("""
-                    INSERT INTO daily_challenge_completion 
-                    (comp_id, user_name, challenge_ref, challenge_category, points_earned)
-                    VALUES (?, ?, ?, ?, ?)
-                """, [comp_id, username, challenge_id, challenge_type, xp_reward])
-                
-                # Award XP
-                success = self.award_xp(
-                    username=username,
-                    xp_amount=xp_reward,
-                    source="daily_challenge",
-                    description=f"Challenge: {challenge_type}",
-                    reference_id=f"challenge_{challenge_id}_{today.strftime('%Y%m%d')}"
-                )
+                conn.execute("BEGIN TRANSACTION")
+                try:
+                    recorded = conn.execute("""
+                        INSERT OR IGNORE INTO daily_challenge_completion 
+                        (comp_id, user_name, challenge_ref, challenge_category, points_earned, completion_date)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, [comp_id, username, challenge_id, challenge_type, xp_reward, today]).fetchone()[0]
+                    
+                    if not recorded:
+                        conn.execute("ROLLBACK")
+                        print(f"⚠️ Challenge already completed: {challenge_id}")
+                        return False
+                    
+                    self._insert_xp(
+                        conn,
+                        username=username,
+                        xp_amount=round(xp_reward * event_multiplier(challenge_type, today)),
+                        source="daily_challenge",
+                        description=f"Challenge: {challenge_type}",
+                        reference_id=f"challenge_{challenge_id}_{today.strftime('%Y%m%d')}"
+                    )
+                    record_quest_progress(conn, username, {"source": "daily_challenge", "challenge_type": challenge_type})
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
                 
-                if success:
-                    print(f"✅ Challenge completed: {challenge_id} (+{xp_reward} XP)")
-                    return True
-                else:
-                    # Rollback
-                    conn.execute("DELETE FROM daily_challenge_completion WHERE comp_id = ?", [comp_id])
-                    return False
+                print(f"✅ Challenge completed: {challenge_id} (+{xp_reward} XP)")
+                return True
                 
         except Exception as e:
             print(f"❌ Error completing challenge: {e}")
@@ -492,7 +496,7 @@ class SimpleXPEngine:
                 result = conn.execute("""
                     SELECT challenge_ref, challenge_category, points_earned, completion_time
                     FROM daily_challenge_completion 
-                    WHERE user_name = ? AND DATE(completion_time) = ?
+                    WHERE user_name = ? AND completion_date = ?
                 """, [username, today]).fetchall()
                 
                 completed = [
@@ -544,9 +548,10 @@ def render_simple_challenges(username, path, current_streaks):
     
     simple_engine = SimpleXPEngine()
     
-    # Generate challenges
+    # Today's challenges: generated on the first load of the day, then one indexed read
     try:
-        daily_challenges = generate_daily_challenges(username, path, current_streaks)
+        with get_db_connection() as conn:
+            daily_challenges = get_daily_challenges(conn, username, path, current_streaks)
     except:
         # Fallback challenges
         daily_challenges = [
@@ -566,7 +571,7 @@ def render_simple_challenges(username, path, current_streaks):
     
     for i, challenge in enumerate(daily_challenges):
         with challenge_cols[i]:
-            challenge_id = f"{today_str}_{challenge['type']}_{i}"
+            challenge_id = challenge.get("challenge_id", f"{today_str}_{challenge['type']}_{i}")
             is_completed = challenge_id in completed_ids
             
             if is_completed:
@@ -602,250 +607,10 @@ def render_simple_challenges(username, path, current_streaks):
     if challenge_status["total_completed"] > 0:
         st.success(f"🏆 {challenge_status['total_completed']}/3 completed (+{challenge_status['total_xp_earned']} XP)")
 
-@st.cache_data(ttl=86400)  # Cache for 24 hours
-def generate_weekly_quest(username, path, week_start):
-    """Generate a weekly quest based on user's path"""
-    
-    weekly_quests = {
-        "financial_path": [
-            {"name": "💰 The Minimalist", "description": "Spend $0 on discretionary items for 5 days", "target": 5, "xp": 100, "type": "no_spending_days"},
-            {"name": "₿ The Accumulator", "description": "Stack sats 4 times this week", "target": 4, "xp": 120, "type": "bitcoin_days"},
-            {"name": "🍳 The Saver", "description": "Cook 15+ meals to maximize savings", "target": 15, "xp": 80, "type": "meals_cooked"},
-            {"name": "📚 The Student", "description": "Learn about finance/investing 5 days", "target": 5, "xp": 90, "type": "learning_days"}
-        ],
-        "physical_optimization": [
-            {"name": "💪 The Beast", "description": "Strength train 4+ times this week", "target": 4, "xp": 120, "type": "strength_days"},
-            {"name": "🍳 The Chef", "description": "Cook 20+ high-protein meals", "target": 20, "xp": 100, "type": "meals_cooked"},
-            {"name": "🏃 The Athlete", "description": "Exercise 6 days with 30+ minutes each", "target": 6, "xp": 110, "type": "exercise_days"},
-            {"name": "🚫 The Disciplined", "description": "Zero junk food for entire week", "target": 7, "xp": 90, "type": "clean_eating_days"}
-        ],
-        "mental_resilience": [
-            {"name": "🧘‍♂️ The Monk", "description": "Meditate every single day", "target": 7, "xp": 120, "type": "meditation_days"},
-            {"name": "📚 The Scholar", "description": "Learn something new 6 days", "target": 6, "xp": 100, "type": "learning_days"},
-            {"name": "🙏 The Grateful", "description": "Practice gratitude daily", "target": 7, "xp": 80, "type": "gratitude_days"},
-            {"name": "⚡ The Focused", "description": "Achieve 80+ score 4 times", "target": 4, "xp": 110, "type": "high_score_days"}
-        ],
-        "spiritual_growth": [
-            {"name": "🌅 The Mindful", "description": "Meditate and practice gratitude daily", "target": 7, "xp": 130, "type": "mindful_days"},
-            {"name": "🌍 The Steward", "description": "Environmental action 5 days", "target": 5, "xp": 100, "type": "environmental_days"},
-            {"name": "📝 The Reflective", "description": "Deep reflection/journaling 4 days", "target": 4, "xp": 90, "type": "reflection_days"},
-            {"name": "🍽️ The Conscious", "description": "Mindful eating all week", "target": 7, "xp": 80, "type": "mindful_eating_days"}
-        ],
-        "planetary_stewardship": [
-            {"name": "🌍 The Guardian", "description": "Environmental action every day", "target": 7, "xp": 130, "type": "environmental_days"},
-            {"name": "♻️ The Zero-Waster", "description": "Minimal waste 6 days", "target": 6, "xp": 110, "type": "zero_waste_days"},
-            {"name": "🥬 The Locavore", "description": "Local/organic food choices daily", "target": 7, "xp": 100, "type": "local_food_days"},
-            {"name": "🚲 The Green Commuter", "description": "Walk/bike 5 times instead of driving", "target": 5, "xp": 90, "type": "green_transport_days"}
-        ],
-        "default": [
-            {"name": "🎯 The Balanced", "description": "Score 70+ points for 5 days", "target": 5, "xp": 120, "type": "balanced_days"},
-            {"name": "🔥 The Consistent", "description": "Track everything 7 days straight", "target": 7, "xp": 100, "type": "tracking_days"},
-            {"name": "⭐ The Achiever", "description": "Complete 20+ daily activities", "target": 20, "xp": 90, "type": "activity_count"},
-            {"name": "🚀 The Improver", "description": "Beat your average score 4 times", "target": 4, "xp": 110, "type": "improvement_days"}
-        ]
-    }
-    
-    available_quests = weekly_quests.get(path, weekly_quests["default"])
-    import random
-    return random.choice(available_quests)
-
-@st.cache_data(ttl=300)
-def generate_daily_challenges(username, path, current_streaks):
-    """Generate 3 daily challenges based on user's path and current progress"""
-    
-    # Challenge pool by path
-    path_challenges = {
-        "financial_path": [
-            {"type": "no_spending", "description": "💰 No discretionary spending today", "xp": 25, "icon": "💰"},
-            {"type": "bitcoin_investment", "description": "₿ Stack some sats today", "xp": 30, "icon": "₿"},
-            {"type": "read_learn", "description": "📚 Learn something about money/investing", "xp": 20, "icon": "📚"},
-            {"type": "meal_prep", "description": "🍳 Cook 2+ meals to save money", "xp": 25, "icon": "🍳"},
-            {"type": "budget_review", "description": "📊 Track your expenses", "xp": 15, "icon": "📊"}
-        ],
-        "physical_optimization": [
-            {"type": "strength_training", "description": "💪 Complete strength training", "xp": 30, "icon": "💪"},
-            {"type": "protein_focus", "description": "🥩 Hit your protein target", "xp": 20, "icon": "🥩"},
-            {"type": "meal_prep", "description": "🍳 Cook 3+ high-protein meals", "xp": 25, "icon": "🍳"},
-            {"type": "no_junk", "description": "🚫 Zero junk food today", "xp": 20, "icon": "🚫"},
-            {"type": "exercise_plus", "description": "🏃 30+ minutes of exercise", "xp": 25, "icon": "🏃"}
-        ],
-        "mental_resilience": [
-            {"type": "meditation", "description": "🧘‍♂️ Complete meditation session", "xp": 25, "icon": "🧘‍♂️"},
-            {"type": "gratitude", "description": "🙏 Practice gratitude", "xp": 15, "icon": "🙏"},
-            {"type": "read_learn", "description": "📖 Read for 30+ minutes", "xp": 20, "icon": "📖"},
-            {"type": "digital_detox", "description": "📱 Limit screen time", "xp": 25, "icon": "📱"},
-            {"type": "nature_time", "description": "🌿 Spend time in nature", "xp": 20, "icon": "🌿"}
-        ],
-        "spiritual_growth": [
-            {"type": "meditation", "description": "🧘‍♂️ Deep meditation practice", "xp": 30, "icon": "🧘‍♂️"},
-            {"type": "gratitude", "description": "🙏 Heartfelt gratitude practice", "xp": 20, "icon": "🙏"},
-            {"type": "environmental", "description": "🌍 Take environmental action", "xp": 25, "icon": "🌍"},
-            {"type": "mindful_eating", "description": "🍽️ Eat mindfully without distractions", "xp": 20, "icon": "🍽️"},
-            {"type": "reflection", "description": "📝 Journal or reflect deeply", "xp": 25, "icon": "📝"}
-        ],
-        "planetary_stewardship": [
-            {"type": "environmental", "description": "🌍 Take environmental action", "xp": 30, "icon": "🌍"},
-            {"type": "zero_waste", "description": "♻️ Produce minimal waste", "xp": 25, "icon": "♻️"},
-            {"type": "local_food", "description": "🥬 Choose local/organic food", "xp": 20, "icon": "🥬"},
-            {"type": "walk_bike", "description": "🚲 Walk/bike instead of driving", "xp": 20, "icon": "🚲"},
-            {"type": "conservation", "description": "💧 Practice resource conservation", "xp": 15, "icon": "💧"}
-        ],
-        "default": [
-            {"type": "balanced_day", "description": "⚖️ Hit 70+ sovereignty score", "xp": 30, "icon": "⚖️"},
-            {"type": "triple_threat", "description": "🎯 Cook, exercise, and meditate", "xp": 35, "icon": "🎯"},
-            {"type": "consistency", "description": "📈 Log all activities", "xp": 20, "icon": "📈"},
-            {"type": "streak_building", "description": "🔥 Extend your longest streak", "xp": 25, "icon": "🔥"},
-            {"type": "new_habit", "description": "✨ Try something new", "xp": 15, "icon": "✨"}
-        ]
-    }
-    
-    # Get challenges for this path
-    available_challenges = path_challenges.get(path, path_challenges["default"])
-    
-    # Smart challenge selection based on weak areas
-    weak_streaks = [k for k, v in current_streaks.items() if v < 3]
-    priority_challenges = []
-    
-    # Add challenges that target weak areas
-    for challenge in available_challenges:
-        if any(weak in challenge["type"] for weak in weak_streaks):
-            priority_challenges.append(challenge)
-    
-    # Fill remaining slots with random challenges
-    import random
-    remaining_challenges = [c for c in available_challenges if c not in priority_challenges]
-    selected_challenges = priority_challenges[:2] + random.sample(remaining_challenges, min(2, len(remaining_challenges)))
-    
-    # Ensure we have exactly 3 challenges
-    while len(selected_challenges) < 3:
-        selected_challenges.append(random.choice(available_challenges))
-    
-    return selected_challenges[:3]
-
-@st.cache_data(ttl=86400)  # Cache for 24 hours
 def get_seasonal_event(current_date):
-    """Generate seasonal sovereignty events based on time of year"""
-    
-    import datetime
-    month = current_date.month
-    day = current_date.day
-    
-    # Define seasonal events throughout the year
-    seasonal_events = {
-        "winter_accumulation": {
-            "name": "❄️ Bitcoin Winter Accumulation",
-            "period": "December 21 - March 20", 
-            "theme": "Stack sats while others panic",
-            "description": "When the markets are cold, true sovereigns accumulate. Double XP for Bitcoin investments during crypto winter.",
-            "bonus": "2x XP for Bitcoin stacking",
-            "color": "#3b82f6",
-            "active_months": [12, 1, 2, 3],
-            "challenges": [
-                "Stack sats 5 days this week",
-                "Read 3 Bitcoin articles", 
-                "No FOMO buying - only DCA",
-                "Calculate your stack growth"
-            ]
-        },
-        "spring_renewal": {
-            "name": "🌱 Spring Sovereignty Renewal", 
-            "period": "March 21 - June 20",
-            "theme": "Grow your body and mind",
-            "description": "As nature awakens, so does your sovereignty. Focus on health, learning, and fresh habits.",
-            "bonus": "2x XP for new habit streaks",
-            "color": "#10b981", 
-            "active_months": [3, 4, 5, 6],
-            "challenges": [
-                "Start 2 new healthy habits",
-                "Cook with fresh spring ingredients",
-                "Meditate outdoors daily",
-                "Learn a new skill"
-            ]
-        },
-        "summer_abundance": {
-            "name": "☀️ Summer Abundance Festival",
-            "period": "June 21 - September 20", 
-            "theme": "Peak performance and energy",
-            "description": "Harness summer's energy for maximum sovereignty gains. Focus on peak physical and mental performance.",
-            "bonus": "2x XP for exercise and strength training",
-            "color": "#f59e0b",
-            "active_months": [6, 7, 8, 9],
-            "challenges": [
-                "Hit the gym 5x this week",
-                "Meal prep like a champion", 
-                "Morning sun exposure daily",
-                "Achieve 3 personal records"
-            ]
-        },
-        "autumn_harvest": {
-            "name": "🍂 Autumn Sovereignty Harvest",
-            "period": "September 21 - December 20",
-            "theme": "Reap what you've sown", 
-            "description": "Time to harvest the sovereignty you've built all year. Reflection, gratitude, and preparation.",
-            "bonus": "2x XP for gratitude and reflection",
-            "color": "#ea580c",
-            "active_months": [9, 10, 11, 12],
-            "challenges": [
-                "Daily gratitude practice",
-                "Review your year's progress",
-                "Prepare for winter abundance",
-                "Share sovereignty wisdom"
-            ]
-        }
-    }
-    
-    # Special limited-time events
-    special_events = {
-        "new_year_sovereign": {
-            "name": "🎆 New Year Sovereignty Revolution",
-            "period": "January 1-31",
-            "active_dates": [(1, 1, 31)],  # month, start_day, end_day
-            "theme": "Start the year sovereign",
-            "description": "New year, new sovereignty. 31 days to build the foundation for your most sovereign year yet.",
-            "bonus": "Triple XP for starting new streaks",
-            "color": "#8b5cf6"
-        },
-        "bitcoin_birthday": {
-            "name": "₿ Bitcoin Birthday Celebration", 
-            "period": "January 3-9",
-            "active_dates": [(1, 3, 9)],
-            "theme": "Genesis block anniversary",
-            "description": "Celebrating the birth of sound money. Stack sats in honor of Satoshi's gift to humanity.",
-            "bonus": "3x XP for Bitcoin activities",
-            "color": "#f59e0b"
-        },
-        "summer_solstice": {
-            "name": "🌞 Peak Sovereignty Solstice",
-            "period": "June 21-27", 
-            "active_dates": [(6, 21, 27)],
-            "theme": "Longest day, strongest sovereign",
-            "description": "Harness the year's peak energy for your sovereignty journey. Seven days of maximum effort.",
-            "bonus": "2x XP for all activities",
-            "color": "#fbbf24"
-        },
-        "thanksgiving_gratitude": {
-            "name": "🦃 Sovereignty Gratitude Week",
-            "period": "November 20-26",
-            "active_dates": [(11, 20, 26)],
-            "theme": "Grateful for freedom earned",
-            "description": "A week to reflect on the sovereignty you've built and express gratitude for your journey.",
-            "bonus": "3x XP for gratitude practice",
-            "color": "#ea580c"
-        }
-    }
-    
-    # Check for special events first
-    for event_id, event in special_events.items():
-        for start_month, start_day, end_day in event.get("active_dates", []):
-            if month == start_month and start_day <= day <= end_day:
-                return {"type": "special", "id": event_id, **event}
-    
-    # Check for seasonal events
-    for event_id, event in seasonal_events.items():
-        if month in event["active_months"]:
-            return {"type": "seasonal", "id": event_id, **event}
-    
-    return None
+    """Featured seasonal or special event for the date (see event_calendar.py)"""
+    day = current_date.date() if isinstance(current_date, datetime) else current_date
+    return CALENDAR.primary_event(day)
 
 @st.cache_data(ttl=86400)
 def get_seasonal_challenges(event_data):
@@ -854,34 +619,7 @@ def get_seasonal_challenges(event_data):
         return []
     
     base_challenges = event_data.get("challenges", [])
-    
-    # Add event-specific bonus challenges
-    if event_data["id"] == "winter_accumulation":
-        bonus_challenges = [
-            "Read about Bitcoin cold storage",
-            "Calculate your DCA strategy", 
-            "Ignore crypto news FUD"
-        ]
-    elif event_data["id"] == "spring_renewal":
-        bonus_challenges = [
-            "Try a new superfood",
-            "Meditate in nature",
-            "Start a learning project"
-        ]
-    elif event_data["id"] == "summer_abundance": 
-        bonus_challenges = [
-            "Morning workout in the sun",
-            "Grill healthy proteins",
-            "Take a cold shower"
-        ]
-    elif event_data["id"] == "autumn_harvest":
-        bonus_challenges = [
-            "Journal about growth this year",
-            "Practice deep gratitude",
-            "Prep for upcoming challenges"
-        ]
-    else:
-        bonus_challenges = []
+    bonus_challenges = event_data.get("bonus_challenges", [])
     
     # Combine and return up to 3 challenges
     all_challenges = base_challenges + bonus_challenges
@@ -920,10 +658,13 @@ render_xp_display_enhanced_safe(gamification_data)
 # Row 2: Daily Challenges & Weekly Quest
 st.markdown("---")
 current_streaks = progress_metrics.get("current_streaks", {})
-from datetime import datetime, timedelta
-today = datetime.now()
-week_start = today - timedelta(days=today.weekday())
-weekly_quest = generate_weekly_quest(username, path, week_start.strftime("%Y-%m-%d"))
+# This week's quest with its live progress: one indexed read (see weekly_quests.py)
+try:
+    with get_db_connection() as conn:
+        weekly_quest = get_weekly_quest(conn, username, path)
+except Exception as e:
+    print(f"❌ Error loading weekly quest: {e}")
+    weekly_quest = {**select_quest(username, path, week_start()), "progress": 0, "completed": False}
 
 col1, col2 = st.columns([3, 2])
 
@@ -933,13 +674,16 @@ with col1:
 
 with col2:
     st.markdown("### 🏆 Weekly Quest")
-    quest_progress = 2  # Mock data
+    quest_progress = weekly_quest["progress"]
     quest_target = weekly_quest["target"]
     quest_progress_pct = min(100, (quest_progress / quest_target) * 100)
     
     st.markdown(f"**{weekly_quest['name']}**")
     st.markdown(f"<small>{weekly_quest['description']}</small>", unsafe_allow_html=True)
-    st.markdown(f"**Reward: {weekly_quest['xp']} XP**")
+    if weekly_quest["completed"]:
+        st.success(f"🏆 Quest complete! +{weekly_quest['xp']} XP")
+    else:
+        st.markdown(f"**Reward: {weekly_quest['xp']} XP**")
     
     # Progress bar
     st.markdown(f"""
@@ -1402,9 +1146,11 @@ with action_col3:
 
 with action_col4:
     if st.button("🚪 Logout", use_container_width=True):
+        revoke_token(st.session_state.get("session_token"))
+        st.query_params.clear()
         for key in list(st.session_state.keys()):
             del st.session_state[key]
-        st.success("👋 Logged out!")
+        st.rerun()
 
 # ═══════════════════════════════════════════════════════════════════
 # SEASONAL EVENT (Moved to bottom as requested)
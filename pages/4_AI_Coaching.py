@@ -2,9 +2,7 @@ import streamlit as st
 import os
 import time
 import sys
-from openai import OpenAI
 from dotenv import load_dotenv
-import pandas as pd
 import json
 from io import BytesIO
 from datetime import datetime, timedelta
@@ -15,14 +13,19 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from db import get_db_connection
-from sovereignty_achievements import SovereigntyAchievementEngine
+from session_tokens import resolve_session
+from lazy_imports import lazy_import, lazy_object
+
+# Heavy libraries load on first use (see lazy_imports.py)
+pd = lazy_import("pandas")
+openai = lazy_import("openai")
 
 # Setup
 st.set_page_config(page_title="AI Coaching", page_icon="🧠", layout="wide")
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 COACHING_ASSISTANT_ID = "asst_I7akt1W4Je7c5U3cN1guiefc"
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = lazy_object(lambda: openai.OpenAI(api_key=OPENAI_API_KEY))
 
 # Enhanced CSS for coaching interface
 st.markdown("""
@@ -83,8 +86,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Get user info
-username = st.session_state.get("username", None)
-path = st.session_state.get("path", None)
+username, path = resolve_session(st.query_params, st.session_state)
 
 if not username or not path:
     st.error("Please log in through the main page to access AI Coaching.")
@@ -106,6 +108,7 @@ def load_comprehensive_user_data(username):
     """Load all user data for enhanced AI coaching"""
     try:
         # Get achievement data
+        from sovereignty_achievements import SovereigntyAchievementEngine
         engine = SovereigntyAchievementEngine()
         achievements_data = engine.calculate_user_achievements(username)
         
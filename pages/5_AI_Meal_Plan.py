@@ -7,13 +7,10 @@ Now includes comprehensive sovereignty profile sidebar matching the AI Coaching
 import streamlit as st
 import os
 import sys
-from openai import OpenAI
 from dotenv import load_dotenv
 import time
 import json
-import pandas as pd
 from datetime import datetime, timedelta
-from io import BytesIO
 
 # Setup paths for imports
 project_root = os.path.dirname(os.path.dirname(__file__))
@@ -25,7 +22,12 @@ if private_path not in sys.path:
     sys.path.insert(0, private_path)
 
 from db import get_db_connection
-from sovereignty_achievements import SovereigntyAchievementEngine
+from session_tokens import resolve_session
+from lazy_imports import lazy_import
+from meal_plan_exports import ARTIFACTS, FORMATS, available_formats, get_plan_exports
+
+# Heavy libraries load on first use (see lazy_imports.py)
+openai = lazy_import("openai")
 
 # Page config
 st.set_page_config(page_title="AI Meal Planning", page_icon="🍽️", layout="wide")
@@ -132,7 +134,7 @@ class AdvancedMealPlanningAgent:
     """
     
     def __init__(self, openai_api_key):
-        self.client = OpenAI(api_key=openai_api_key)
+        self.client = openai.OpenAI(api_key=openai_api_key)
         self.assistant_id = self._create_meal_planning_assistant()
         
     def _create_meal_planning_assistant(self):
@@ -389,8 +391,7 @@ Adjust the complexity, language, and philosophical depth to match their developm
 
 def main():
     # Get user info
-    username = st.session_state.get("username", None)
-    path = st.session_state.get("path", None)
+    username, path = resolve_session(st.query_params, st.session_state)
 
     if not username or not path:
         st.error("🚨 Please log in through the main page to access AI Meal Planning.")
@@ -401,6 +402,7 @@ def main():
     def load_comprehensive_user_data(username):
         """Load all user data for enhanced meal planning sidebar"""
         try:
+            from sovereignty_achievements import SovereigntyAchievementEngine
             engine = SovereigntyAchievementEngine()
             achievements_data = engine.calculate_user_achievements(username)
             
@@ -1019,96 +1021,33 @@ def display_meal_plan(meal_plan, preferences, consciousness_level):
         </div>
         """, unsafe_allow_html=True)
     
-    # Download options with consciousness level in filename
+    # Exports are built only when asked for and cached per plan (see meal_plan_exports.py)
     st.markdown("### 📥 Export Options")
     
-    # Create download data first
-    shopping_data = meal_plan.get("shopping_list", {})
-    meal_data = []
-    if "weekly_meals" in meal_plan:
-        for meal_type, meals in meal_plan["weekly_meals"].items():
-            for meal in meals:
-                meal_data.append({
-                    "Type": meal_type.title(),
-                    "Name": meal.get("name", ""),
-                    "Prep Time": meal.get("prep_time", ""),
-                    "Benefits": meal.get("sovereignty_benefits", "")
-                })
-    
-    # Enhanced download functions with consciousness level
-    def create_shopping_download():
-        df_shopping = pd.DataFrame([(k, str(v)) for k, v in shopping_data.items()], 
-                                 columns=["Category", "Items"])
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-            df_shopping.to_excel(writer, index=False, sheet_name="Shopping List")
-        buffer.seek(0)
-        return buffer.getvalue()
-    
-    def create_meal_download():
-        df_meals = pd.DataFrame(meal_data)
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-            df_meals.to_excel(writer, index=False, sheet_name="Meal Plan")
-        buffer.seek(0)
-        return buffer.getvalue()
-    
-    def create_full_download():
-        plan_summary = {
-            "Plan Overview": meal_plan.get("meal_plan", {}).get("overview", ""),
-            "Consciousness Level": consciousness_level,
-            "Sovereignty Alignment": meal_plan.get("meal_plan", {}).get("sovereignty_alignment", ""),
-            "Daily Calories": meal_plan.get("nutrition_analysis", {}).get("daily_macros", {}).get("calories", ""),
-            "Estimated Cost": meal_plan.get("shopping_list", {}).get("estimated_weekly_cost", ""),
-            "Prep Time": meal_plan.get("meal_prep_strategy", {}).get("time_investment", "")
-        }
-        
-        df_summary = pd.DataFrame(list(plan_summary.items()), columns=["Aspect", "Details"])
-        df_meals = pd.DataFrame(meal_data)
-        
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-            df_summary.to_excel(writer, index=False, sheet_name="Plan Summary")
-            if not df_meals.empty:
-                df_meals.to_excel(writer, index=False, sheet_name="Meals")
-            
-            # Add shopping list sheet
-            if shopping_data:
-                df_shopping = pd.DataFrame([(k, str(v)) for k, v in shopping_data.items()], 
-                                         columns=["Category", "Items"])
-                df_shopping.to_excel(writer, index=False, sheet_name="Shopping List")
-        
-        buffer.seek(0)
-        return buffer.getvalue()
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.download_button(
-            label="📋 Download Shopping List",
-            data=create_shopping_download(),
-            file_name=f"sovereignty_shopping_{consciousness_level.lower()}_{datetime.now().strftime('%Y%m%d')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            use_container_width=True
-        )
-    
-    with col2:
-        st.download_button(
-            label="🍽️ Download Meal Plan", 
-            data=create_meal_download(),
-            file_name=f"sovereignty_meals_{consciousness_level.lower()}_{datetime.now().strftime('%Y%m%d')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            use_container_width=True
-        )
+    exports = get_plan_exports(meal_plan, consciousness_level)
+    export_format = st.radio(
+        "Format", available_formats(), format_func=lambda fmt: FORMATS[fmt][0],
+        horizontal=True, key="meal_export_format"
+    )
+    prepared = st.session_state.setdefault("prepared_meal_exports", set())
     
-    with col3:
-        st.download_button(
-            label="📊 Download Full Plan",
-            data=create_full_download(),
-            file_name=f"complete_sovereignty_plan_{consciousness_level.lower()}_{datetime.now().strftime('%Y%m%d')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            use_container_width=True
-        )
+    for column, (artifact, (icon, label, _, _)) in zip(st.columns(3), ARTIFACTS.items()):
+        with column:
+            export_key = (exports.plan_hash, artifact, export_format)
+            if export_key not in prepared and st.button(
+                f"Prepare {icon} {label}", key=f"prepare_{artifact}", use_container_width=True
+            ):
+                prepared.add(export_key)
+            if export_key in prepared:
+                data, file_name, mime = exports.render(artifact, export_format)
+                st.download_button(
+                    label=f"📥 Download {label}",
+                    data=data,
+                    file_name=file_name,
+                    mime=mime,
+                    key=f"download_{artifact}",
+                    use_container_width=True
+                )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,6 +1,5 @@
 # pages/6_Family_Emergency.py
 import streamlit as st
-import pandas as pd
 import json
 import sys
 import os
@@ -10,10 +9,14 @@ from datetime import datetime, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db import get_db_connection
+from session_tokens import resolve_session
+from lazy_imports import lazy_import
+
+# Heavy libraries load on first use (see lazy_imports.py)
+pd = lazy_import("pandas")
 
 # Get username and path from query params or session state
-username = st.query_params.get("username", None) or st.session_state.get("username", None)
-path = st.query_params.get("path", None) or st.session_state.get("path", None)
+username, path = resolve_session(st.query_params, st.session_state)
 
 if not username or not path:
     st.error("❌ Please log in through the main dashboard first")
@@ -5,7 +5,6 @@ Integrates database storage with existing emergency dashboard
 """
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 import sys
 import os
@@ -14,6 +13,11 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db import get_db_connection
+from session_tokens import resolve_session
+from lazy_imports import lazy_import
+
+# Heavy libraries load on first use (see lazy_imports.py)
+pd = lazy_import("pandas")
 from family_finance_database import FamilyFinanceDB
 from family_finance_forms import (
     render_financial_setup_wizard,
@@ -26,8 +30,7 @@ from improved_emergency_features import (
 )
 
 # Get user context
-username = st.query_params.get("username", None) or st.session_state.get("username", None)
-path = st.query_params.get("path", None) or st.session_state.get("path", None)
+username, path = resolve_session(st.query_params, st.session_state)
 
 if not username or not path:
     st.error("❌ Please log in through the main dashboard first")
@@ -0,0 +1,152 @@
+# password_policy.py
+"""
+Password hash policy
+Picks the bcrypt cost for this host by timing a hash and choosing the highest
+cost whose verify time stays within TARGET_VERIFY_MS. Each +1 of cost doubles
+the work, so one measurement is enough to extrapolate. The first process to
+benchmark stores its pick in app_settings (migration 0014) and every other
+process reads it from there, so Gunicorn workers can't disagree and rehash
+each other's hashes back and forth.
+
+Logins whose stored hash uses a different cost are transparently rehashed,
+and users.hash_algo / hash_cost / hash_updated_at (added by migration 0002)
+record what each account is currently stored with.
+
+    python password_policy.py                # show the policy cost
+    python password_policy.py --rebenchmark  # re-time this host and store the new cost
+"""
+
+import os
+import re
+import time
+import logging
+import argparse
+import threading
+
+import bcrypt
+
+from db import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+HASH_ALGO = "bcrypt"
+TARGET_VERIFY_MS = float(os.environ.get("BCRYPT_TARGET_MS", 250))
+MIN_COST = 10
+MAX_COST = 15
+BENCHMARK_COST = 10
+BENCHMARK_ROUNDS = 3
+COST_SETTING = "bcrypt_cost"  # app_settings key
+
+_BCRYPT_COST = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+_policy_cost = None
+_policy_lock = threading.Lock()
+
+def benchmark_cost(target_ms=TARGET_VERIFY_MS):
+    """Highest cost in [MIN_COST, MAX_COST] whose hash time fits target_ms on this host"""
+    salt = bcrypt.gensalt(rounds=BENCHMARK_COST)
+    timings = []
+    for _ in range(BENCHMARK_ROUNDS):
+        started = time.perf_counter()
+        bcrypt.hashpw(b"benchmark-password", salt)
+        timings.append((time.perf_counter() - started) * 1000)
+    base_ms = min(timings)
+
+    cost = BENCHMARK_COST
+    while cost < MAX_COST and base_ms * 2 ** (cost + 1 - BENCHMARK_COST) <= target_ms:
+        cost += 1
+    while cost > MIN_COST and base_ms * 2 ** (cost - BENCHMARK_COST) > target_ms:
+        cost -= 1
+
+    logger.info(f"⏱️ bcrypt cost {BENCHMARK_COST} takes {base_ms:.1f}ms here; "
+                f"using cost {cost} for a {target_ms:.0f}ms target")
+    return cost
+
+def _read_cost(conn):
+    row = conn.execute("SELECT value FROM app_settings WHERE key = ?", [COST_SETTING]).fetchone()
+    return int(row[0]) if row else None
+
+def store_cost(conn, cost, replace=False):
+    """Persist the policy cost; unless `replace`, a cost another process stored first wins. Returns the stored cost"""
+    conn.execute(f"""
+        INSERT INTO app_settings (key, value) VALUES (?, ?)
+        ON CONFLICT (key) DO {"UPDATE SET value = excluded.value, updated_at = now()" if replace else "NOTHING"}
+    """, [COST_SETTING, str(cost)])
+    return _read_cost(conn)
+
+def _shared_cost():
+    """Cost from app_settings, benchmarking and storing it when no process has yet"""
+    with get_db_connection() as conn:
+        cost = _read_cost(conn)
+    if cost is not None:
+        return cost
+    cost = benchmark_cost()  # Outside the connection: the database stays free while we time
+    with get_db_connection() as conn:
+        return store_cost(conn, cost)
+
+def current_cost():
+    """
+    Policy cost shared by every process (BCRYPT_COST pins it, otherwise
+    app_settings), read once per process
+    """
+    global _policy_cost
+    if _policy_cost is None:
+        with _policy_lock:
+            if _policy_cost is None:
+                pinned = os.environ.get("BCRYPT_COST")
+                if pinned:
+                    _policy_cost = int(pinned)
+                else:
+                    try:
+                        _policy_cost = _shared_cost()
+                    except Exception as e:
+                        # Not persisted, so this process may disagree with the others until it can be
+                        logger.warning(f"⚠️ Could not read the stored bcrypt cost ({e}); benchmarking locally")
+                        return benchmark_cost()
+    return _policy_cost
+
+def hash_cost(hashed_pw):
+    """Cost factor encoded in a bcrypt hash, or None if it isn't one"""
+    match = _BCRYPT_COST.match(hashed_pw or "")
+    return int(match.group(1)) if match else None
+
+def needs_rehash(hashed_pw):
+    """True when the stored hash doesn't use the current policy cost"""
+    return hash_cost(hashed_pw) != current_cost()
+
+def hash_password(password, cost=None):
+    """bcrypt hash at the policy cost (runs inline; see password_pool for request paths)"""
+    rounds = cost or current_cost()
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+def backfill_hash_params(conn):
+    """Fill hash_algo / hash_cost from the stored hash for rows written without them"""
+    conn.execute(f"""
+        UPDATE users
+        SET hash_algo = '{HASH_ALGO}',
+            hash_cost = TRY_CAST(regexp_extract(password, '^\\$2[abxy]?\\$(\\d{{2}})\\$', 1) AS INTEGER)
+        WHERE hash_cost IS NULL
+    """)
+
+def store_password_hash(conn, username, hashed_pw):
+    """Save a new hash together with its parameters"""
+    conn.execute("""
+        UPDATE users
+        SET password = ?, hash_algo = ?, hash_cost = ?, hash_updated_at = CURRENT_TIMESTAMP
+        WHERE username = ?
+    """, [hashed_pw, HASH_ALGO, hash_cost(hashed_pw), username])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or re-pick the bcrypt cost policy")
+    parser.add_argument("--rebenchmark", action="store_true",
+                        help="Time this host again and store the result (workers pick it up on restart)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with get_db_connection() as conn:
+        if args.rebenchmark:
+            print(f"✅ Stored bcrypt cost {store_cost(conn, benchmark_cost(), replace=True)}")
+        else:
+            stored = _read_cost(conn)
+            print(f"🔐 bcrypt cost: {stored if stored is not None else 'not chosen yet'}"
+                  + (f" (BCRYPT_COST={os.environ['BCRYPT_COST']} overrides it)" if os.environ.get("BCRYPT_COST") else ""))
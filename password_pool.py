@@ -0,0 +1,142 @@
+# password_pool.py
+"""
+Password hashing pool for the auth services
+bcrypt is deliberately slow, so checking it on the request thread lets a burst
+of logins stall every other request. Hashing and verification run in a small
+process pool instead. Once MAX_PENDING jobs are queued or running, new callers
+get PoolBusy straight away and the route answers 503 rather than piling up.
+
+The pool is created lazily per process, so it is safe under a pre-forking
+server such as `gunicorn -w 4 -b 0.0.0.0:5002 login:app`. Each worker then has
+its own pool and its own metrics.
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+from password_policy import current_cost
+
+logger = logging.getLogger(__name__)
+
+POOL_WORKERS = int(os.environ.get("AUTH_POOL_WORKERS", min(4, os.cpu_count() or 1)))
+MAX_PENDING = int(os.environ.get("AUTH_POOL_MAX_PENDING", POOL_WORKERS * 8))
+JOB_TIMEOUT_SECONDS = float(os.environ.get("AUTH_POOL_TIMEOUT", 10))
+METRICS_WINDOW_SECONDS = 60
+
+class PoolBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503"""
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+def _check_password(password, hashed_pw):
+    return bcrypt.checkpw(password.encode("utf-8"), hashed_pw.encode("utf-8"))
+
+class AuthMetrics:
+    """Rolling login latency and throughput over the last METRICS_WINDOW_SECONDS"""
+
+    def __init__(self, window_seconds=METRICS_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._samples = deque()  # (finished_at, latency_seconds)
+        self._lock = threading.Lock()
+        self.total = 0
+        self.rejected = 0
+
+    def _trim(self, now):
+        while self._samples and self._samples[0][0] < now - self.window_seconds:
+            self._samples.popleft()
+
+    def observe(self, latency):
+        now = time.monotonic()
+        with self._lock:
+            self.total += 1
+            self._samples.append((now, latency))
+            self._trim(now)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            latencies = sorted(latency for _, latency in self._samples)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+            return round(latencies[index] * 1000, 1)
+
+        return {
+            "window_seconds": self.window_seconds,
+            "logins_in_window": len(latencies),
+            "throughput_per_second": round(len(latencies) / self.window_seconds, 3),
+            "p50_ms": percentile(50),
+            "p99_ms": percentile(99),
+            "total_logins": self.total,
+            "rejected": self.rejected,
+        }
+
+class PasswordPool:
+    """Bounded process pool for bcrypt work"""
+
+    def __init__(self, workers=POOL_WORKERS, max_pending=MAX_PENDING, timeout=JOB_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.metrics = AuthMetrics()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # A pool inherited through fork() has no live workers, so rebuild per pid
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+                logger.info(f"🔐 Password pool started with {self.workers} workers (pid {self._pid})")
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.metrics.reject()
+            raise PoolBusy(f"{self.max_pending} password jobs already pending")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # Freed when the job actually finishes: a timed-out job still occupies a worker
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise PoolBusy(f"password job exceeded {self.timeout}s")
+
+    def hash_password(self, password):
+        """bcrypt hash of `password` at the policy cost, as a str"""
+        return self._run(_hash_password, password, current_cost())
+
+    def check_password(self, password, hashed_pw):
+        """True when `password` matches the stored bcrypt hash"""
+        return self._run(_check_password, password, hashed_pw)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_pool = PasswordPool()
+atexit.register(password_pool.shutdown)
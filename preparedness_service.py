@@ -0,0 +1,130 @@
+# preparedness_service.py
+"""
+Preparedness scoring service for the emergency pages
+Computes habit consistency and the weighted preparedness scores in a single
+DuckDB query and caches the result per (username, date, window). Inputs only
+change when the user's sovereignty rows do: writers call
+invalidate_preparedness(), and each cached row also records the newest entry
+timestamp it was computed from, so a row that predates the user's latest
+entry is recomputed even if a writer missed the invalidation. The cache table
+is created by migration 0013.
+"""
+
+import logging
+from datetime import date
+from typing import Dict, Optional
+
+from db import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 30  # Most recent entries used for consistency
+
+# Rate name -> SQL expression that is 1 when the habit was done that day
+HABIT_RATE_SQL = {
+    "meditation": "CASE WHEN meditation THEN 1 ELSE 0 END",
+    "gratitude": "CASE WHEN gratitude THEN 1 ELSE 0 END",
+    "learning": "CASE WHEN read_or_learned THEN 1 ELSE 0 END",
+    "environmental": "CASE WHEN environmental_action THEN 1 ELSE 0 END",
+    "fitness": "CASE WHEN exercise_minutes > 0 THEN 1 ELSE 0 END",
+    "strength": "CASE WHEN strength_training THEN 1 ELSE 0 END",
+    "nutrition": "CASE WHEN junk_food THEN 0 ELSE 1 END",
+    "no_spending": "CASE WHEN no_spending THEN 1 ELSE 0 END",
+    "invested_bitcoin": "CASE WHEN invested_bitcoin THEN 1 ELSE 0 END",
+}
+
+# Habits averaged into the emergency calculator's overall consistency
+PREPAREDNESS_HABITS = ["meditation", "gratitude", "learning", "environmental",
+                       "fitness", "strength", "nutrition"]
+
+# Habits averaged into the family plan's sovereignty foundation
+FOUNDATION_HABITS = ["meditation", "gratitude", "learning", "no_spending", "invested_bitcoin"]
+
+def _mean_sql(habits):
+    return "(" + " + ".join(habits) + f") / {len(habits)}.0"
+
+CONSISTENCY_QUERY = f"""
+    WITH recent AS (
+        SELECT * FROM sovereignty
+        WHERE username = ?
+        ORDER BY timestamp DESC
+        LIMIT ?
+    ), rates AS (
+        SELECT
+            COUNT(*) AS entries,
+            {", ".join(f"AVG({expr}) AS {name}" for name, expr in HABIT_RATE_SQL.items())}
+        FROM recent
+    )
+    SELECT
+        entries,
+        {", ".join(HABIT_RATE_SQL)},
+        {_mean_sql(PREPAREDNESS_HABITS)} AS overall_consistency,
+        {_mean_sql(FOUNDATION_HABITS)} AS sovereignty_foundation
+    FROM rates
+    WHERE entries > 0
+"""
+
+def _row_to_result(row, score_date, cached):
+    names = list(HABIT_RATE_SQL)
+    return {
+        "score_date": score_date,
+        "entries": row[0],
+        "rates": dict(zip(names, row[1:1 + len(names)])),
+        "overall_consistency": row[1 + len(names)],
+        "sovereignty_foundation": row[2 + len(names)],
+        "cached": cached,
+    }
+
+def _get_habit_consistency(conn, username, window, score_date):
+    latest_entry = conn.execute(
+        "SELECT MAX(timestamp) FROM sovereignty WHERE username = ?", [username]
+    ).fetchone()[0]
+    cached = conn.execute(f"""
+        SELECT entries, {", ".join(HABIT_RATE_SQL)}, overall_consistency, sovereignty_foundation
+        FROM preparedness_scores
+        WHERE username = ? AND score_date = ? AND window_entries = ?
+          AND latest_entry IS NOT DISTINCT FROM ?
+    """, [username, score_date, window, latest_entry]).fetchone()
+    if cached:
+        return _row_to_result(cached, score_date, cached=True)
+
+    row = conn.execute(CONSISTENCY_QUERY, [username, window]).fetchone()
+    if not row:
+        return None
+
+    conn.execute(f"""
+        INSERT OR REPLACE INTO preparedness_scores (
+            username, score_date, window_entries, latest_entry, entries,
+            {", ".join(HABIT_RATE_SQL)}, overall_consistency, sovereignty_foundation
+        ) VALUES ({", ".join(["?"] * (len(HABIT_RATE_SQL) + 7))})
+    """, [username, score_date, window, latest_entry, *row])
+    logger.info(f"Computed preparedness scores for {username} on {score_date}")
+    return _row_to_result(row, score_date, cached=False)
+
+def get_habit_consistency(username: str, window: int = DEFAULT_WINDOW,
+                          conn=None, score_date: Optional[date] = None) -> Optional[Dict]:
+    """
+    Get habit consistency rates and weighted scores for the user's last
+    `window` entries, served from preparedness_scores when already computed
+    today from the same entries.
+    Returns None when the user has no sovereignty entries.
+    """
+    score_date = score_date or date.today()
+    if conn is not None:
+        return _get_habit_consistency(conn, username, window, score_date)
+    with get_db_connection() as conn:
+        return _get_habit_consistency(conn, username, window, score_date)
+
+def _invalidate_preparedness(conn, username, since):
+    conn.execute("""
+        DELETE FROM preparedness_scores
+        WHERE username = ? AND score_date >= ?
+    """, [username, since])
+
+def invalidate_preparedness(username: str, conn=None, since: Optional[date] = None):
+    """Drop cached scores for the user from `since` (default today) onwards"""
+    since = since or date.today()
+    if conn is not None:
+        return _invalidate_preparedness(conn, username, since)
+    with get_db_connection() as conn:
+        return _invalidate_preparedness(conn, username, since)
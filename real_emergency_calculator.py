@@ -5,6 +5,8 @@ import streamlit as st
 from datetime import datetime, timedelta
 import statistics
 from db import get_db_connection
+from habit_window import HabitWindow
+from preparedness_service import get_habit_consistency, PREPAREDNESS_HABITS
 
 def calculate_real_emergency_metrics(username, path):
     """
@@ -13,29 +15,26 @@ def calculate_real_emergency_metrics(username, path):
     """
     try:
         with get_db_connection() as conn:
-            # Get comprehensive sovereignty data
-            user_data = conn.execute("""
-                SELECT timestamp, score, btc_usd, btc_sats, home_cooked_meals,
-                       no_spending, invested_bitcoin, meditation, gratitude,
-                       read_or_learned, environmental_action, exercise_minutes,
-                       strength_training, junk_food
-                FROM sovereignty 
-                WHERE username = ? 
-                ORDER BY timestamp DESC 
-                LIMIT 180  -- 6 months of data
-            """, [username]).fetchall()
+            # Load the last 6 months of sovereignty data as named columns
+            window = HabitWindow.load(conn, username, limit=180)
             
-            if not user_data:
+            if not len(window):
                 return {"error": "No sovereignty data found. Track some habits first!"}
             
+            # One vectorized pass over the window feeds the financial metrics
+            summary = window.summary()
+            
+            # Habit consistency is computed in SQL and cached per user-day
+            consistency = get_habit_consistency(username, window=30, conn=conn)
+            
             # Calculate real financial metrics
-            financial_metrics = calculate_real_financial_position(user_data)
+            financial_metrics = calculate_real_financial_position(summary)
             
             # Calculate real expense patterns
-            expense_metrics = calculate_real_expense_patterns(user_data, path)
+            expense_metrics = calculate_real_expense_patterns(summary, path)
             
             # Calculate emergency preparedness from sovereignty habits
-            preparedness_metrics = calculate_real_preparedness_score(user_data, path)
+            preparedness_metrics = calculate_real_preparedness_score(consistency, path)
             
             # Calculate real account access estimates
             account_estimates = calculate_real_account_estimates(financial_metrics, expense_metrics)
@@ -52,19 +51,19 @@ def calculate_real_emergency_metrics(username, path):
                 "preparedness_analysis": preparedness_metrics,
                 "account_access_matrix": account_estimates,
                 "sovereignty_status": get_sovereignty_status(emergency_runway),
-                "data_quality": assess_data_quality(user_data)
+                "data_quality": assess_data_quality(summary)
             }
             
     except Exception as e:
         return {"error": f"Database error: {str(e)}"}
 
-def calculate_real_financial_position(user_data):
+def calculate_real_financial_position(summary):
     """Calculate actual financial position from sovereignty tracking"""
     
     # Real crypto tracking
-    total_btc_invested = sum(row[2] for row in user_data if row[2])  # btc_usd
-    total_sats = sum(row[3] for row in user_data if row[3])  # btc_sats
-    investment_frequency = sum(1 for row in user_data if row[6]) / len(user_data)  # invested_bitcoin
+    total_btc_invested = summary["totals"]["btc_usd"]
+    total_sats = summary["totals"]["btc_sats"]
+    investment_frequency = summary["rates"]["invested_bitcoin"]
     
     # Estimate current crypto value (you can replace with real-time API)
     btc_price_estimate = 100000  # Current BTC price - you could use get_current_btc_price()
@@ -91,15 +90,14 @@ def calculate_real_financial_position(user_data):
         "investment_discipline_score": investment_discipline_score
     }
 
-def calculate_real_expense_patterns(user_data, path):
+def calculate_real_expense_patterns(summary, path):
     """Calculate real expense patterns from sovereignty habits"""
     
     # Calculate cooking frequency and implied food savings
-    cooking_data = [row[4] for row in user_data if row[4] is not None]  # home_cooked_meals
-    avg_meals_cooked_per_day = statistics.mean(cooking_data) if cooking_data else 0
+    avg_meals_cooked_per_day = summary["averages"]["home_cooked_meals"]
     
     # Calculate spending discipline
-    no_spending_frequency = sum(1 for row in user_data if row[5]) / len(user_data)  # no_spending
+    no_spending_frequency = summary["rates"]["no_spending"]
     
     # Estimate monthly expenses based on sovereignty habits
     # More cooking = lower food expenses
@@ -130,24 +128,17 @@ def calculate_real_expense_patterns(user_data, path):
         "estimated_discretionary_savings": discretionary_savings
     }
 
-def calculate_real_preparedness_score(user_data, path):
+def calculate_real_preparedness_score(consistency, path):
     """Calculate family preparedness based on sovereignty habits"""
     
-    # Extract habit consistency data
-    recent_data = user_data[:30]  # Last 30 days
-    
+    # Habit consistency over the last 30 days (from preparedness_service)
     habit_scores = {
-        "meditation_consistency": sum(1 for row in recent_data if row[7]) / len(recent_data),  # meditation
-        "gratitude_consistency": sum(1 for row in recent_data if row[8]) / len(recent_data),  # gratitude
-        "learning_consistency": sum(1 for row in recent_data if row[9]) / len(recent_data),  # read_or_learned
-        "environmental_consistency": sum(1 for row in recent_data if row[10]) / len(recent_data),  # environmental_action
-        "fitness_consistency": sum(1 for row in recent_data if row[11] and row[11] > 0) / len(recent_data),  # exercise_minutes
-        "strength_consistency": sum(1 for row in recent_data if row[12]) / len(recent_data),  # strength_training
-        "nutrition_consistency": sum(1 for row in recent_data if not row[13]) / len(recent_data)  # not junk_food
+        f"{habit}_consistency": consistency["rates"][habit]
+        for habit in PREPAREDNESS_HABITS
     }
     
     # Overall sovereignty consistency score
-    overall_consistency = statistics.mean(habit_scores.values())
+    overall_consistency = consistency["overall_consistency"]
     
     # Path-specific preparedness adjustments
     path_multipliers = {
@@ -217,22 +208,17 @@ def calculate_real_account_estimates(financial_metrics, expense_metrics):
         "total_long_term": sum(long_term_access.values())
     }
 
-def assess_data_quality(user_data):
+def assess_data_quality(summary):
     """Assess the quality and completeness of sovereignty data"""
     
-    total_days = len(user_data)
-    complete_entries = sum(1 for row in user_data if row[1] is not None and row[1] > 0)  # Has score
+    total_days = summary["rows"]
+    complete_entries = summary["scored_rows"]  # Has score
     
     # Check for Bitcoin tracking
-    btc_entries = sum(1 for row in user_data if row[2] is not None and row[2] > 0)  # btc_usd
+    btc_entries = summary["btc_rows"]  # btc_usd
     
     # Check for consistent habit tracking
-    habit_completeness = []
-    for i in range(4, 14):  # Check various habit columns
-        non_null_count = sum(1 for row in user_data if row[i] is not None)
-        habit_completeness.append(non_null_count / total_days)
-    
-    avg_completeness = statistics.mean(habit_completeness)
+    avg_completeness = statistics.mean(summary["completeness"].values())
     
     return {
         "total_days": total_days,
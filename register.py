@@ -1,11 +1,17 @@
 # register.py
-import duckdb, os, bcrypt, json
+import duckdb, os, json
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import logging
 from contextlib import contextmanager
+import threading
 import subprocess
 from backup_db import create_backup
+from schema_migrations import migrate
+from password_pool import password_pool, PoolBusy
+from session_tokens import issue_token
+from password_policy import HASH_ALGO, hash_cost
+from signup_guard import BloomFilter, TokenBucketLimiter
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -30,7 +36,6 @@ CORS(app,
 
 BASE     = os.path.dirname(__file__)
 DB_PATH  = os.path.join(BASE, "data", "sovereignty.duckdb")
-SQL_FILE = os.path.join(BASE, "config", "create_users_table.sql")
 
 # Ensure data directory exists
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
@@ -47,32 +52,60 @@ def get_db():
             conn.close()
 
 def init_db():
-    """Initialize the database with required tables"""
+    """Bring the schema up to date without touching existing data"""
     with get_db() as conn:
-        try:
-            logger.info(f"Reading SQL file from: {SQL_FILE}")
-            with open(SQL_FILE, 'r') as f:
-                sql = f.read()
-                logger.info(f"SQL to execute: {sql}")
-                # Drop the table if it exists to ensure clean state
-                conn.execute("DROP TABLE IF EXISTS users")
-                # Create the table
-                conn.execute(sql)
-                # Print the table structure
-                table_info = conn.execute("DESCRIBE users").fetchall()
-                logger.info(f"Table structure after creation: {table_info}")
-                logger.info("Successfully created users table")
-        except Exception as e:
-            logger.error(f"Error creating users table: {str(e)}")
-            raise
+        applied = migrate(conn)
+        logger.info(f"Schema ready ({len(applied)} migration(s) applied)")
+
+# Per-IP signup limiter and in-memory set of taken usernames
+register_limiter = TokenBucketLimiter()
+taken_usernames = BloomFilter()
+_taken_loaded = False
+_taken_lock = threading.Lock()
+
+def load_taken_usernames(conn):
+    """Fill the Bloom filter from the users table once per process"""
+    global _taken_loaded
+    with _taken_lock:
+        if not _taken_loaded:
+            for (name,) in conn.execute("SELECT username FROM users").fetchall():
+                taken_usernames.add(name)
+            _taken_loaded = True
+            logger.info(f"Loaded {taken_usernames.count} usernames into the signup filter")
+
+def find_registration_conflict(conn, username, email):
+    """
+    'username' or 'email' if either is already registered, else None
+    Two indexed point lookups instead of one OR scan; the username lookup is
+    skipped when the Bloom filter says the name was never seen.
+    """
+    load_taken_usernames(conn)
+    if username in taken_usernames and conn.execute(
+        "SELECT 1 FROM users WHERE username = ?", [username]
+    ).fetchone():
+        return "username"
+    if conn.execute("SELECT 1 FROM users WHERE email = ?", [email]).fetchone():
+        return "email"
+    return None
+
+def error_response(message, status, retry_after=None):
+    response = jsonify({"status": "error", "message": message})
+    if retry_after:
+        response.headers["Retry-After"] = str(retry_after)
+    return response, status
 
 @app.route("/register", methods=["POST", "OPTIONS"])
 def register_user():
     if request.method == "OPTIONS":
         return "", 200
         
+    allowed, retry_after = register_limiter.acquire(request.remote_addr or "unknown")
+    if not allowed:
+        logger.warning(f"Rate limited registration from {request.remote_addr}")
+        return error_response("Too many registration attempts, please slow down.", 429, retry_after)
+        
     logger.info("Received registration request")
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     username = data.get("username", "").strip()
     email    = data.get("email", "").strip().lower()
     password = data.get("password", "")
@@ -83,42 +116,46 @@ def register_user():
     if not username or not email or not password:
         return jsonify({"status": "error", "message": "Missing required fields."}), 400
 
-    with get_db() as conn:
-        try:
-            # Print current table structure
-            table_info = conn.execute("DESCRIBE users").fetchall()
-            logger.info(f"Current table structure before registration: {table_info}")
-            
-            # Check if user already exists
-            existing = conn.execute("SELECT COUNT(*) FROM users WHERE username = ? OR email = ?", [username, email]).fetchone()[0]
-            if existing > 0:
-                return jsonify({"status": "error", "message": "Username or email already exists."}), 409
+    try:
+        # Check if user already exists
+        with get_db() as conn:
+            if find_registration_conflict(conn, username, email):
+                return error_response("Username or email already exists.", 409)
 
-            # Hash password
-            salt = bcrypt.gensalt()
-            hashed_pw = bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+        # Hash password off the request thread, without holding the database
+        hashed_pw = password_pool.hash_password(password)
 
+        with get_db() as conn:
             # Insert user
-            insert_sql = "INSERT INTO users (username, email, password, path) VALUES (?, ?, ?, ?)"
-            logger.info(f"Executing SQL: {insert_sql}")
-            logger.info(f"With values: username={username}, email={email}, path={path}")
-            conn.execute(insert_sql, (username, email, hashed_pw, path))
-            logger.info(f"Successfully registered user: {username}")
+            conn.execute("""
+                INSERT INTO users (username, email, password, path, hash_algo, hash_cost, hash_updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, (username, email, hashed_pw, path, HASH_ALGO, hash_cost(hashed_pw)))
+        taken_usernames.add(username)
+        logger.info(f"Successfully registered user: {username}")
+        
+        # Create backup after successful registration
+        if create_backup():
+            logger.info("Database backup created successfully")
+        else:
+            logger.warning("Database backup failed")
             
-            # Create backup after successful registration
-            if create_backup():
-                logger.info("Database backup created successfully")
-            else:
-                logger.warning("Database backup failed")
-                
-            return jsonify({
-                "status": "success",
-                "message": "User registered!",
-                "streamlit_url": "http://localhost:8501"
-            }), 200
-        except Exception as e:
-            logger.error(f"Error during registration: {str(e)}")
-            return jsonify({"status": "error", "message": f"Database error: {str(e)}"}), 500
+        return jsonify({
+            "status": "success",
+            "message": "User registered!",
+            "token": issue_token(username, path),
+            "streamlit_url": "http://localhost:8501"
+        }), 200
+    except duckdb.ConstraintException:
+        # Registered by another process after our check
+        taken_usernames.add(username)
+        return error_response("Username or email already exists.", 409)
+    except PoolBusy as e:
+        logger.warning(f"Rejecting registration, password pool busy: {e}")
+        return error_response("Registration is busy, please retry shortly.", 503, 1)
+    except Exception as e:
+        logger.error(f"Error during registration: {str(e)}")
+        return jsonify({"status": "error", "message": f"Database error: {str(e)}"}), 500
 
 @app.route("/welcome", methods=["POST", "OPTIONS"])
 def welcome_user():
@@ -0,0 +1,123 @@
+# schema_migrations.py
+"""
+Versioned schema migrations
+Migrations are ordered SQL files in config/migrations named NNNN_description.sql.
+A migration whose DDL depends on the data it finds (the two XP table layouts)
+is a NNNN_description.py defining upgrade(conn) instead. Each one is applied
+exactly once, inside a transaction, and recorded in schema_migrations. When the database is already current, migrate() is a single
+MAX(version) lookup, so every entry point can call it at startup.
+
+Run directly to bring the default database up to date:
+    python schema_migrations.py
+"""
+
+import os
+import re
+import hashlib
+import logging
+import threading
+import importlib.util
+
+logger = logging.getLogger(__name__)
+
+BASE = os.path.dirname(__file__)
+MIGRATIONS_DIR = os.path.join(BASE, "config", "migrations")
+
+_MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+_migrate_lock = threading.Lock()
+
+def _python_upgrade(path):
+    """upgrade(conn) of a Python migration, imported only when it is applied"""
+    def upgrade(conn):
+        spec = importlib.util.spec_from_file_location(f"migration_{os.path.basename(path)[:-3]}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.upgrade(conn)
+    return upgrade
+
+def load_migrations(migrations_dir=MIGRATIONS_DIR):
+    """[(version, name, sql or upgrade function, checksum)] sorted by version"""
+    migrations = []
+    for filename in sorted(os.listdir(migrations_dir)):
+        match = _MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        path = os.path.join(migrations_dir, filename)
+        with open(path, "r", encoding="utf-8") as f:
+            source = f.read()
+        body = _python_upgrade(path) if match.group(3) == "py" else source
+        migrations.append((int(match.group(1)), match.group(2), body,
+                           hashlib.sha256(source.encode("utf-8")).hexdigest()))
+
+    versions = [version for version, *_ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {migrations_dir}")
+    return migrations
+
+MIGRATIONS = load_migrations()
+LATEST_VERSION = MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def ensure_migrations_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version     INTEGER PRIMARY KEY,
+            name        VARCHAR NOT NULL,
+            checksum    VARCHAR NOT NULL,
+            applied_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def current_version(conn):
+    """Highest applied migration version (0 for a fresh database)"""
+    ensure_migrations_table(conn)
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+
+def migrate(conn, migrations=None):
+    """Apply any pending migrations in order; returns the versions applied"""
+    migrations = MIGRATIONS if migrations is None else migrations
+    latest = migrations[-1][0] if migrations else 0
+
+    with _migrate_lock:
+        if current_version(conn) >= latest:
+            return []
+
+        applied = {
+            version: checksum
+            for version, checksum in conn.execute(
+                "SELECT version, checksum FROM schema_migrations"
+            ).fetchall()
+        }
+
+        newly_applied = []
+        for version, name, body, checksum in migrations:
+            if version in applied:
+                if applied[version] != checksum:
+                    logger.warning(f"⚠️ Migration {version:04d}_{name} changed after it was applied")
+                continue
+
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                body(conn) if callable(body) else conn.execute(body)
+                conn.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES (?, ?, ?)",
+                    [version, name, checksum]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                logger.error(f"❌ Migration {version:04d}_{name} failed")
+                raise
+
+            logger.info(f"✅ Applied migration {version:04d}_{name}")
+            newly_applied.append(version)
+
+        return newly_applied
+
+if __name__ == "__main__":
+    from db import get_db_connection
+
+    logging.basicConfig(level=logging.INFO)
+    with get_db_connection() as conn:
+        applied = migrate(conn)
+        print(f"✅ Schema at version {current_version(conn)} "
+              f"({len(applied)} migration(s) applied)")
@@ -0,0 +1,204 @@
+# score_drift.py
+"""
+Score drift detection
+sovereignty.score is frozen when an entry is saved, so rows written by older
+scoring code, or before config/paths.json changed, silently disagree with
+tracker.scoring. This job recomputes every stored score inside DuckDB with
+the scorer compiled to SQL (one scan, no Python loop), reports mismatches by
+path and day, and can rewrite them in bulk. Every rewritten score is kept in
+score_rewrites with its old value, and each run is logged in score_drift_runs
+with a hash of the scoring config it used.
+
+    python score_drift.py                     # report only
+    python score_drift.py --rewrite           # fix drifted scores
+    python score_drift.py --user test --since 2025-01-01 --json
+"""
+
+import sys
+import json
+import time
+import uuid
+import hashlib
+import logging
+import argparse
+from datetime import date, timedelta
+
+from schema_migrations import migrate
+from sovereignty_achievements import rebuild_all
+from preparedness_service import invalidate_preparedness
+from tracker.scoring import daily_score_sql, ALL_PATHS
+
+logger = logging.getLogger(__name__)
+
+CONFIG_HASH = hashlib.sha256(json.dumps(ALL_PATHS, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _filters(username=None, path=None, since=None, until=None):
+    """WHERE clause and params; date bounds stay range predicates on timestamp"""
+    conditions, params = ["TRUE"], []
+    if username:
+        conditions.append("username = ?")
+        params.append(username)
+    if path:
+        conditions.append("path = ?")
+        params.append(path)
+    if since:
+        conditions.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        conditions.append("timestamp < ?")
+        params.append(until + timedelta(days=1))
+    return " AND ".join(conditions), params
+
+def _scored_sql(where):
+    return f"""
+        SELECT username, timestamp, path, score, {daily_score_sql()} AS expected
+        FROM sovereignty WHERE {where}
+    """
+
+def last_config_hash(conn):
+    row = conn.execute("SELECT config_hash FROM score_drift_runs ORDER BY started_at DESC LIMIT 1").fetchone()
+    return row[0] if row else None
+
+def detect_drift(conn, username=None, path=None, since=None, until=None):
+    """
+    Recompute stored scores and summarise the mismatches
+    Returns {"rows_checked", "mismatched", "unscorable", "by_path": {path: ...},
+    "by_day": [{"path", "day", "mismatched", "net_delta"}]} where net_delta is
+    the summed (recomputed - stored) score.
+    """
+    where, params = _filters(username, path, since, until)
+    groups = conn.execute(f"""
+        SELECT path, CAST(timestamp AS DATE) AS day,
+               COUNT(*) AS rows,
+               COUNT_IF(expected IS NOT NULL AND score IS DISTINCT FROM expected) AS mismatched,
+               COUNT_IF(expected IS NULL) AS unscorable,
+               COALESCE(SUM(expected - score) FILTER (WHERE score IS DISTINCT FROM expected), 0) AS net_delta
+        FROM ({_scored_sql(where)})
+        GROUP BY path, day
+        ORDER BY path, day
+    """, params).fetchall()
+
+    by_path, by_day = {}, []
+    for group_path, day, rows, mismatched, unscorable, net_delta in groups:
+        summary = by_path.setdefault(group_path, {"rows": 0, "mismatched": 0, "unscorable": 0, "net_delta": 0})
+        summary["rows"] += rows
+        summary["mismatched"] += mismatched
+        summary["unscorable"] += unscorable
+        summary["net_delta"] += int(net_delta)
+        if mismatched:
+            by_day.append({"path": group_path, "day": day.isoformat() if day else None,
+                           "mismatched": mismatched, "net_delta": int(net_delta)})
+
+    return {
+        "rows_checked": sum(s["rows"] for s in by_path.values()),
+        "mismatched": sum(s["mismatched"] for s in by_path.values()),
+        "unscorable": sum(s["unscorable"] for s in by_path.values()),
+        "by_path": by_path,
+        "by_day": by_day,
+    }
+
+def rewrite_drift(conn, run_id, username=None, path=None, since=None, until=None):
+    """
+    Replace drifted scores with the recomputed ones in one transaction,
+    auditing each change in score_rewrites, rebuilding the affected users'
+    achievements and dropping their cached preparedness scores. Returns the
+    number of rows rewritten.
+    """
+    where, params = _filters(username, path, since, until)
+    expected = daily_score_sql()
+
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        audited = conn.execute(f"""
+            INSERT INTO score_rewrites (run_id, username, timestamp, path, old_score, new_score)
+            SELECT ?, username, timestamp, path, score, expected FROM ({_scored_sql(where)})
+            WHERE expected IS NOT NULL AND score IS DISTINCT FROM expected
+        """, [run_id] + params).fetchone()[0]
+        updated = conn.execute(f"""
+            UPDATE sovereignty SET score = {expected}
+            WHERE {where} AND {expected} IS NOT NULL AND score IS DISTINCT FROM {expected}
+        """, params).fetchone()[0]
+        if audited != updated:
+            raise RuntimeError(f"Score rewrite touched {updated:,} rows but audited {audited:,}")
+
+        # Score totals, best score and high-score days all read the rewritten column
+        users = [name for (name,) in conn.execute(
+            "SELECT DISTINCT username FROM score_rewrites WHERE run_id = ? AND username IS NOT NULL", [run_id]
+        ).fetchall()]
+        rebuild_all(conn, users)
+        for user in users:
+            invalidate_preparedness(user, conn, since=date.min)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    logger.info(f"✏️ Rewrote {updated:,} drifted scores for {len(users)} user(s) (run {run_id})")
+    return updated
+
+def run_drift_check(conn, rewrite=False, username=None, path=None, since=None, until=None):
+    """Detect (and optionally rewrite) drift, log the run; returns the report"""
+    migrate(conn)
+    run_id, started = uuid.uuid4().hex, time.perf_counter()
+    previous_hash = last_config_hash(conn)
+
+    report = detect_drift(conn, username, path, since, until)
+    report.update(run_id=run_id, config_hash=CONFIG_HASH,
+                  config_changed=previous_hash is not None and previous_hash != CONFIG_HASH,
+                  rewritten=0)
+    if rewrite and report["mismatched"]:
+        report["rewritten"] = rewrite_drift(conn, run_id, username, path, since, until)
+    report["seconds"] = round(time.perf_counter() - started, 3)
+
+    conn.execute("""
+        INSERT INTO score_drift_runs (run_id, config_hash, rows_checked, mismatched, unscorable, rewritten, seconds)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [run_id, CONFIG_HASH, report["rows_checked"], report["mismatched"],
+          report["unscorable"], report["rewritten"], report["seconds"]])
+    return report
+
+def print_report(report, top=10):
+    print("📐 SCORE DRIFT REPORT")
+    print("=" * 50)
+    if report["config_changed"]:
+        print("⚠️  Scoring config changed since the last drift run")
+    for path, summary in report["by_path"].items():
+        icon = "✅" if not summary["mismatched"] and not summary["unscorable"] else "❌"
+        line = f"{icon} {path or '(no path)'}: {summary['mismatched']:,} / {summary['rows']:,} rows drifted"
+        if summary["mismatched"]:
+            line += f" (net {summary['net_delta']:+,} points)"
+        if summary["unscorable"]:
+            line += f", {summary['unscorable']:,} unscorable"
+        print(line)
+
+    worst = sorted(report["by_day"], key=lambda d: d["mismatched"], reverse=True)[:top]
+    if worst:
+        print("\n📅 Most drifted days:")
+        for day in worst:
+            print(f"   {day['day']} | {day['path']:22} | {day['mismatched']:,} rows | net {day['net_delta']:+,}")
+    print("=" * 50)
+    print(f"{report['rows_checked']:,} rows checked in {report['seconds']}s: "
+          f"{report['mismatched']:,} drifted, {report['rewritten']:,} rewritten")
+
+if __name__ == "__main__":
+    from db import get_db_connection
+
+    parser = argparse.ArgumentParser(description="Find stored scores that disagree with the current scoring config")
+    parser.add_argument("--rewrite", action="store_true", help="Replace drifted scores (audited in score_rewrites)")
+    parser.add_argument("--user", help="Only this user")
+    parser.add_argument("--path", help="Only entries stored under this path")
+    parser.add_argument("--since", type=date.fromisoformat, help="Only entries on or after YYYY-MM-DD")
+    parser.add_argument("--until", type=date.fromisoformat, help="Only entries on or before YYYY-MM-DD")
+    parser.add_argument("--top", type=int, default=10, help="Drifted days to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with get_db_connection() as conn:
+        report = run_drift_check(conn, args.rewrite, args.user, args.path, args.since, args.until)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.top)
+    sys.exit(0 if report["mismatched"] == report["rewritten"] else 1)
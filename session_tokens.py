@@ -0,0 +1,135 @@
+# session_tokens.py
+"""
+Signed session tokens shared by the login service and the Streamlit pages
+login.py (and register.py) issue an HMAC-SHA256 signed token carrying the
+username, path and expiry. The pages verify it locally on every rerun instead
+of re-querying the users table or trusting raw username/path query params.
+
+The signing secret comes from SOVEREIGNTY_SESSION_SECRET, or from a key file
+generated once under data/ (git-ignored) so separate local processes agree on it.
+"""
+
+import os
+import json
+import hmac
+import time
+import uuid
+import base64
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+BASE = os.path.dirname(__file__)
+SECRET_FILE = os.path.join(BASE, "data", ".session_secret")
+TOKEN_TTL_SECONDS = int(os.environ.get("SESSION_TOKEN_TTL", 12 * 60 * 60))
+
+# jti -> expiry for tokens revoked by logout (per process, pruned as they expire)
+_revoked = {}
+_revoked_lock = threading.Lock()
+_secret = None
+
+def _load_secret():
+    global _secret
+    if _secret is None:
+        env_secret = os.environ.get("SOVEREIGNTY_SESSION_SECRET")
+        if env_secret:
+            _secret = env_secret.encode("utf-8")
+        else:
+            os.makedirs(os.path.dirname(SECRET_FILE), exist_ok=True)
+            try:
+                # O_EXCL so two processes starting together don't both write a key
+                fd = os.open(SECRET_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, "w") as f:
+                    f.write(uuid.uuid4().hex + uuid.uuid4().hex)
+                logger.info(f"🔑 Generated session secret at {SECRET_FILE}")
+            except FileExistsError:
+                pass
+            with open(SECRET_FILE) as f:
+                _secret = f.read().strip().encode("utf-8")
+    return _secret
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _sign(body):
+    return _b64encode(hmac.new(_load_secret(), body.encode("ascii"), hashlib.sha256).digest())
+
+def issue_token(username, path, ttl_seconds=TOKEN_TTL_SECONDS):
+    """Signed token for `username` on `path`, valid for `ttl_seconds`"""
+    now = int(time.time())
+    payload = {"u": username, "p": path, "iat": now, "exp": now + ttl_seconds, "jti": uuid.uuid4().hex}
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return f"{body}.{_sign(body)}"
+
+def verify_token(token):
+    """
+    Session dict {username, path, expires_at, jti} for a valid token,
+    or None if it is malformed, tampered with, expired or revoked
+    """
+    if not token or not isinstance(token, str) or token.count(".") != 1:
+        return None
+
+    body, signature = token.split(".")
+    if not hmac.compare_digest(signature, _sign(body)):
+        logger.warning("Rejected session token with bad signature")
+        return None
+
+    try:
+        payload = json.loads(_b64decode(body))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    if payload.get("exp", 0) <= time.time():
+        return None
+
+    with _revoked_lock:
+        if payload.get("jti") in _revoked:
+            return None
+
+    return {
+        "username": payload["u"],
+        "path": payload["p"],
+        "expires_at": payload["exp"],
+        "jti": payload["jti"],
+    }
+
+def revoke_token(token):
+    """Reject `token` in this process until it would have expired anyway"""
+    session = verify_token(token)
+    if not session:
+        return False
+
+    now = time.time()
+    with _revoked_lock:
+        for jti, expires_at in list(_revoked.items()):
+            if expires_at <= now:
+                del _revoked[jti]
+        _revoked[session["jti"]] = session["expires_at"]
+    return True
+
+def resolve_session(query_params, session_state):
+    """
+    Username and path for the current Streamlit session
+    A `token` query param (from the login redirect) is verified and stored in
+    session_state and removed from the URL, so the credential doesn't linger in
+    the address bar, history or Referer headers; later reruns and page switches
+    reuse the stored token. Returns (None, None) when there is no valid session.
+    """
+    token = query_params.get("token", None) or session_state.get("session_token", None)
+    if "token" in query_params:
+        del query_params["token"]
+    session = verify_token(token)
+    if not session:
+        for key in ("session_token", "username", "path"):
+            session_state.pop(key, None)
+        return None, None
+
+    session_state["session_token"] = token
+    session_state["username"] = session["username"]
+    session_state["path"] = session["path"]
+    return session["username"], session["path"]
@@ -0,0 +1,79 @@
+# signup_guard.py
+"""
+Cheap pre-checks for the /register endpoint
+TokenBucketLimiter caps signups per client IP so a spike is rejected with 429
+before it reaches bcrypt or the database. BloomFilter holds the taken
+usernames in memory; a negative answer means the name is definitely free and
+the username lookup can be skipped.
+"""
+
+import os
+import math
+import time
+import hashlib
+import threading
+
+REGISTER_BURST = int(os.environ.get("REGISTER_BURST", 5))
+REGISTER_PER_MINUTE = float(os.environ.get("REGISTER_PER_MINUTE", 5))
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no deletes)"""
+
+    def __init__(self, capacity=10_000, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, item):
+        # Double hashing: two 64-bit halves of one digest give every probe
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        with self._lock:
+            for position in self._positions(item):
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+class TokenBucketLimiter:
+    """Per-key token buckets: `burst` requests at once, refilled at `per_minute`"""
+
+    def __init__(self, burst=REGISTER_BURST, per_minute=REGISTER_PER_MINUTE, max_keys=10_000):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, last_refill)
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        # Full buckets carry no state worth keeping
+        full_after = self.burst / self.rate if self.rate else float("inf")
+        for key, (_, last) in list(self._buckets.items()):
+            if now - last >= full_after:
+                del self._buckets[key]
+
+    def acquire(self, key):
+        """(allowed, retry_after_seconds) for one request from `key`"""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(now)
+
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True, 0
+
+            self._buckets[key] = (tokens, now)
+            retry_after = (1 - tokens) / self.rate if self.rate else 60
+            return False, math.ceil(retry_after)
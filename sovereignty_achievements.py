@@ -0,0 +1,370 @@
+# sovereignty_achievements.py
+"""
+Rule-based achievements, evaluated incrementally
+Metrics (counters, sums, streaks) and the achievements built on them are
+declared as data below. Each new sovereignty entry advances only the metrics
+it touches in achievement_progress and checks only the rules on those
+metrics, persisting unlocks to achievement_unlocks. Reading a user's
+achievements is two indexed lookups, independent of history length.
+
+Entries that arrive out of order (imports, backfills) trigger a replay of
+that user's history through the same code; rebuild_all() does it for
+everyone:
+    python sovereignty_achievements.py --rebuild [--user NAME]
+"""
+
+import logging
+import argparse
+from datetime import date, datetime, timedelta
+
+from db import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# ── Declarations ───────────────────────────────────────────────────────────────
+
+# Habit streaks shown on the dashboard: name -> (sovereignty column, minimum value)
+STREAK_HABITS = {
+    "meditation": ("meditation", 1),
+    "gratitude": ("gratitude", 1),
+    "strength_training": ("strength_training", 1),
+    "invested_bitcoin": ("invested_bitcoin", 1),
+    "environmental_action": ("environmental_action", 1),
+    "read_or_learned": ("read_or_learned", 1),
+    "no_spending": ("no_spending", 1),
+    "cooking": ("home_cooked_meals", 1),
+    "exercise": ("exercise_minutes", 20),
+}
+
+# kind: count (entries), days (distinct days, optionally where field >= min),
+# sum / max (of field), streak (longest run of consecutive days where field >= min)
+METRICS = {
+    "total_tracking_days": {"kind": "days"},
+    "total_entries": {"kind": "count"},
+    "score_total": {"kind": "sum", "field": "score"},
+    "best_score": {"kind": "max", "field": "score"},
+    "high_score_days": {"kind": "days", "field": "score", "min": 80},
+    "total_meals_cooked": {"kind": "sum", "field": "home_cooked_meals"},
+    "total_exercise_minutes": {"kind": "sum", "field": "exercise_minutes"},
+    "total_sats_accumulated": {"kind": "sum", "field": "btc_sats"},
+    "total_btc_invested": {"kind": "sum", "field": "btc_usd"},
+    "environmental_days": {"kind": "days", "field": "environmental_action", "min": 1},
+    "learning_days": {"kind": "days", "field": "read_or_learned", "min": 1},
+    **{f"{habit}_streak": {"kind": "streak", "field": field, "min": minimum}
+       for habit, (field, minimum) in STREAK_HABITS.items()},
+}
+
+RARITY_XP = {"common": 10, "rare": 25, "epic": 50, "legendary": 100}
+
+# Each achievement unlocks once its metric reaches the threshold
+ACHIEVEMENTS = [
+    {"id": "first_step", "name": "🌱 First Step", "description": "Track your first day",
+     "metric": "total_tracking_days", "threshold": 1, "rarity": "common"},
+    {"id": "week_one", "name": "📅 Week One", "description": "Track 7 days",
+     "metric": "total_tracking_days", "threshold": 7, "rarity": "common"},
+    {"id": "month_strong", "name": "🗓️ Month Strong", "description": "Track 30 days",
+     "metric": "total_tracking_days", "threshold": 30, "rarity": "rare"},
+    {"id": "quarter_sovereign", "name": "🏰 Quarter Sovereign", "description": "Track 90 days",
+     "metric": "total_tracking_days", "threshold": 90, "rarity": "epic"},
+    {"id": "year_of_sovereignty", "name": "👑 Year of Sovereignty", "description": "Track 365 days",
+     "metric": "total_tracking_days", "threshold": 365, "rarity": "legendary"},
+    {"id": "peak_performance", "name": "⚡ Peak Performance", "description": "Score 90 or more in a day",
+     "metric": "best_score", "threshold": 90, "rarity": "rare"},
+    {"id": "perfect_day", "name": "💯 Perfect Day", "description": "Score a perfect 100",
+     "metric": "best_score", "threshold": 100, "rarity": "epic"},
+    {"id": "consistent_excellence", "name": "🎯 Consistent Excellence", "description": "Score 80+ on 30 days",
+     "metric": "high_score_days", "threshold": 30, "rarity": "epic"},
+    {"id": "home_chef", "name": "👨‍🍳 Home Chef", "description": "Cook 50 meals at home",
+     "metric": "total_meals_cooked", "threshold": 50, "rarity": "common"},
+    {"id": "kitchen_sovereign", "name": "🍳 Kitchen Sovereign", "description": "Cook 250 meals at home",
+     "metric": "total_meals_cooked", "threshold": 250, "rarity": "rare"},
+    {"id": "cooking_streak", "name": "🔥 Cooking Streak", "description": "Cook at home 14 days in a row",
+     "metric": "cooking_streak", "threshold": 14, "rarity": "rare"},
+    {"id": "mover", "name": "🏃 Mover", "description": "Log 1,000 exercise minutes",
+     "metric": "total_exercise_minutes", "threshold": 1_000, "rarity": "common"},
+    {"id": "iron_will", "name": "💪 Iron Will", "description": "Strength train 7 days in a row",
+     "metric": "strength_training_streak", "threshold": 7, "rarity": "rare"},
+    {"id": "stillness", "name": "🧘 Stillness", "description": "Meditate 7 days in a row",
+     "metric": "meditation_streak", "threshold": 7, "rarity": "rare"},
+    {"id": "zen_master", "name": "☯️ Zen Master", "description": "Meditate 30 days in a row",
+     "metric": "meditation_streak", "threshold": 30, "rarity": "epic"},
+    {"id": "grateful_heart", "name": "🙏 Grateful Heart", "description": "Practice gratitude 7 days in a row",
+     "metric": "gratitude_streak", "threshold": 7, "rarity": "rare"},
+    {"id": "lifelong_learner", "name": "📚 Lifelong Learner", "description": "Read or learn on 50 days",
+     "metric": "learning_days", "threshold": 50, "rarity": "rare"},
+    {"id": "earth_steward", "name": "🌍 Earth Steward", "description": "Take environmental action on 30 days",
+     "metric": "environmental_days", "threshold": 30, "rarity": "rare"},
+    {"id": "frugal_week", "name": "🧾 Frugal Week", "description": "No spending 7 days in a row",
+     "metric": "no_spending_streak", "threshold": 7, "rarity": "rare"},
+    {"id": "stacker", "name": "₿ Stacker", "description": "Invest in bitcoin 7 days in a row",
+     "metric": "invested_bitcoin_streak", "threshold": 7, "rarity": "epic"},
+    {"id": "sats_100k", "name": "🪙 100k Sats", "description": "Stack 100,000 sats",
+     "metric": "total_sats_accumulated", "threshold": 100_000, "rarity": "rare"},
+    {"id": "sats_millionaire", "name": "💰 Sat Millionaire", "description": "Stack 1,000,000 sats",
+     "metric": "total_sats_accumulated", "threshold": 1_000_000, "rarity": "epic"},
+    {"id": "whole_coiner", "name": "🏆 Whole Coiner", "description": "Stack 100,000,000 sats",
+     "metric": "total_sats_accumulated", "threshold": 100_000_000, "rarity": "legendary"},
+]
+
+ACHIEVEMENTS_BY_ID = {a["id"]: a for a in ACHIEVEMENTS}
+ACHIEVEMENTS_BY_METRIC = {}
+for _achievement in ACHIEVEMENTS:
+    ACHIEVEMENTS_BY_METRIC.setdefault(_achievement["metric"], []).append(_achievement)
+
+# Highest level whose average score and tracked days are both met
+LEVELS = [
+    {"level": 6, "name": "👑 Sovereign Master", "min_avg": 85, "min_days": 180},
+    {"level": 5, "name": "🛡️ Sovereign", "min_avg": 75, "min_days": 90},
+    {"level": 4, "name": "🔥 Self-Reliant", "min_avg": 65, "min_days": 30},
+    {"level": 3, "name": "🏗️ Builder", "min_avg": 50, "min_days": 14},
+    {"level": 2, "name": "🌿 Apprentice", "min_avg": 0, "min_days": 3},
+    {"level": 1, "name": "🌱 Newcomer", "min_avg": 0, "min_days": 0},
+]
+
+# ── Metric state ───────────────────────────────────────────────────────────────
+
+def _passes(spec, entry):
+    field = spec.get("field")
+    if field is None:
+        return True
+    value = entry.get(field)
+    return value is not None and float(value) >= spec.get("min", 1)
+
+def advance(spec, state, entry, day):
+    """
+    New (value, run, last_day) for one metric after `entry` on `day`, or None
+    if the entry doesn't change it. `state` is the current triple or None.
+    """
+    value, run, last_day = state or (0, 0, None)
+    kind = spec["kind"]
+
+    if kind == "count":
+        return value + 1, run, day
+    if kind in ("sum", "max"):
+        amount = entry.get(spec["field"])
+        if not amount:
+            return None
+        return (value + float(amount) if kind == "sum" else max(value, float(amount))), run, day
+    if not _passes(spec, entry) or last_day == day:
+        return None  # Not done, or this day already counted
+    if kind == "days":
+        return value + 1, run, day
+    # streak: extend yesterday's run, otherwise start a new one
+    run = run + 1 if last_day == day - timedelta(days=1) else 1
+    return max(value, run), run, day
+
+def _crossed(metric, old_value, new_value):
+    return [a for a in ACHIEVEMENTS_BY_METRIC.get(metric, [])
+            if old_value < a["threshold"] <= new_value]
+
+def _entry_day(timestamp):
+    return timestamp.date() if isinstance(timestamp, datetime) else timestamp
+
+def _load_progress(conn, username):
+    return {metric: (value, run, last_day) for metric, value, run, last_day in conn.execute(
+        "SELECT metric, value, run, last_day FROM achievement_progress WHERE username = ?", [username]
+    ).fetchall()}
+
+def _save_progress(conn, username, states):
+    # One multi-row upsert; executemany would be a statement per metric
+    conn.execute(f"""
+        INSERT INTO achievement_progress (username, metric, value, run, last_day, updated_at)
+        VALUES {", ".join(["(?, ?, ?, ?, ?, CURRENT_TIMESTAMP)"] * len(states))}
+        ON CONFLICT (username, metric) DO UPDATE SET
+            value = excluded.value, run = excluded.run,
+            last_day = excluded.last_day, updated_at = excluded.updated_at
+    """, [param for metric, state in states.items() for param in (username, metric, *state)])
+
+def _save_unlocks(conn, username, unlocks):
+    """Persist (achievement, unlocked_at) pairs; returns the ones not already unlocked"""
+    new = []
+    for achievement, unlocked_at in unlocks:
+        inserted = conn.execute("""
+            INSERT OR IGNORE INTO achievement_unlocks (unlock_id, user_name, achievement_id, xp_reward, unlocked_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [f"{username}:{achievement['id']}", username, achievement["id"],
+              RARITY_XP[achievement["rarity"]], unlocked_at]).fetchone()[0]
+        if inserted:
+            new.append(achievement)
+    return new
+
+# ── Writes ─────────────────────────────────────────────────────────────────────
+
+def record_progress(conn, username, entry, timestamp):
+    """
+    Advance `username`'s metrics with one new entry (habit fields plus score)
+    Returns the achievements this entry unlocked. An entry older than the
+    user's latest tracked day can't be applied incrementally, so the user's
+    history is replayed instead.
+    """
+    progress = _load_progress(conn, username)
+    day = _entry_day(timestamp)
+    latest = progress.get("total_tracking_days", (0, 0, None))[2]
+    if latest is not None and day < latest:
+        logger.info(f"Out-of-order entry for {username}, replaying history")
+        return rebuild_user(conn, username)
+
+    changed, unlocks = {}, []
+    for metric, spec in METRICS.items():
+        state = advance(spec, progress.get(metric), entry, day)
+        if state is None:
+            continue
+        changed[metric] = state
+        old_value = progress.get(metric, (0,))[0]
+        unlocks += [(a, timestamp) for a in _crossed(metric, old_value, state[0])]
+
+    if changed:
+        _save_progress(conn, username, changed)
+    unlocked = _save_unlocks(conn, username, unlocks)
+    for achievement in unlocked:
+        logger.info(f"🏆 {username} unlocked {achievement['id']}")
+    return unlocked
+
+def rebuild_user(conn, username):
+    """
+    Recompute `username`'s metrics from their full history; returns newly persisted unlocks
+    Every threshold the history crosses is offered to achievement_unlocks again,
+    so unlocks lost while the progress survived (a reset) are restored with
+    the time they were first earned.
+    """
+    fields = sorted({spec["field"] for spec in METRICS.values() if "field" in spec})
+    rows = conn.execute(f"""
+        SELECT timestamp, {", ".join(fields)} FROM sovereignty
+        WHERE username = ? AND timestamp IS NOT NULL
+        ORDER BY timestamp
+    """, [username]).fetchall()
+
+    progress, unlocks = {}, []
+    for timestamp, *values in rows:
+        entry = dict(zip(fields, values))
+        day = _entry_day(timestamp)
+        for metric, spec in METRICS.items():
+            state = advance(spec, progress.get(metric), entry, day)
+            if state is not None:
+                unlocks += [(a, timestamp) for a in _crossed(metric, progress.get(metric, (0,))[0], state[0])]
+                progress[metric] = state
+
+    conn.execute("DELETE FROM achievement_progress WHERE username = ?", [username])
+    if progress:
+        _save_progress(conn, username, progress)
+    return _save_unlocks(conn, username, unlocks)
+
+def rebuild_all(conn, usernames=None):
+    """Backfill: recompute every user (or `usernames`); returns {username: unlock count}"""
+    if usernames is None:
+        usernames = [name for (name,) in conn.execute(
+            "SELECT DISTINCT username FROM sovereignty WHERE username IS NOT NULL"
+        ).fetchall()]
+    return {username: len(rebuild_user(conn, username)) for username in usernames}
+
+# ── Reads ──────────────────────────────────────────────────────────────────────
+
+def _load_unlocks(conn, username):
+    return conn.execute("""
+        SELECT achievement_id, unlocked_at FROM achievement_unlocks
+        WHERE user_name = ? ORDER BY unlocked_at
+    """, [username]).fetchall()
+
+def _missing_unlocks(progress, unlocked):
+    """Achievements whose threshold the stored progress meets but that have no unlock row"""
+    earned = {achievement_id for achievement_id, _ in unlocked}
+    return [a for a in ACHIEVEMENTS if a["id"] not in earned
+            and a["metric"] in progress and progress[a["metric"]][0] >= a["threshold"]]
+
+def _current_run(state, today):
+    # A streak is still alive if it was extended today or yesterday
+    value, run, last_day = state
+    return run if last_day is not None and last_day >= today - timedelta(days=1) else 0
+
+def sovereignty_level(total_days, avg_score):
+    for level in LEVELS:
+        if avg_score >= level["min_avg"] and total_days >= level["min_days"]:
+            return {"level": level["level"], "name": level["name"],
+                    "avg_score": round(avg_score, 1), "total_days": total_days}
+
+def achievement_progress(achievement, value):
+    pct = min(100.0, 100.0 * value / achievement["threshold"])
+    remaining = achievement["threshold"] - value
+    return {"current": value, "target": achievement["threshold"], "progress": round(pct, 1),
+            "message": f"{remaining:,.0f} to go" if remaining > 0 else "Unlocked"}
+
+class SovereigntyAchievementEngine:
+    """Read-side facade used by the dashboard, coaching and meal-plan pages"""
+
+    def calculate_user_achievements(self, username, today=None):
+        today = today or date.today()
+        try:
+            with get_db_connection() as conn:
+                progress = _load_progress(conn, username)
+                if not progress and conn.execute(
+                    "SELECT 1 FROM sovereignty WHERE username = ? LIMIT 1", [username]
+                ).fetchone():
+                    # History recorded before incremental tracking existed
+                    rebuild_user(conn, username)
+                    progress = _load_progress(conn, username)
+                unlocked = _load_unlocks(conn, username)
+                if _missing_unlocks(progress, unlocked):
+                    # Met thresholds without an unlock row: restore them from history
+                    rebuild_user(conn, username)
+                    progress, unlocked = _load_progress(conn, username), _load_unlocks(conn, username)
+        except Exception as e:
+            logger.error(f"Error loading achievements for {username}: {e}")
+            return {"error": str(e)}
+
+        values = {metric: state[0] for metric, state in progress.items()}
+        total_days = int(values.get("total_tracking_days", 0))
+        entries = values.get("total_entries", 0)
+        avg_score = values.get("score_total", 0) / entries if entries else 0
+
+        earned = [{**ACHIEVEMENTS_BY_ID[achievement_id], "xp_reward": RARITY_XP[ACHIEVEMENTS_BY_ID[achievement_id]["rarity"]],
+                   "earned_date": unlocked_at.isoformat() if unlocked_at else ""}
+                  for achievement_id, unlocked_at in unlocked if achievement_id in ACHIEVEMENTS_BY_ID]
+        earned_ids = {a["id"] for a in earned}
+        upcoming = [{**a, "progress": achievement_progress(a, values.get(a["metric"], 0))}
+                    for a in ACHIEVEMENTS if a["id"] not in earned_ids]
+        upcoming.sort(key=lambda a: a["progress"]["progress"], reverse=True)
+
+        by_rarity = {rarity: 0 for rarity in RARITY_XP}
+        for achievement in earned:
+            by_rarity[achievement["rarity"]] += 1
+
+        return {
+            "sovereignty_level": sovereignty_level(total_days, avg_score),
+            "achievements_earned": earned,
+            "progress_metrics": {
+                "total_tracking_days": total_days,
+                "total_meals_cooked": int(values.get("total_meals_cooked", 0)),
+                "total_exercise_minutes": int(values.get("total_exercise_minutes", 0)),
+                "total_sats_accumulated": int(values.get("total_sats_accumulated", 0)),
+                "total_btc_invested": round(values.get("total_btc_invested", 0), 2),
+                "best_score": int(values.get("best_score", 0)),
+                "current_streaks": {habit: _current_run(progress[f"{habit}_streak"], today)
+                                    if f"{habit}_streak" in progress else 0
+                                    for habit in STREAK_HABITS},
+                "longest_streaks": {habit: int(values.get(f"{habit}_streak", 0)) for habit in STREAK_HABITS},
+            },
+            "next_achievements": upcoming[:5],
+            "achievement_summary": {
+                "total_earned": len(earned),
+                "total_available": len(ACHIEVEMENTS),
+                "by_rarity": by_rarity,
+                "xp_from_achievements": sum(a["xp_reward"] for a in earned),
+            },
+        }
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Sovereignty achievements maintenance")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute progress from full history")
+    parser.add_argument("--user", help="Only this user")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        with get_db_connection() as conn:
+            conn.execute("BEGIN TRANSACTION")
+            results = rebuild_all(conn, [args.user] if args.user else None)
+            conn.execute("COMMIT")
+        for username, unlocked in results.items():
+            print(f"✅ {username}: {unlocked} new unlock(s)")
+    else:
+        parser.print_help()
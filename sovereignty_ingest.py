@@ -0,0 +1,173 @@
+# sovereignty_ingest.py
+"""
+Shared write path for daily sovereignty entries
+The Streamlit tracker, the CLI and the legacy CSV import all insert through
+here, so the column list and the cache invalidation live in one place.
+
+sovereignty holds one row per user per UTC day, keyed by (username,
+entry_date): submitting again on the same day replaces that day's row, and
+the derived state is then replayed instead of advanced.
+"""
+
+import os
+import csv
+import glob
+import logging
+from datetime import datetime
+
+from lazy_imports import lazy_import
+from preparedness_service import invalidate_preparedness
+from sovereignty_achievements import record_progress, rebuild_user
+from weekly_quests import record_quest_progress, replay_weekly_quest
+
+pd = lazy_import("pandas")  # Only the CSV import needs it
+
+logger = logging.getLogger(__name__)
+
+SOVEREIGNTY_COLUMNS = [
+    "timestamp", "username", "path",
+    "home_cooked_meals", "junk_food", "exercise_minutes", "strength_training",
+    "no_spending", "invested_bitcoin", "btc_usd", "btc_sats",
+    "meditation", "gratitude", "read_or_learned", "environmental_action", "score",
+]
+
+# Habit columns copied from an entry dict (everything but the bookkeeping fields)
+ENTRY_FIELDS = SOVEREIGNTY_COLUMNS[3:-1]
+
+# Habit order of the legacy CLI questions (new questions were appended over time)
+LEGACY_FIELD_ORDER = [
+    "home_cooked_meals", "junk_food", "exercise_minutes", "strength_training",
+    "no_spending", "invested_bitcoin", "meditation", "gratitude",
+    "read_or_learned", "environmental_action",
+]
+
+# entry_date is the UTC day of timestamp; a resubmit overwrites every other column
+_UPDATE_SET = ", ".join(f"{column} = excluded.{column}" for column in SOVEREIGNTY_COLUMNS if column != "username")
+
+_UPSERT_SQL = f"""
+    INSERT INTO sovereignty ({", ".join(SOVEREIGNTY_COLUMNS)}, entry_date)
+    VALUES ({", ".join(["?"] * len(SOVEREIGNTY_COLUMNS))}, CAST(? AS DATE))
+    ON CONFLICT (username, entry_date) DO UPDATE SET
+        {_UPDATE_SET}
+"""
+
+def entry_row(username, path, data, score, timestamp=None):
+    """Column values for one entry, in SOVEREIGNTY_COLUMNS order"""
+    return [timestamp or datetime.utcnow(), username, path] + \
+           [data.get(field) for field in ENTRY_FIELDS] + [int(score)]
+
+def store_entry(conn, username, path, data, score, timestamp):
+    """
+    Upsert one scored entry and drop the user's cached preparedness scores
+    Returns True when it replaced an earlier entry for the same day.
+    """
+    replaced = conn.execute(
+        "SELECT 1 FROM sovereignty WHERE username = ? AND entry_date = CAST(? AS DATE)", [username, timestamp]
+    ).fetchone() is not None
+    conn.execute(_UPSERT_SQL, entry_row(username, path, data, score, timestamp) + [timestamp])
+    # New entry changes habit consistency - drop today's cached scores
+    invalidate_preparedness(username, conn)
+    return replaced
+
+def apply_entry(conn, username, entry, timestamp, replaced=False):
+    """
+    Derived state for one stored entry (habit fields plus score): advance the
+    user's achievements and weekly quest; returns the achievements it unlocked
+    An entry that replaced an earlier one would be counted twice by advancing,
+    so the user's history and the week's quest are replayed instead.
+    """
+    if replaced:
+        unlocked = rebuild_user(conn, username)
+        replay_weekly_quest(conn, username, timestamp)
+        return unlocked
+    unlocked = record_progress(conn, username, entry, timestamp)
+    record_quest_progress(conn, username, entry, timestamp)
+    return unlocked
+
+def record_entry(conn, username, path, data, score, timestamp=None):
+    """
+    Insert one scored entry and apply its derived state inline; returns the
+    achievements it unlocked (the web form goes through entry_events instead)
+    """
+    timestamp = timestamp or datetime.utcnow()
+    replaced = store_entry(conn, username, path, data, score, timestamp)
+    return apply_entry(conn, username, {**data, "score": score}, timestamp, replaced)
+
+def _legacy_value(column, text):
+    if text in ("", None):
+        return None
+    if column in ("home_cooked_meals", "exercise_minutes"):
+        return int(float(text))
+    return text.strip().lower() in ("true", "1", "y", "yes")
+
+def read_history_csv(csv_path, username=None):
+    """
+    Yield entry rows (SOVEREIGNTY_COLUMNS order, path unset) from a legacy CSV
+    main.py wrote [timestamp, (username,) habits..., score] and grew new habit
+    questions over time without rewriting the header, so rows are mapped by
+    position against LEGACY_FIELD_ORDER rather than by header name.
+    """
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        has_username = len(header) > 1 and header[1] == "username"
+        for values in reader:
+            if len(values) < 3:
+                continue
+            user = (values[1] if has_username else None) or username
+            if not user:
+                raise ValueError(f"{csv_path} has no username column; pass a username")
+            habits = dict(zip(LEGACY_FIELD_ORDER, values[2 if has_username else 1:-1]))
+            yield [datetime.fromisoformat(values[0]), user, None] + \
+                  [_legacy_value(field, habits.get(field)) for field in ENTRY_FIELDS] + \
+                  [int(float(values[-1]))]
+
+def import_history_csv(conn, csv_path, username=None, path="default"):
+    """
+    Bulk-load one legacy main.py history CSV into sovereignty
+    Older files have no username column; `username` (or the name in
+    history_<user>.csv) fills it. Like a resubmit, the latest row of each
+    day wins, both within the file and against stored rows, so re-running is
+    safe. Returns rows inserted or replaced.
+    """
+    if username is None:
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        username = stem[len("history_"):] if stem.startswith("history_") else None
+
+    incoming = pd.DataFrame(list(read_history_csv(csv_path, username)), columns=SOVEREIGNTY_COLUMNS)
+    if incoming.empty:
+        return 0
+    incoming["path"] = path
+
+    conn.register("incoming_history", incoming)
+    try:
+        inserted = conn.execute(f"""
+            INSERT INTO sovereignty ({", ".join(SOVEREIGNTY_COLUMNS)}, entry_date)
+            SELECT {", ".join(SOVEREIGNTY_COLUMNS)}, CAST(timestamp AS DATE) FROM incoming_history
+            QUALIFY row_number() OVER (PARTITION BY username, CAST(timestamp AS DATE) ORDER BY timestamp DESC) = 1
+            ON CONFLICT (username, entry_date) DO UPDATE SET
+                {_UPDATE_SET}
+            WHERE excluded.timestamp > sovereignty.timestamp
+        """).fetchone()[0]
+    finally:
+        conn.unregister("incoming_history")
+
+    for user in incoming["username"].unique():
+        invalidate_preparedness(user, conn)
+        # Imported rows are backdated, so achievements are replayed rather than advanced
+        if inserted:
+            rebuild_user(conn, user)
+
+    logger.info(f"Imported {inserted} rows from {csv_path}")
+    return inserted
+
+def import_history_dir(conn, data_dir, username=None, path="default"):
+    """Import every history*.csv in `data_dir`; returns {file: rows inserted}"""
+    results = {}
+    for csv_path in sorted(glob.glob(os.path.join(data_dir, "history*.csv"))):
+        try:
+            results[csv_path] = import_history_csv(conn, csv_path, username, path)
+        except ValueError as e:
+            logger.warning(f"Skipping {csv_path}: {e}")
+            results[csv_path] = None
+    return results
@@ -0,0 +1,214 @@
+# table_rewrite.py
+"""
+Chunked, resumable rewrites of large tables
+For schema changes that need a table rebuilt (column order, types, cleanup),
+rewrite_table() copies the source into a new table in timestamp-range chunks,
+each in its own short transaction, instead of one INSERT ... SELECT holding
+the whole table. Rows that fail the rewrite's checks go to a quarantine table
+with the reason instead of being dropped. The cursor is saved after every
+chunk in table_rewrites, so an interrupted rewrite picks up where it stopped.
+
+The cut-over runs in one transaction: it copies rows written since the last
+chunk, checks that row counts and a content checksum of source and
+target + quarantine agree, then swaps the tables.
+"""
+
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 50_000
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+def _table_exists(conn, table):
+    return conn.execute("""
+        SELECT 1 FROM information_schema.tables WHERE table_schema = 'main' AND table_name = ?
+    """, [table]).fetchone() is not None
+
+def _column_types(conn, table):
+    return dict(conn.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = 'main' AND table_name = ?
+        ORDER BY ordinal_position
+    """, [table]).fetchall())
+
+def _range_sql(order_column, lower, upper):
+    """WHERE clause and params for lower < order_column <= upper; upper=None means 'everything after lower'"""
+    column = _quote(order_column)
+    conditions, params = [], []
+    if lower is not None:
+        conditions.append(f"{column} > ?")
+        params.append(lower)
+    if upper is not None:
+        conditions.append(f"{column} <= ?")
+        params.append(upper)
+        return " AND ".join(conditions), params
+    # Final catch-up also takes rows with no timestamp, which no range can reach
+    after = " AND ".join(conditions) or "TRUE"
+    return f"(({after}) OR {column} IS NULL)", params
+
+def _load_state(conn, name):
+    row = conn.execute(
+        "SELECT cursor, copied, quarantined, status FROM table_rewrites WHERE name = ?", [name]
+    ).fetchone()
+    return dict(zip(("cursor", "copied", "quarantined", "status"), row)) if row else None
+
+def rewrite_table(conn, name, table, create_sql, columns, checks=(), order_column="timestamp",
+                  chunk_rows=CHUNK_ROWS, post_sql=(), after_swap=None, keep_source=False, restart=False,
+                  progress=None):
+    """
+    Rebuild `table` through a new table, `chunk_rows` rows per transaction
+    name:       identifies the rewrite (resume key and quarantine table prefix)
+    create_sql: CREATE TABLE statement with a {target} placeholder
+    columns:    {target column: source SQL expression}
+    checks:     [(reason, predicate)] every copied row must satisfy; rows that
+                fail one go to <name>_quarantine with the first failing reason
+    post_sql:   statements run after the swap (indexes, constraints)
+    after_swap: called with (conn, quarantine table) in the cut-over
+                transaction, to rebuild state derived from quarantined rows
+    progress:   called with the stats dict after each chunk
+    Returns the stats dict. Raises if verification fails; the source table is
+    then untouched and the rewrite can be resumed or restarted.
+    """
+    target, quarantine = f"{table}__{name}", f"{name}_quarantine"
+    source_sql, target_sql, quarantine_sql = _quote(table), _quote(target), _quote(quarantine)
+
+    state = _load_state(conn, name)
+    if state and state["status"] == "done" and not restart:
+        logger.info(f"Rewrite {name} already completed")
+        return {"name": name, "status": "done", "copied": state["copied"], "quarantined": state["quarantined"]}
+
+    if restart or state is None or not _table_exists(conn, target):
+        conn.execute("BEGIN TRANSACTION")
+        conn.execute(f"DROP TABLE IF EXISTS {target_sql}")
+        conn.execute(f"DROP TABLE IF EXISTS {quarantine_sql}")
+        conn.execute(create_sql.format(target=target_sql))
+        conn.execute(f"CREATE TABLE {quarantine_sql} AS SELECT * FROM {target_sql} LIMIT 0")
+        conn.execute(f"ALTER TABLE {quarantine_sql} ADD COLUMN reason VARCHAR")
+        conn.execute(f"ALTER TABLE {quarantine_sql} ADD COLUMN quarantined_at TIMESTAMP")
+        conn.execute("DELETE FROM table_rewrites WHERE name = ?", [name])
+        conn.execute("""
+            INSERT INTO table_rewrites (name, source, target, cursor, copied, quarantined, status)
+            VALUES (?, ?, ?, NULL, 0, 0, 'copying')
+        """, [name, table, target])
+        conn.execute("COMMIT")
+        state = _load_state(conn, name)
+    else:
+        logger.info(f"Resuming rewrite {name} after {state['cursor']} ({state['copied']:,} rows copied)")
+
+    target_columns = ", ".join(_quote(column) for column in columns)
+    select_list = ", ".join(columns.values())
+    valid = "COALESCE(" + " AND ".join(f"({predicate})" for _, predicate in checks) + ", FALSE)" if checks else "TRUE"
+    reason = "CASE " + " ".join(f"WHEN NOT COALESCE(({predicate}), FALSE) THEN '{label}'"
+                                for label, predicate in checks) + " END" if checks else "NULL"
+
+    stats = {"name": name, "status": "copying", "source_rows": conn.execute(f"SELECT COUNT(*) FROM {source_sql}").fetchone()[0],
+             "copied": state["copied"], "quarantined": state["quarantined"], "chunks": 0, "seconds": 0.0}
+    started = time.perf_counter()
+
+    def copy_range(lower, upper):
+        where, params = _range_sql(order_column, lower, upper)
+        copied = conn.execute(f"""
+            INSERT INTO {target_sql} ({target_columns})
+            SELECT {select_list} FROM {source_sql} WHERE {where} AND {valid}
+        """, params).fetchone()[0]
+        quarantined = conn.execute(f"""
+            INSERT INTO {quarantine_sql} ({target_columns}, reason, quarantined_at)
+            SELECT {select_list}, {reason}, CURRENT_TIMESTAMP FROM {source_sql} WHERE {where} AND NOT {valid}
+        """, params).fetchone()[0]
+        stats["copied"] += copied
+        stats["quarantined"] += quarantined
+        conn.execute("""
+            UPDATE table_rewrites SET cursor = ?, copied = ?, quarantined = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE name = ?
+        """, [upper if upper is not None else state["cursor"], stats["copied"], stats["quarantined"], name])
+
+    # Chunk boundaries in one sorted pass: every chunk_rows-th timestamp after the cursor
+    order_sql = _quote(order_column)
+    if state["cursor"] is not None:
+        lower_where, lower_params = f"WHERE {order_sql} > ?", [state["cursor"]]
+    else:
+        lower_where, lower_params = f"WHERE {order_sql} IS NOT NULL", []
+    bounds = [bound for (bound,) in conn.execute(f"""
+        SELECT {order_sql} FROM (
+            SELECT {order_sql}, row_number() OVER (ORDER BY {order_sql}) AS n FROM {source_sql} {lower_where}
+        ) WHERE n % ? = 0 ORDER BY n
+    """, lower_params + [chunk_rows]).fetchall()]
+
+    for upper in bounds:
+        if state["cursor"] is not None and upper <= state["cursor"]:
+            continue  # Ties at a boundary were copied with the previous chunk
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            copy_range(state["cursor"], upper)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            state.update(_load_state(conn, name))
+            raise
+        state["cursor"] = upper
+        stats["chunks"] += 1
+        stats["seconds"] = round(time.perf_counter() - started, 2)
+        (progress or _log_progress)(dict(stats))
+
+    # Cut-over: catch up, verify and swap atomically
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        copy_range(state["cursor"], None)
+        verify_rewrite(conn, table, target, quarantine, columns)
+        if keep_source:
+            conn.execute(f"ALTER TABLE {source_sql} RENAME TO {_quote(f'{table}_pre_{name}')}")
+        else:
+            conn.execute(f"DROP TABLE {source_sql}")
+        conn.execute(f"ALTER TABLE {target_sql} RENAME TO {source_sql}")
+        for statement in post_sql:
+            conn.execute(statement)
+        if after_swap is not None:
+            after_swap(conn, quarantine)
+        conn.execute("""
+            UPDATE table_rewrites SET status = 'done', copied = ?, quarantined = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE name = ?
+        """, [stats["copied"], stats["quarantined"], name])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    stats.update(status="done", seconds=round(time.perf_counter() - started, 2))
+    logger.info(f"✅ Rewrite {name} complete: {stats['copied']:,} rows copied, "
+                f"{stats['quarantined']:,} quarantined in {quarantine}")
+    return stats
+
+def verify_rewrite(conn, table, target, quarantine, columns):
+    """
+    Raise unless every source row is in target or quarantine, by count and by
+    a checksum of the rewritten column values
+    """
+    types = _column_types(conn, target)
+    projected = ", ".join(f"CAST({expression} AS {types[column]})" for column, expression in columns.items())
+    rewritten = ", ".join(_quote(column) for column in columns)
+
+    source_rows, source_sum = conn.execute(
+        f"SELECT COUNT(*), COALESCE(SUM(hash({projected})), 0) FROM {_quote(table)}"
+    ).fetchone()
+    target_rows, target_sum = conn.execute(f"""
+        SELECT COUNT(*), COALESCE(SUM(hash({rewritten})), 0) FROM (
+            SELECT {rewritten} FROM {_quote(target)}
+            UNION ALL
+            SELECT {rewritten} FROM {_quote(quarantine)}
+        )
+    """).fetchone()
+
+    if source_rows != target_rows:
+        raise ValueError(f"Row count mismatch rewriting {table}: {source_rows:,} source rows, "
+                         f"{target_rows:,} copied + quarantined (rows written behind the cursor? rerun with restart=True)")
+    if source_sum != target_sum:
+        raise ValueError(f"Checksum mismatch rewriting {table}: rows were lost or changed during the copy")
+
+def _log_progress(stats):
+    pct = 100 * (stats["copied"] + stats["quarantined"]) / stats["source_rows"] if stats["source_rows"] else 100
+    logger.info(f"📦 {stats['name']}: {stats['copied']:,} copied, {stats['quarantined']:,} quarantined "
+                f"({pct:.0f}%, chunk {stats['chunks']}, {stats['seconds']}s)")
@@ -9,6 +9,11 @@ CONFIG_FILE = os.path.join(BASE_DIR, "config", "paths.json")
 with open(CONFIG_FILE, "r", encoding="utf-8") as f:
     ALL_PATHS = json.load(f)
 
+BOOLEAN_HABITS = [
+    "strength_training", "no_spending", "invested_bitcoin",
+    "meditation", "gratitude", "read_or_learned", "environmental_action"
+]
+
 def calculate_daily_score(data: dict, path: str = "default") -> int:
     if path not in ALL_PATHS:
         raise ValueError(f"Unknown scoring path: {path}")
@@ -33,12 +38,39 @@ def calculate_daily_score(data: dict, path: str = "default") -> int:
         score += minutes * ex_cfg.get("points_per_unit", 0)
 
     # Booleans
-    for key in [
-        "strength_training", "no_spending", "invested_bitcoin",
-        "meditation", "gratitude", "read_or_learned", "environmental_action"
-    ]:
+    for key in BOOLEAN_HABITS:
         if key in config and data.get(key, False):
             score += config[key]
 
     # Final cap and rounding
     return min(round(score), config.get("max_score", 100))
+
+def _path_score_sql(config: dict) -> str:
+    """calculate_daily_score for one path as a SQL expression over the entry columns"""
+    terms = []
+    for key in ("home_cooked_meals", "exercise_minutes"):
+        if key in config:
+            cfg = config[key]
+            terms.append(f"LEAST(COALESCE({key}, 0), {cfg.get('max_units', 0)}) * "
+                         f"CAST({cfg.get('points_per_unit', 0)!r} AS DOUBLE)")
+    if "no_junk_food" in config:
+        terms.append(f"CASE WHEN COALESCE(junk_food, FALSE) THEN 0 ELSE {config['no_junk_food']} END")
+    for key in BOOLEAN_HABITS:
+        if key in config:
+            terms.append(f"CASE WHEN COALESCE({key}, FALSE) THEN {config[key]} ELSE 0 END")
+    total = " + ".join(terms) or "0"
+    # round_even matches Python's round() on .5
+    return f"LEAST(CAST(round_even(CAST({total} AS DOUBLE), 0) AS INTEGER), {config.get('max_score', 100)})"
+
+def daily_score_sql(path_column: str = "path", paths: dict = None) -> str:
+    """
+    calculate_daily_score as one vectorised SQL CASE over `path_column`, so
+    DuckDB can score whole tables in a single scan. NULL for unknown paths
+    (where calculate_daily_score raises).
+    """
+    paths = ALL_PATHS if paths is None else paths
+    branches = " ".join(
+        "WHEN '" + name.replace("'", "''") + f"' THEN {_path_score_sql(config)}"
+        for name, config in paths.items()
+    )
+    return f"(CASE {path_column} {branches} END)"
@@ -0,0 +1,271 @@
+# weekly_quests.py
+"""
+Weekly quests, advanced incrementally
+Each user gets one quest per week (Monday start), picked from their path's
+pool by a generator seeded with (username, week) and stored in
+weekly_quest_progress. Quest types are metrics in the same kinds as the
+achievements (days / count / sum, see sovereignty_achievements.advance), fed
+by new sovereignty entries and daily challenge completions as they are
+recorded. When progress reaches the target the quest is marked complete and
+its XP awarded in the same transaction, exactly once.
+
+The dashboard reads a quest back with one primary-key lookup. A quest created
+mid-week (first view of the week) replays that week's entries once.
+"""
+
+import random
+import hashlib
+import logging
+from datetime import date, datetime, timedelta
+
+from event_calendar import event_multiplier
+from leaderboard import record_xp
+from xp_schema import xp_columns
+from sovereignty_achievements import advance
+
+logger = logging.getLogger(__name__)
+
+# Quest pool by path
+WEEKLY_QUESTS = {
+    "financial_path": [
+        {"name": "💰 The Minimalist", "description": "Spend $0 on discretionary items for 5 days", "target": 5, "xp": 100, "type": "no_spending_days"},
+        {"name": "₿ The Accumulator", "description": "Stack sats 4 times this week", "target": 4, "xp": 120, "type": "bitcoin_days"},
+        {"name": "🍳 The Saver", "description": "Cook 15+ meals to maximize savings", "target": 15, "xp": 80, "type": "meals_cooked"},
+        {"name": "📚 The Student", "description": "Learn about finance/investing 5 days", "target": 5, "xp": 90, "type": "learning_days"}
+    ],
+    "physical_optimization": [
+        {"name": "💪 The Beast", "description": "Strength train 4+ times this week", "target": 4, "xp": 120, "type": "strength_days"},
+        {"name": "🍳 The Chef", "description": "Cook 20+ high-protein meals", "target": 20, "xp": 100, "type": "meals_cooked"},
+        {"name": "🏃 The Athlete", "description": "Exercise 6 days with 30+ minutes each", "target": 6, "xp": 110, "type": "exercise_days"},
+        {"name": "🚫 The Disciplined", "description": "Zero junk food for entire week", "target": 7, "xp": 90, "type": "clean_eating_days"}
+    ],
+    "mental_resilience": [
+        {"name": "🧘‍♂️ The Monk", "description": "Meditate every single day", "target": 7, "xp": 120, "type": "meditation_days"},
+        {"name": "📚 The Scholar", "description": "Learn something new 6 days", "target": 6, "xp": 100, "type": "learning_days"},
+        {"name": "🙏 The Grateful", "description": "Practice gratitude daily", "target": 7, "xp": 80, "type": "gratitude_days"},
+        {"name": "⚡ The Focused", "description": "Achieve 80+ score 4 times", "target": 4, "xp": 110, "type": "high_score_days"}
+    ],
+    "spiritual_growth": [
+        {"name": "🌅 The Mindful", "description": "Meditate and practice gratitude daily", "target": 7, "xp": 130, "type": "mindful_days"},
+        {"name": "🌍 The Steward", "description": "Environmental action 5 days", "target": 5, "xp": 100, "type": "environmental_days"},
+        {"name": "📝 The Reflective", "description": "Deep reflection/journaling 4 days", "target": 4, "xp": 90, "type": "reflection_days"},
+        {"name": "🍽️ The Conscious", "description": "Mindful eating all week", "target": 7, "xp": 80, "type": "mindful_eating_days"}
+    ],
+    "planetary_stewardship": [
+        {"name": "🌍 The Guardian", "description": "Environmental action every day", "target": 7, "xp": 130, "type": "environmental_days"},
+        {"name": "♻️ The Zero-Waster", "description": "Minimal waste 6 days", "target": 6, "xp": 110, "type": "zero_waste_days"},
+        {"name": "🥬 The Locavore", "description": "Local/organic food choices daily", "target": 7, "xp": 100, "type": "local_food_days"},
+        {"name": "🚲 The Green Commuter", "description": "Walk/bike 5 times instead of driving", "target": 5, "xp": 90, "type": "green_transport_days"}
+    ],
+    "default": [
+        {"name": "🎯 The Balanced", "description": "Score 70+ points for 5 days", "target": 5, "xp": 120, "type": "balanced_days"},
+        {"name": "🔥 The Consistent", "description": "Track everything 7 days straight", "target": 7, "xp": 100, "type": "tracking_days"},
+        {"name": "⭐ The Achiever", "description": "Complete 20+ daily activities", "target": 20, "xp": 90, "type": "activity_count"},
+        {"name": "🚀 The Improver", "description": "Beat your average score 4 times", "target": 4, "xp": 110, "type": "improvement_days"}
+    ]
+}
+
+# Quest type -> metric. Specs with a source count daily challenge completions
+# (optionally of one challenge type); the rest count sovereignty entries.
+# min "average" is resolved per quest to beat the user's pre-week average.
+QUEST_METRICS = {
+    "no_spending_days": {"kind": "days", "field": "no_spending"},
+    "bitcoin_days": {"kind": "days", "field": "invested_bitcoin"},
+    "meals_cooked": {"kind": "sum", "field": "home_cooked_meals"},
+    "learning_days": {"kind": "days", "field": "read_or_learned"},
+    "strength_days": {"kind": "days", "field": "strength_training"},
+    "exercise_days": {"kind": "days", "field": "exercise_minutes", "min": 30},
+    "clean_eating_days": {"kind": "days", "field": "no_junk_food"},
+    "meditation_days": {"kind": "days", "field": "meditation"},
+    "gratitude_days": {"kind": "days", "field": "gratitude"},
+    "high_score_days": {"kind": "days", "field": "score", "min": 80},
+    "mindful_days": {"kind": "days", "field": "mindful"},
+    "environmental_days": {"kind": "days", "field": "environmental_action"},
+    "balanced_days": {"kind": "days", "field": "score", "min": 70},
+    "tracking_days": {"kind": "days"},
+    "improvement_days": {"kind": "days", "field": "score", "min": "average"},
+    "activity_count": {"kind": "count", "source": "daily_challenge"},
+    "reflection_days": {"kind": "days", "source": "daily_challenge", "challenge_type": "reflection"},
+    "mindful_eating_days": {"kind": "days", "source": "daily_challenge", "challenge_type": "mindful_eating"},
+    "zero_waste_days": {"kind": "days", "source": "daily_challenge", "challenge_type": "zero_waste"},
+    "local_food_days": {"kind": "days", "source": "daily_challenge", "challenge_type": "local_food"},
+    "green_transport_days": {"kind": "days", "source": "daily_challenge", "challenge_type": "walk_bike"},
+}
+
+_QUEST_COLUMNS = ["quest_id", "user_name", "week_start", "quest_type", "name", "description",
+                  "progress", "target", "completed", "xp_reward", "min_value", "last_day"]
+
+def week_start(day=None):
+    day = day or date.today()
+    return day - timedelta(days=day.weekday())
+
+def _quest_id(username, week):
+    return f"{username}:{week.isoformat()}"
+
+def select_quest(username, path, week):
+    """Deterministically pick `username`'s quest for the week starting `week`"""
+    digest = hashlib.sha256(f"{username}|{week.isoformat()}".encode("utf-8")).digest()
+    rng = random.Random(int.from_bytes(digest[:8], "big"))
+    return rng.choice(WEEKLY_QUESTS.get(path, WEEKLY_QUESTS["default"]))
+
+def _entry_event(entry):
+    """Sovereignty entry plus the derived flags quests count"""
+    return {**entry,
+            "no_junk_food": not entry.get("junk_food"),
+            "mindful": bool(entry.get("meditation") and entry.get("gratitude"))}
+
+def _spec(quest):
+    spec = QUEST_METRICS[quest["quest_type"]]
+    if spec.get("min") == "average":
+        spec = {**spec, "min": quest["min_value"] or 1}
+    return spec
+
+def _applies(spec, event):
+    if "source" not in spec:
+        return "source" not in event
+    return event.get("source") == spec["source"] and \
+        spec.get("challenge_type") in (None, event.get("challenge_type"))
+
+def _load_quest(conn, quest_id):
+    row = conn.execute(
+        f"SELECT {', '.join(_QUEST_COLUMNS)} FROM weekly_quest_progress WHERE quest_id = ?", [quest_id]
+    ).fetchone()
+    return dict(zip(_QUEST_COLUMNS, row)) if row else None
+
+def _award_xp(conn, username, xp, reference_id, description):
+    """Insert quest XP into whichever xp_transactions layout this database has; False if already awarded"""
+    columns = xp_columns(conn, "xp_transactions")
+    if not columns:
+        return False
+    awarded_at = datetime.now()
+    transaction_id = f"{username}_weekly_quest_{awarded_at.strftime('%Y%m%d_%H%M%S')}_{hashlib.sha1(reference_id.encode()).hexdigest()[:8]}"
+    inserted = conn.execute(f"""
+        INSERT OR IGNORE INTO xp_transactions
+        ({columns["id"]}, user_name, {columns["xp"]}, {columns["source"]}, {columns["description"]},
+         {columns["reference"]}, {columns["time"]})
+        VALUES (?, ?, ?, 'weekly_quest', ?, ?, ?)
+    """, [transaction_id, username, xp, description, reference_id, awarded_at]).fetchone()[0]
+    if inserted:
+        record_xp(conn, username, xp, awarded_at)
+    return bool(inserted)
+
+def _save(conn, quest, value, last_day):
+    """Store new progress; completes the quest and awards its XP the first time it reaches the target"""
+    conn.execute("""
+        UPDATE weekly_quest_progress SET progress = ?, last_day = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE quest_id = ?
+    """, [int(value), last_day, quest["quest_id"]])
+    quest.update(progress=int(value), last_day=last_day)
+    if quest["completed"] or quest["progress"] < quest["target"]:
+        return False
+
+    # The NOT completed guard makes the award happen once even if two writers race here
+    flipped = conn.execute("""
+        UPDATE weekly_quest_progress SET completed = TRUE, completed_at = CURRENT_TIMESTAMP
+        WHERE quest_id = ? AND NOT completed
+    """, [quest["quest_id"]]).fetchone()[0]
+    quest["completed"] = True
+    if not flipped:
+        return False
+    xp = round(quest["xp_reward"] * event_multiplier("weekly_quest", last_day))
+    _award_xp(conn, quest["user_name"], xp, f"quest_{quest['quest_id']}", f"Weekly Quest: {quest['name']}")
+    logger.info(f"🏆 {quest['user_name']} completed weekly quest {quest['name']} (+{xp} XP)")
+    return True
+
+def _week_events(conn, quest, spec):
+    """(timestamp, event) for the quest's week, oldest first"""
+    username, start = quest["user_name"], quest["week_start"]
+    bounds = [username, datetime.combine(start, datetime.min.time()),
+              datetime.combine(start + timedelta(days=7), datetime.min.time())]
+    if "source" not in spec:
+        result = conn.execute("""
+            SELECT * FROM sovereignty
+            WHERE username = ? AND timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp
+        """, bounds)
+        columns = [d[0] for d in result.description]
+        return [(row["timestamp"], _entry_event(row)) for row in (dict(zip(columns, r)) for r in result.fetchall())]
+
+    # Completions: xp_system and the dashboard's simple XP tables name the columns differently
+    columns = xp_columns(conn, "daily_challenge_completion")
+    if not columns:
+        return []
+    type_column, time_column = columns["type"], columns["time"]
+    return [(completed, {"source": "daily_challenge", "challenge_type": challenge_type})
+            for completed, challenge_type in conn.execute(f"""
+                SELECT {time_column}, {type_column} FROM daily_challenge_completion
+                WHERE user_name = ? AND {time_column} >= ? AND {time_column} < ?
+                ORDER BY {time_column}
+            """, bounds).fetchall()]
+
+def _replay(conn, quest):
+    """Recompute a quest from its week's raw rows"""
+    spec = _spec(quest)
+    state = None
+    for timestamp, event in _week_events(conn, quest, spec):
+        state = advance(spec, state, event, timestamp.date()) or state
+    value, _, last_day = state or (0, 0, None)
+    return _save(conn, quest, value, last_day)
+
+def get_weekly_quest(conn, username, path, day=None):
+    """
+    This week's quest for `username`: one primary-key read, or on the first
+    call of the week, create it and count the week's entries so far
+    """
+    week = week_start(day)
+    quest_id = _quest_id(username, week)
+    quest = _load_quest(conn, quest_id)
+    if quest is None:
+        chosen = select_quest(username, path, week)
+        min_value = None
+        if QUEST_METRICS[chosen["type"]].get("min") == "average":
+            average = conn.execute("""
+                SELECT AVG(score) FROM sovereignty WHERE username = ? AND timestamp < ?
+            """, [username, datetime.combine(week, datetime.min.time())]).fetchone()[0]
+            min_value = int(average) + 1 if average is not None else None  # Beat the average
+        conn.execute("""
+            INSERT INTO weekly_quest_progress
+            (quest_id, user_name, week_start, quest_type, name, description, progress, target, completed, xp_reward, min_value)
+            VALUES (?, ?, ?, ?, ?, ?, 0, ?, FALSE, ?, ?)
+            ON CONFLICT DO NOTHING
+        """, [quest_id, username, week, chosen["type"], chosen["name"], chosen["description"],
+              chosen["target"], chosen["xp"], min_value])
+        quest = _load_quest(conn, quest_id)
+        _replay(conn, quest)
+
+    return {**quest, "type": quest["quest_type"], "xp": quest["xp_reward"]}
+
+def replay_weekly_quest(conn, username, timestamp=None):
+    """Recount `username`'s quest for the week of `timestamp` after an entry was replaced; True if that completed it"""
+    timestamp = timestamp or datetime.now()
+    day = timestamp.date() if isinstance(timestamp, datetime) else timestamp
+    quest = _load_quest(conn, _quest_id(username, week_start(day)))
+    if quest is None or quest["completed"]:
+        return False
+    return _replay(conn, quest)
+
+def record_quest_progress(conn, username, event, timestamp=None):
+    """
+    Advance `username`'s quest for the event's week with one sovereignty
+    entry (habit fields plus score) or challenge completion
+    ({"source": "daily_challenge", "challenge_type": ...}). Returns True if
+    this completed the quest. Weeks without a quest yet are skipped: the
+    quest counts them when it is created.
+    """
+    timestamp = timestamp or datetime.now()
+    day = timestamp.date() if isinstance(timestamp, datetime) else timestamp
+    quest = _load_quest(conn, _quest_id(username, week_start(day)))
+    if quest is None or quest["completed"]:
+        return False
+
+    spec = _spec(quest)
+    event = event if "source" in event else _entry_event(event)
+    if not _applies(spec, event):
+        return False
+    if quest["last_day"] is not None and day < quest["last_day"]:
+        return _replay(conn, quest)  # Out-of-order within the week
+
+    state = advance(spec, (quest["progress"], 0, quest["last_day"]), event, day)
+    if state is None:
+        return False
+    return _save(conn, quest, state[0], state[2])
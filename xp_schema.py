@@ -0,0 +1,61 @@
+# xp_schema.py
+"""
+Column names of the two XP table layouts
+The Dashboard's SimpleXPEngine and xp_system's XPTransactionEngine store the
+same facts under different column names, and a database has whichever layout
+created its tables first (the live database has the Dashboard's). Code that
+reads or writes XP rows resolves the names here instead of assuming a layout.
+"""
+
+# layout -> table -> role -> column
+XP_LAYOUTS = {
+    "simple": {  # pages/3_Dashboard.py SimpleXPEngine
+        "xp_transactions": {
+            "id": "txn_id", "xp": "xp_points", "source": "xp_source", "description": "xp_description",
+            "reference": "xp_reference", "multiplier": "xp_multiplier", "time": "created_at",
+        },
+        "daily_challenge_completion": {
+            "id": "comp_id", "challenge": "challenge_ref", "type": "challenge_category",
+            "xp": "points_earned", "time": "completion_time",
+        },
+    },
+    "engine": {  # xp_system.XPTransactionEngine
+        "xp_transactions": {
+            "id": "transaction_id", "xp": "xp_amount", "source": "source", "description": "description",
+            "reference": "reference_id", "multiplier": "multiplier", "time": "timestamp",
+        },
+        "daily_challenge_completion": {
+            "id": "completion_id", "challenge": "challenge_id", "type": "challenge_type",
+            "xp": "xp_reward", "time": "completed_at",
+        },
+    },
+}
+
+def table_layout(conn, table):
+    """'simple' or 'engine' for `table` in this database, None if it doesn't exist"""
+    columns = {column for (column,) in conn.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'main' AND table_name = ?
+    """, [table]).fetchall()}
+    for layout, tables in XP_LAYOUTS.items():
+        if tables[table]["xp"] in columns:
+            return layout
+    return None
+
+def xp_columns(conn, table):
+    """{role: column} for `table` in this database's layout, None if it doesn't exist"""
+    layout = table_layout(conn, table)
+    return XP_LAYOUTS[layout][table] if layout else None
+
+# layout -> table -> (index name, columns): one award per reference, one
+# completion per challenge per day, so repeated clicks insert nothing
+IDEMPOTENCY_INDEXES = {
+    "simple": {
+        "xp_transactions": ("idx_simple_xp_reference", ["user_name", "xp_reference"]),
+        "daily_challenge_completion": ("idx_simple_challenge_day", ["user_name", "challenge_ref", "completion_date"]),
+    },
+    "engine": {
+        "xp_transactions": ("idx_xp_transactions_reference", ["user_name", "reference_id"]),
+        "daily_challenge_completion": ("idx_challenge_completion_day", ["user_name", "challenge_id", "completion_date"]),
+    },
+}
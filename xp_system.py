@@ -5,10 +5,15 @@ COMPLETE FIXED VERSION - Replace your existing xp_system.py with this
 """
 
 import uuid
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import duckdb
 import os
 import logging
+from event_calendar import CALENDAR, event_multiplier
+from leaderboard import LeaderboardEngine, record_xp, rebuild_buckets
+from schema_migrations import migrate
+from xp_schema import xp_columns
+from weekly_quests import record_quest_progress
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -32,116 +37,70 @@ class XPTransactionEngine:
         self.db_path = db_path
         logger.info(f"XP Engine using database: {db_path}")
         self._init_tables()
+        self.leaderboard = LeaderboardEngine(db_path)
     
     def _init_tables(self):
-        """Initialize XP system tables with proper constraints - FIXED VERSION"""
+        """
+        Bring the schema up to date (a version check when already current)
+        The XP tables belong to migration 0012 and keep whichever layout they
+        were created with; queries resolve column names through xp_schema.
+        """
         try:
             with duckdb.connect(self.db_path) as conn:
-                logger.info("Initializing XP system tables...")
-                
-                # Drop existing tables to fix constraint issues
-                conn.execute("DROP TABLE IF EXISTS xp_transactions")
-                conn.execute("DROP TABLE IF EXISTS daily_challenge_completion") 
-                conn.execute("DROP TABLE IF EXISTS weekly_quest_progress")
-                conn.execute("DROP TABLE IF EXISTS achievement_unlocks")
-                
-                # Create xp_transactions table with simple, working structure
-                conn.execute("""
-                    CREATE TABLE xp_transactions (
-                        transaction_id VARCHAR PRIMARY KEY,
-                        user_name VARCHAR NOT NULL,
-                        xp_amount INTEGER NOT NULL,
-                        source VARCHAR NOT NULL,
-                        description TEXT,
-                        reference_id VARCHAR,
-                        multiplier REAL DEFAULT 1.0,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                # Create daily_challenge_completion table with simple structure
-                conn.execute("""
-                    CREATE TABLE daily_challenge_completion (
-                        completion_id VARCHAR PRIMARY KEY,
-                        user_name VARCHAR NOT NULL,
-                        challenge_id VARCHAR NOT NULL,
-                        challenge_type VARCHAR NOT NULL,
-                        xp_reward INTEGER NOT NULL,
-                        completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                # Create weekly_quest_progress table
-                conn.execute("""
-                    CREATE TABLE weekly_quest_progress (
-                        quest_id VARCHAR PRIMARY KEY,
-                        user_name VARCHAR NOT NULL,
-                        week_start DATE NOT NULL,
-                        quest_type VARCHAR NOT NULL,
-                        progress INTEGER DEFAULT 0,
-                        target INTEGER NOT NULL,
-                        completed BOOLEAN DEFAULT FALSE,
-                        xp_reward INTEGER,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                # Create achievement_unlocks table
-                conn.execute("""
-                    CREATE TABLE achievement_unlocks (
-                        unlock_id VARCHAR PRIMARY KEY,
-                        user_name VARCHAR NOT NULL,
-                        achievement_id VARCHAR NOT NULL,
-                        xp_reward INTEGER NOT NULL,
-                        unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                logger.info("✅ XP system tables created successfully")
-                
+                migrate(conn)
         except Exception as e:
             logger.error(f"❌ Error initializing XP tables: {e}")
             raise
     
-    def award_xp(self, user_name, xp_amount, source, description="", reference_id=None, multiplier=1.0):
-        """Award XP to a user with proper ID handling - FIXED VERSION"""
+    def _insert_xp(self, conn, user_name, xp_amount, source, description, reference_id, multiplier):
+        """Insert one XP transaction; the (user_name, reference_id) index makes repeats a no-op"""
+        transaction_id = f"{user_name}_{source}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        final_xp = int(xp_amount * multiplier)
+        awarded_at = datetime.now()
+        
+        x = xp_columns(conn, "xp_transactions")
+        inserted = conn.execute(f"""
+            INSERT OR IGNORE INTO xp_transactions 
+            ({x["id"]}, user_name, {x["xp"]}, {x["source"]}, {x["description"]}, {x["reference"]}, {x["multiplier"]}, {x["time"]})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            transaction_id,
+            user_name, 
+            final_xp, 
+            source, 
+            description, 
+            reference_id, 
+            multiplier, 
+            awarded_at
+        ]).fetchone()[0]
+        
+        if inserted:
+            # Keep the leaderboard buckets in step with the ledger
+            record_xp(conn, user_name, final_xp, awarded_at)
+        return final_xp if inserted else None
+    
+    def award_xp(self, user_name, xp_amount, source, description="", reference_id=None, multiplier=None):
+        """
+        Award XP to a user; awarding the same reference_id twice is ignored
+        multiplier=None applies today's event multiplier for `source`
+        """
         try:
-            # Generate unique transaction_id
-            transaction_id = f"{user_name}_{source}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+            if multiplier is None:
+                multiplier = event_multiplier(source)
             
             # Generate unique reference_id if not provided
             if reference_id is None:
                 reference_id = f"{source}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
             
             with duckdb.connect(self.db_path) as conn:
-                # Check if this reference_id already exists (prevent duplicates)
-                existing = conn.execute("""
-                    SELECT COUNT(*) FROM xp_transactions 
-                    WHERE user_name = ? AND reference_id = ?
-                """, [user_name, reference_id]).fetchone()[0]
+                conn.execute("BEGIN TRANSACTION")
+                final_xp = self._insert_xp(conn, user_name, xp_amount, source, description, reference_id, multiplier)
+                conn.execute("COMMIT")
                 
-                if existing > 0:
+                if final_xp is None:
                     logger.warning(f"⚠️ XP already awarded for reference_id: {reference_id}")
                     return False
                 
-                # Insert new XP transaction
-                final_xp = int(xp_amount * multiplier)
-                
-                conn.execute("""
-                    INSERT INTO xp_transactions 
-                    (transaction_id, user_name, xp_amount, source, description, reference_id, multiplier, timestamp)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, [
-                    transaction_id,
-                    user_name, 
-                    final_xp, 
-                    source, 
-                    description, 
-                    reference_id, 
-                    multiplier, 
-                    datetime.now()
-                ])
-                
                 logger.info(f"✅ Awarded {final_xp} XP to {user_name} (source: {source})")
                 return True
                 
@@ -150,50 +109,47 @@ class XPTransactionEngine:
             return False
     
     def complete_daily_challenge(self, user_name, challenge_id, challenge_type, xp_reward):
-        """Complete a daily challenge and award XP - FIXED VERSION"""
+        """
+        Complete a daily challenge and award XP in one transaction
+        (user_name, challenge_id, completion_date) is unique, so a double click
+        inserts nothing the second time
+        """
         try:
-            # Generate unique completion_id
             completion_id = f"{user_name}_{challenge_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+            today = date.today()
             
             with duckdb.connect(self.db_path) as conn:
-                # Check if challenge already completed today
-                today = date.today()
-                existing = conn.execute("""
-                    SELECT COUNT(*) FROM daily_challenge_completion 
-                    WHERE user_name = ? AND challenge_id = ? AND DATE(completed_at) = ?
-                """, [user_name, challenge_id, today]).fetchone()[0]
-                
-                if existing > 0:
-                    logger.warning(f"⚠️ Challenge already completed today: {challenge_id}")
-                    return False
-                
-                # Record challenge completion
-                conn.execute("""
-                    INSERT INTO daily_challenge_completion 
-                    (completion_id, user_name, challenge_id, challenge_type, xp_reward, completed_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, [completion_id, user_name, challenge_id, challenge_type, xp_reward, datetime.now()])
-                
-                # Award the XP
-                success = self.award_xp(
-                    user_name=user_name,
-                    xp_amount=xp_reward,
-                    source="daily_challenge",
-                    description=f"Daily Challenge: {challenge_type}",
-                    reference_id=f"challenge_{challenge_id}_{today.strftime('%Y%m%d')}"
-                )
+                conn.execute("BEGIN TRANSACTION")
+                try:
+                    d = xp_columns(conn, "daily_challenge_completion")
+                    recorded = conn.execute(f"""
+                        INSERT OR IGNORE INTO daily_challenge_completion 
+                        ({d["id"]}, user_name, {d["challenge"]}, {d["type"]}, {d["xp"]}, {d["time"]}, completion_date)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, [completion_id, user_name, challenge_id, challenge_type, xp_reward, datetime.now(), today]).fetchone()[0]
+                    
+                    if not recorded:
+                        conn.execute("ROLLBACK")
+                        logger.warning(f"⚠️ Challenge already completed today: {challenge_id}")
+                        return False
+                    
+                    self._insert_xp(
+                        conn,
+                        user_name=user_name,
+                        xp_amount=xp_reward,
+                        source="daily_challenge",
+                        description=f"Daily Challenge: {challenge_type}",
+                        reference_id=f"challenge_{challenge_id}_{today.strftime('%Y%m%d')}",
+                        multiplier=event_multiplier(challenge_type, today)
+                    )
+                    record_quest_progress(conn, user_name, {"source": "daily_challenge", "challenge_type": challenge_type})
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
                 
-                if success:
-                    logger.info(f"✅ Challenge completed: {challenge_id} (+{xp_reward} XP)")
-                    return True
-                else:
-                    # Rollback challenge completion if XP award failed
-                    conn.execute("""
-                        DELETE FROM daily_challenge_completion 
-                        WHERE completion_id = ?
-                    """, [completion_id])
-                    logger.warning(f"⚠️ Rolled back challenge completion due to XP award failure")
-                    return False
+                logger.info(f"✅ Challenge completed: {challenge_id} (+{xp_reward} XP)")
+                return True
                 
         except Exception as e:
             logger.error(f"❌ Error completing challenge: {e}")
@@ -203,9 +159,11 @@ class XPTransactionEngine:
         """Get user's total XP and breakdown - FIXED VERSION"""
         try:
             with duckdb.connect(self.db_path) as conn:
+                x = xp_columns(conn, "xp_transactions")
+                
                 # Get total XP
-                total_result = conn.execute("""
-                    SELECT COALESCE(SUM(xp_amount), 0) as total_xp
+                total_result = conn.execute(f"""
+                    SELECT COALESCE(SUM({x["xp"]}), 0) as total_xp
                     FROM xp_transactions 
                     WHERE user_name = ?
                 """, [user_name]).fetchone()
@@ -213,22 +171,22 @@ class XPTransactionEngine:
                 total_xp = total_result[0] if total_result else 0
                 
                 # Get XP breakdown by source
-                breakdown_result = conn.execute("""
-                    SELECT source, SUM(xp_amount) as xp
+                breakdown_result = conn.execute(f"""
+                    SELECT {x["source"]}, SUM({x["xp"]}) as xp
                     FROM xp_transactions 
                     WHERE user_name = ?
-                    GROUP BY source
+                    GROUP BY {x["source"]}
                     ORDER BY xp DESC
                 """, [user_name]).fetchall()
                 
                 breakdown = [{"source": row[0], "xp": row[1]} for row in breakdown_result]
                 
                 # Get recent transactions (last 10)
-                recent_result = conn.execute("""
-                    SELECT xp_amount, source, description, multiplier, timestamp
+                recent_result = conn.execute(f"""
+                    SELECT {x["xp"]}, {x["source"]}, {x["description"]}, {x["multiplier"]}, {x["time"]}
                     FROM xp_transactions 
                     WHERE user_name = ?
-                    ORDER BY timestamp DESC
+                    ORDER BY {x["time"]} DESC
                     LIMIT 10
                 """, [user_name]).fetchall()
                 
@@ -260,12 +218,14 @@ class XPTransactionEngine:
         
         try:
             with duckdb.connect(self.db_path) as conn:
+                d = xp_columns(conn, "daily_challenge_completion")
+                
                 # Get challenges completed on target date
-                completed_result = conn.execute("""
-                    SELECT challenge_id, challenge_type, xp_reward, completed_at
+                completed_result = conn.execute(f"""
+                    SELECT {d["challenge"]}, {d["type"]}, {d["xp"]}, {d["time"]}
                     FROM daily_challenge_completion 
-                    WHERE user_name = ? AND DATE(completed_at) = ?
-                    ORDER BY completed_at DESC
+                    WHERE user_name = ? AND completion_date = ?
+                    ORDER BY {d["time"]} DESC
                 """, [user_name, target_date]).fetchall()
                 
                 completed_challenges = [
@@ -293,64 +253,49 @@ class XPTransactionEngine:
             return {"completed_challenges": [], "total_completed": 0, "total_xp_earned": 0}
     
     def get_xp_leaderboard(self, limit=10, timeframe="weekly"):
-        """Get XP leaderboard for specified timeframe"""
+        """Get XP leaderboard for specified timeframe (weekly, monthly or all_time)"""
         try:
-            with duckdb.connect(self.db_path) as conn:
-                # Calculate date filter based on timeframe
-                if timeframe == "weekly":
-                    date_filter = "WHERE timestamp >= CURRENT_DATE - INTERVAL 7 DAYS"
-                elif timeframe == "monthly":
-                    date_filter = "WHERE timestamp >= CURRENT_DATE - INTERVAL 30 DAYS"
-                else:  # all_time
-                    date_filter = ""
-                
-                query = f"""
-                    SELECT 
-                        user_name,
-                        SUM(xp_amount) as total_xp,
-                        (SUM(xp_amount) / 100) + 1 as level,
-                        ROW_NUMBER() OVER (ORDER BY SUM(xp_amount) DESC) as rank
-                    FROM xp_transactions 
-                    {date_filter}
-                    GROUP BY user_name
-                    ORDER BY total_xp DESC
-                    LIMIT ?
-                """
-                
-                result = conn.execute(query, [limit]).fetchall()
-                
-                return [
-                    {
-                        "rank": row[3],
-                        "user_name": row[0],
-                        "total_xp": row[1],
-                        "level": int(row[2])
-                    }
-                    for row in result
-                ]
-                
+            return self.leaderboard.get_leaderboard(limit=limit, timeframe=timeframe)
         except Exception as e:
             logger.error(f"❌ Error getting leaderboard: {e}")
             return []
     
+    def get_user_rank(self, user_name, timeframe="weekly"):
+        """Get a single user's leaderboard position without ranking everyone"""
+        try:
+            return self.leaderboard.get_user_rank(user_name, timeframe=timeframe)
+        except Exception as e:
+            logger.error(f"❌ Error getting user rank: {e}")
+            return None
+    
     def reset_daily_challenges(self, user_name, target_date=None):
         """Reset daily challenges for testing purposes"""
         if target_date is None:
             target_date = date.today()
+        # Range on the stored timestamps rather than DATE(column) = ?, which can't use an index
+        day_start = datetime.combine(target_date, datetime.min.time())
+        day_end = day_start + timedelta(days=1)
         
         try:
             with duckdb.connect(self.db_path) as conn:
+                d = xp_columns(conn, "daily_challenge_completion")
+                x = xp_columns(conn, "xp_transactions")
+                
                 # Delete challenge completions for the target date
-                conn.execute("""
+                conn.execute(f"""
                     DELETE FROM daily_challenge_completion 
-                    WHERE user_name = ? AND DATE(completed_at) = ?
-                """, [user_name, target_date])
+                    WHERE user_name = ? AND {d["time"]} >= ? AND {d["time"]} < ?
+                """, [user_name, day_start, day_end])
                 
                 # Delete related XP transactions
-                conn.execute("""
+                conn.execute(f"""
                     DELETE FROM xp_transactions 
-                    WHERE user_name = ? AND source = 'daily_challenge' AND DATE(timestamp) = ?
-                """, [user_name, target_date])
+                    WHERE user_name = ? AND {x["source"]} = 'daily_challenge' AND {x["time"]} >= ? AND {x["time"]} < ?
+                """, [user_name, day_start, day_end])
+                
+                # Deleted XP must leave the leaderboard buckets too
+                rebuild_buckets(conn, user_name)
+                self.leaderboard.invalidate()
                 
                 logger.info(f"✅ Reset daily challenges for {user_name} on {target_date}")
                 return True
@@ -396,19 +341,10 @@ def handle_challenge_completion(xp_engine, user_name, challenge_data):
         xp_reward=challenge_data["xp_reward"]
     )
 
-def get_event_multiplier():
-    """Get current event multiplier based on season/date"""
-    current_month = datetime.now().month
-    
-    # Seasonal multipliers
-    if current_month in [12, 1, 2]:  # Winter
-        return {"bitcoin": 2.0, "default": 1.0, "season": "Winter Bitcoin Accumulation"}
-    elif current_month in [6, 7, 8]:  # Summer  
-        return {"exercise": 2.0, "default": 1.0, "season": "Summer Fitness Boost"}
-    elif current_month in [11]:  # November
-        return {"gratitude": 3.0, "default": 1.0, "season": "Gratitude Season"}
-    else:
-        return {"default": 1.0, "season": "Standard"}
+def get_event_multiplier(day=None):
+    """Event multipliers by category for `day` (default today), from config/events.json"""
+    event = CALENDAR.primary_event(day)
+    return {**CALENDAR.multipliers(day), "season": event["name"] if event else "Standard"}
 
 def main():
     """Test the XP system"""